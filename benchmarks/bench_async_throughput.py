@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the async agent pipeline.
+
+Runs FoodieAgent.process_message against a fake Groq backend with a fixed
+latency and measures how many replies per second the agent completes as the
+number of concurrent users grows. No network access is needed.
+
+Usage:
+    python benchmarks/bench_async_throughput.py [--latency 0.5] [--messages 5]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+# Add repo root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from src.agent.agent_core import FoodieAgent
+
+
+def make_fake_chat(latency: float):
+    """Fake GroqClient.chat that only waits for `latency` seconds"""
+    async def fake_chat(messages, tools=None, **kwargs):
+        await asyncio.sleep(latency)
+        return {"content": "Coba **nasi goreng** 🍳", "tool_calls": None, "role": "assistant"}
+    return fake_chat
+
+
+async def run_users(agent: FoodieAgent, users: int, messages: int) -> float:
+    """Run `users` concurrent users sending `messages` each, return elapsed seconds"""
+    async def user_session(user_id: str):
+        for i in range(messages):
+            await agent.process_message(user_id, user_id, f"Pesan ke-{i}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*[user_session(f"bench_user_{u}") for u in range(users)])
+    return time.perf_counter() - start
+
+
+async def main(latency: float, messages: int, user_counts):
+    agent = FoodieAgent()
+
+    print("\n" + "=" * 60)
+    print(f"Async throughput (fake LLM latency {latency * 1000:.0f}ms, {messages} msgs/user)")
+    print("=" * 60)
+    print(f"{'users':>8} {'requests':>10} {'elapsed (s)':>12} {'req/s':>10}")
+
+    with patch.object(agent.llm, "chat", side_effect=make_fake_chat(latency)):
+        for users in user_counts:
+            elapsed = await run_users(agent, users, messages)
+            total = users * messages
+            print(f"{users:>8} {total:>10} {elapsed:>12.2f} {total / elapsed:>10.1f}")
+
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Async agent throughput benchmark")
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake LLM latency in seconds")
+    parser.add_argument("--messages", type=int, default=5, help="Messages per user")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 2, 5, 10, 25, 50])
+    args = parser.parse_args()
+
+    asyncio.run(main(args.latency, args.messages, args.users))
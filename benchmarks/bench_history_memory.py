@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Bytes per stored turn: list of dicts vs compact History ring buffers.
+
+Builds N users with a full history each, once as the old
+`[{"role": ..., "content": ...}]` lists and once as `History` of slotted
+`Turn`s, and measures traced memory. Message text is identical in both, so
+the difference is pure representation overhead.
+
+Usage:
+    python benchmarks/bench_history_memory.py [--users 10000 100000] [--messages 20]
+"""
+
+import argparse
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+
+# Add repo root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.agent.history import History
+
+
+def make_text(user: int, i: int) -> str:
+    if i % 2 == 0:
+        return f"Budget 30rb di Bandung, enaknya makan apa? ({user}/{i})"
+    return f"Coba **Bakso Malang** atau **Mie Kocok**, pas buat cuaca hujan 🍜 ({user}/{i})"
+
+
+def build_dicts(users: int, messages: int):
+    return {
+        str(u): [
+            {"role": "user" if i % 2 == 0 else "assistant", "content": make_text(u, i)}
+            for i in range(messages)
+        ]
+        for u in range(users)
+    }
+
+
+def build_compact(users: int, messages: int):
+    store = {}
+    for u in range(users):
+        history = History(messages)
+        for i in range(messages):
+            history.append({"role": "user" if i % 2 == 0 else "assistant", "content": make_text(u, i)})
+        store[str(u)] = history
+    return store
+
+
+def measure(builder, users: int, messages: int) -> int:
+    gc.collect()
+    tracemalloc.start()
+    store = builder(users, messages)
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del store
+    gc.collect()
+    return used
+
+
+def text_bytes(users: int, messages: int) -> int:
+    return sum(sys.getsizeof(make_text(u, i)) for u in range(users) for i in range(messages))
+
+
+def main(user_counts, messages: int):
+    print("\n" + "=" * 72)
+    print(f"Conversation history memory ({messages} messages/user)")
+    print("=" * 72)
+    print(f"{'users':>8} {'format':>8} {'total MB':>10} {'B/turn':>8} {'overhead B/turn':>16}")
+
+    for users in user_counts:
+        turns = users * messages
+        text = text_bytes(users, messages)
+        for name, builder in (("dicts", build_dicts), ("compact", build_compact)):
+            used = measure(builder, users, messages)
+            print(f"{users:>8} {name:>8} {used / 1e6:>10.1f} {used / turns:>8.0f} "
+                  f"{(used - text) / turns:>16.0f}")
+
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="History representation memory benchmark")
+    parser.add_argument("--users", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--messages", type=int, default=20)
+    args = parser.parse_args()
+
+    main(args.users, args.messages)
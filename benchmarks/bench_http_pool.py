@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: bare requests.get vs the shared pooled session.
+
+By default both clients hit a local keep-alive HTTP server, so the saving
+shown is the TCP connect + session setup per call. Pass --url to measure
+against a real HTTPS endpoint, where the TLS handshake is saved as well.
+
+Usage:
+    python benchmarks/bench_http_pool.py [--calls 200] [--url https://...]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+# Add repo root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.utils.http_client import close_session, http_get
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; avoid Nagle/delayed-ACK stalls on keep-alive
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        body = b'{"weather": [{"main": "Clear"}], "main": {"temp": 30}}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_local_server() -> str:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}/data/2.5/weather"
+
+
+def time_calls(get, url: str, calls: int):
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        get(url, params={"q": "Jakarta"}, timeout=10).raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(name: str, latencies):
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{name:<22} {statistics.mean(latencies):>10.3f} {p50:>10.3f} {p99:>10.3f}")
+    return statistics.mean(latencies)
+
+
+def main(url: str, calls: int):
+    url = url or start_local_server()
+
+    # Warm up both paths (DNS, first pooled connection)
+    requests.get(url, timeout=10)
+    http_get(url)
+
+    print("\n" + "=" * 60)
+    print(f"HTTP client per-call latency ({calls} calls)")
+    print(f"Target: {url}")
+    print("=" * 60)
+    print(f"{'client':<22} {'mean (ms)':>10} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+
+    bare = report("requests.get", time_calls(requests.get, url, calls))
+    pooled = report("pooled session", time_calls(http_get, url, calls))
+
+    print("=" * 60)
+    print(f"Saved per call: {bare - pooled:.3f} ms ({(1 - pooled / bare) * 100:.0f}%)")
+    close_session()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pooled HTTP client micro-benchmark")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--url", default=os.getenv("BENCH_HTTP_URL"))
+    args = parser.parse_args()
+
+    main(args.url, args.calls)
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Offline load test for the full reply pipeline.
+
+Simulated users send a seeded mix of messages (small talk, fast-path
+calorie questions and requests that make the model call a tool). The
+messages go through FoodieAgent.process_message, or through the Discord
+on_message handler with fake Discord messages. GroqClient talks over HTTP
+to a local fake Groq server with configurable latency and tool-call rate,
+so the SDK, rate limiter, router, tools and scheduler all run for real.
+No network is needed.
+
+Reports requests/s, latency percentiles, Groq calls and peak memory. With
+--json the report is saved, and --compare prints the change against a
+saved report, so runs can be compared before a deploy.
+
+Usage:
+    python benchmarks/bench_load.py [--target agent|discord|both] [--users 50] [--messages 5]
+        [--groq-latency 0.3] [--groq-jitter 0.2] [--tool-call-rate 0.4]
+        [--json results.json] [--compare baseline.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Add repo root (and tests/, for the stand-in Groq server) to path
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "tests"))
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from standins import FakeGroqServer
+from src.agent.agent_core import FoodieAgent
+from src.config import Config
+from src.integrations.discord_bot import FoodieDiscordBot
+
+# Message mix: (weight, texts)
+WORKLOAD = [
+    (0.3, ["Halo!", "Makasih ya", "Lagi bingung mau makan apa nih", "Siang ini enaknya apa?"]),
+    (0.3, ["Kalori nasi goreng?", "Kalori bakso", "Berapa kalori rendang?", "Kalori es teh manis"]),
+    (0.4, ["Rekomendasi makan malam yang anget dong, lagi hujan",
+           "Aku lagi diet, menu makan siang yang sehat apa ya?",
+           "Kalori soto ayam sama nasi putih berapa totalnya?"]),
+]
+
+# Tools the fake model calls (local tools only: no network)
+FAKE_TOOL_CALLS = [
+    ("calculate_calories", {"food_name": "nasi goreng", "portion": "medium"}),
+    ("calculate_meal_calories", {"items": [{"food_name": "soto ayam"}, {"food_name": "nasi putih"}]}),
+    ("get_meal_time_recommendation", {"time_of_day": "malam", "mood": "hujan"}),
+]
+
+
+def build_workload(users: int, messages: int, seed: int):
+    """Per-user message lists, identical for the same seed"""
+    rng = random.Random(seed)
+    weights = [weight for weight, _ in WORKLOAD]
+    return [
+        [rng.choice(rng.choices(WORKLOAD, weights)[0][1]) for _ in range(messages)]
+        for _ in range(users)
+    ]
+
+
+def percentile(ordered, p: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+class FakeSent:
+    """Message the bot posted; edits and deletes just wait like a Discord API call"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def edit(self, content: str):
+        await asyncio.sleep(self.latency)
+
+    async def delete(self):
+        await asyncio.sleep(self.latency)
+
+
+class FakeTyping:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeChannel:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def typing(self):
+        return FakeTyping()
+
+    async def send(self, content: str):
+        await asyncio.sleep(self.latency)
+        return FakeSent(self.latency)
+
+
+class FakeMessage:
+    """Enough of discord.Message for FoodieDiscordBot.on_message"""
+
+    def __init__(self, user_id: int, content: str, bot_id: int, latency: float):
+        self.author = SimpleNamespace(id=user_id, name=f"user{user_id}", bot=False)
+        self.content = f"<@{bot_id}> {content}"
+        # Read by commands.Context; unused when no command matches
+        self._state = None
+        self.channel = FakeChannel(latency)
+        self.latency = latency
+        self.first_reply_at = None
+
+    async def reply(self, content: str):
+        await asyncio.sleep(self.latency)
+        if self.first_reply_at is None:
+            self.first_reply_at = time.perf_counter()
+        return FakeSent(self.latency)
+
+
+async def run_agent(workload, think: float, seed: int):
+    """Drive FoodieAgent.process_message; returns per-request latencies"""
+    agent = FoodieAgent()
+    latencies = []
+
+    async def user_session(user: int, texts):
+        rng = random.Random(seed + user)
+        for text in texts:
+            started = time.perf_counter()
+            await agent.process_message(f"load_user_{user}", f"user{user}", text)
+            latencies.append(time.perf_counter() - started)
+            if think:
+                await asyncio.sleep(rng.expovariate(1 / think))
+
+    start = time.perf_counter()
+    await asyncio.gather(*[user_session(u, texts) for u, texts in enumerate(workload)])
+    elapsed = time.perf_counter() - start
+    await agent.close()
+    return latencies, [], elapsed
+
+
+async def run_discord(workload, think: float, seed: int, discord_latency: float):
+    """Drive FoodieDiscordBot.on_message with fake messages; returns latencies and first-reply latencies"""
+    bot = FoodieDiscordBot()
+    bot_user = SimpleNamespace(id=1, name="FoodieBot", mentioned_in=lambda message: True)
+    latencies, first_replies = [], []
+
+    async def user_session(user: int, texts):
+        rng = random.Random(seed + user)
+        for text in texts:
+            message = FakeMessage(1000 + user, text, bot_user.id, discord_latency)
+            started = time.perf_counter()
+            await bot.on_message(message)
+            latencies.append(time.perf_counter() - started)
+            if message.first_reply_at:
+                first_replies.append(message.first_reply_at - started)
+            if think:
+                await asyncio.sleep(rng.expovariate(1 / think))
+
+    # Not logged in: stand in for the bot's own user
+    with patch.object(type(bot), "user", bot_user):
+        start = time.perf_counter()
+        await asyncio.gather(*[user_session(u, texts) for u, texts in enumerate(workload)])
+        elapsed = time.perf_counter() - start
+    await bot.agent.close()
+    return latencies, first_replies, elapsed
+
+
+def summarize(name: str, latencies, first_replies, elapsed: float, groq_calls: int, peak_mb: float):
+    ordered = sorted(latencies)
+    first = sorted(first_replies)
+    return {
+        "target": name,
+        "requests": len(ordered),
+        "elapsed_s": round(elapsed, 3),
+        "req_per_s": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 1),
+        "p90_ms": round(percentile(ordered, 0.90) * 1000, 1),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 1),
+        "max_ms": round(ordered[-1] * 1000, 1) if ordered else 0.0,
+        "first_reply_p50_ms": round(percentile(first, 0.50) * 1000, 1) if first else None,
+        "groq_calls": groq_calls,
+        "peak_traced_mb": round(peak_mb, 2)
+    }
+
+
+async def run_target(target: str, args) -> dict:
+    workload = build_workload(args.users, args.messages, args.seed)
+    server = FakeGroqServer(
+        default_delay=args.groq_latency,
+        jitter=args.groq_jitter,
+        tool_call_rate=args.tool_call_rate,
+        tool_calls=FAKE_TOOL_CALLS,
+        reply="Coba **nasi goreng** atau **soto ayam** yang anget ya! 🍜",
+        seed=args.seed
+    )
+
+    # Real limits would throttle a load test; STREAM_RESPONSES picks the Discord path
+    settings = {
+        "GROQ_BASE_URL": server.url,
+        "GROQ_RPM_LIMIT": args.rpm,
+        "GROQ_TPM_LIMIT": args.rpm * 1000,
+        "STREAM_RESPONSES": args.stream,
+        "STORAGE_BACKEND": "memory",
+        "METRICS_PORT": 0,
+    }
+    with server, patch.multiple(Config, **settings):
+        tracemalloc.start()
+        if target == "agent":
+            latencies, first_replies, elapsed = await run_agent(workload, args.think, args.seed)
+        else:
+            latencies, first_replies, elapsed = await run_discord(
+                workload, args.think, args.seed, args.discord_latency
+            )
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return summarize(target, latencies, first_replies, elapsed, len(server.requests), peak / 1024 / 1024)
+
+
+def print_report(results, baseline=None):
+    print("\n" + "=" * 78)
+    print(f"{'target':>8} {'reqs':>6} {'req/s':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} "
+          f"{'max ms':>8} {'groq':>6} {'peak MB':>8}")
+    print("=" * 78)
+    for r in results:
+        print(f"{r['target']:>8} {r['requests']:>6} {r['req_per_s']:>8.1f} {r['p50_ms']:>8.0f} "
+              f"{r['p90_ms']:>8.0f} {r['p99_ms']:>8.0f} {r['max_ms']:>8.0f} {r['groq_calls']:>6} "
+              f"{r['peak_traced_mb']:>8.2f}")
+        if r["first_reply_p50_ms"] is not None:
+            print(f"{'':>8} first Discord reply p50: {r['first_reply_p50_ms']:.0f}ms")
+
+        base = (baseline or {}).get(r["target"])
+        if base:
+            changes = []
+            for key in ("req_per_s", "p50_ms", "p99_ms", "peak_traced_mb"):
+                if base.get(key):
+                    changes.append(f"{key} {(r[key] - base[key]) / base[key] * 100:+.1f}%")
+            print(f"{'':>8} vs baseline: {', '.join(changes)}")
+    print("=" * 78)
+    print(f"Process peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MB")
+
+
+async def main(args):
+    targets = ["agent", "discord"] if args.target == "both" else [args.target]
+    results = [await run_target(target, args) for target in targets]
+
+    baseline = None
+    if args.compare:
+        saved = json.loads(Path(args.compare).read_text())
+        baseline = {r["target"]: r for r in saved["results"]}
+
+    print(f"\nLoad test: {args.users} users x {args.messages} msgs, fake Groq "
+          f"{args.groq_latency * 1000:.0f}ms (+{args.groq_jitter * 1000:.0f}ms jitter), "
+          f"tool-call rate {args.tool_call_rate:.0%}, seed {args.seed}")
+    print_report(results, baseline)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({"args": vars(args), "results": results}, indent=2))
+        print(f"Saved report to {args.json}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline load test (fake Groq backend, no network)")
+    parser.add_argument("--target", choices=["agent", "discord", "both"], default="both")
+    parser.add_argument("--users", type=int, default=50, help="Concurrent simulated users")
+    parser.add_argument("--messages", type=int, default=5, help="Messages per user")
+    parser.add_argument("--think", type=float, default=0.0, help="Mean think time between a user's messages (s)")
+    parser.add_argument("--groq-latency", type=float, default=0.3, help="Fake Groq base latency (s)")
+    parser.add_argument("--groq-jitter", type=float, default=0.2, help="Extra uniform latency (s)")
+    parser.add_argument("--tool-call-rate", type=float, default=0.4, help="Share of tool-offering calls answered with a tool call")
+    parser.add_argument("--discord-latency", type=float, default=0.05, help="Fake Discord send/edit latency (s)")
+    parser.add_argument("--stream", action=argparse.BooleanOptionalAction, default=Config.STREAM_RESPONSES,
+                        help="Discord target: stream replies with edits")
+    parser.add_argument("--rpm", type=int, default=100000, help="Client-side Groq RPM limit during the run")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Save the report to this file")
+    parser.add_argument("--compare", help="Compare against a report saved with --json")
+    args = parser.parse_args()
+
+    asyncio.run(main(args))
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for the conversation store.
+
+Fills FoodieAgent.conversations with synthetic users (each with a full
+history of typical-length turns) and measures traced memory with
+tracemalloc. Inserting more users than MAX_ACTIVE_USERS shows the memory
+ceiling: past the cap, LRU eviction keeps usage flat.
+
+Usage:
+    python benchmarks/bench_memory.py [--max-users 5000] [--turns 10]
+"""
+
+import argparse
+import os
+import sys
+import tracemalloc
+from pathlib import Path
+
+# Add repo root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from src.agent.agent_core import FoodieAgent
+from src.config import Config
+
+USER_TEXT = "Lagi hujan nih di Bandung, budget 30rb, enaknya makan apa ya yang anget?"
+BOT_TEXT = (
+    "Wah cocok banget buat yang anget-anget! 🍜 Coba **Bakso Malang**, **Soto Bandung**, "
+    "atau **Mie Kocok**. Semuanya masih di bawah 30rb dan pas buat cuaca hujan. "
+    "Mau aku carikan tempat terdekat?"
+)
+
+
+def fill(agent: FoodieAgent, users: int, turns: int, offset: int = 0):
+    for u in range(offset, offset + users):
+        discord_id = str(100000000000000000 + u)
+        history = []
+        for t in range(turns):
+            history.append({"role": "user", "content": f"{USER_TEXT} #{t}"})
+            history.append({"role": "assistant", "content": f"{BOT_TEXT} #{t}"})
+        agent.conversations[discord_id] = history
+
+
+def main(max_users: int, turns: int):
+    Config.MAX_ACTIVE_USERS = max_users
+    agent = FoodieAgent()
+
+    print("\n" + "=" * 60)
+    print(f"Conversation store memory (cap {max_users} users, {turns} turns/user)")
+    print("=" * 60)
+    print(f"{'users inserted':>15} {'users kept':>12} {'traced MB':>12} {'KB/user':>10}")
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    inserted = 0
+
+    for step in (0.25, 0.5, 1.0, 2.0, 4.0):
+        target = int(max_users * step)
+        fill(agent, target - inserted, turns, offset=inserted)
+        inserted = target
+
+        used = tracemalloc.get_traced_memory()[0] - baseline
+        kept = len(agent.conversations)
+        print(f"{inserted:>15} {kept:>12} {used / 1e6:>12.2f} {used / kept / 1024:>10.2f}")
+
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+
+    print("=" * 60)
+    print(f"Peak: {peak / 1e6:.2f} MB, evicted: {agent.conversations.evicted}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Conversation store memory benchmark")
+    parser.add_argument("--max-users", type=int, default=Config.MAX_ACTIVE_USERS)
+    parser.add_argument("--turns", type=int, default=Config.MAX_CONVERSATION_HISTORY)
+    args = parser.parse_args()
+
+    main(args.max_users, args.turns)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Nutrition lookup latency: indexed NutritionIndex vs the old linear scan.
+
+The bundled table is padded with synthetic variants of its own foods
+("nasi goreng <variant>") up to each size, the way real tables grow, so
+common tokens like "nasi" get long postings. Queries mix exact names,
+aliases, typos, partial names and misses.
+
+Usage:
+    python benchmarks/bench_nutrition_lookup.py [--sizes 1000 10000 50000] [--rounds 2000]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add repo root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.agent.nutrition import DEFAULT_DATA_PATH, FoodEntry, NutritionIndex
+
+QUERIES = [
+    "nasi goreng", "nasgor", "Nasi Goreng Ayam", "rendank", "gado gado",
+    "nasi goreng kampung", "es teh manis", "sate ayam madura", "makanan aneh xyz",
+]
+
+VARIANTS = [f"varian{i}" for i in range(1000)]
+
+
+def build_entries(size: int):
+    base = NutritionIndex.from_csv(DEFAULT_DATA_PATH)
+    entries = [(entry, []) for entry in base.entries]
+    rng = random.Random(42)
+    foods = base.entries
+    while len(entries) < size:
+        food = rng.choice(foods)
+        name = f"{food.name} {rng.choice(VARIANTS)} {len(entries)}"
+        entries.append((FoodEntry(name, food.serving, food.calories, food.protein, food.carbs, food.fat), []))
+    return entries
+
+
+def linear_lookup(table, query: str):
+    """The previous approach: first substring match in table order"""
+    query = query.lower()
+    for name, calories in table:
+        if name in query or query in name:
+            return calories
+    return None
+
+
+def time_per_call(func, rounds: int) -> float:
+    start = time.perf_counter()
+    for i in range(rounds):
+        func(QUERIES[i % len(QUERIES)])
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+def main(sizes, rounds: int):
+    print("\n" + "=" * 64)
+    print("Nutrition lookup latency (µs per lookup)")
+    print("=" * 64)
+    print(f"{'entries':>8} {'build ms':>9} {'index µs':>9} {'linear µs':>10}")
+
+    for size in sizes:
+        entries = build_entries(size)
+        start = time.perf_counter()
+        index = NutritionIndex(entries)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        table = [(entry.name, entry.calories) for entry, _ in entries]
+        indexed = time_per_call(index.lookup, rounds)
+        linear = time_per_call(lambda q: linear_lookup(table, q), rounds)
+        print(f"{size:>8} {build_ms:>9.1f} {indexed:>9.1f} {linear:>10.1f}")
+
+    print("=" * 64)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Nutrition lookup benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    main(args.sizes, args.rounds)
@@ -31,7 +31,7 @@ def main():
         print("🍕 FoodieBot - AI Food Recommendation Agent")
         print("="*60)
         print(f"🧠 Model: {Config.GROQ_MODEL}")
-        print(f"💾 Storage: In-Memory (session-based)")
+        print(f"💾 Storage: {'SQLite' if Config.STORAGE_BACKEND.lower() == 'sqlite' else 'In-Memory (session-based)'}")
         print(f"🌤️  Weather: {'Enabled' if Config.WEATHER_API_KEY else 'Disabled'}")
         print("="*60)
         print()
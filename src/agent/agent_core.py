@@ -1,149 +1,442 @@
 from src.agent.llm_client import GroqClient
-from src.agent.tools import get_tools_definition, execute_tool
-from src.agent.prompts import get_system_prompt
+from src.agent.context import ContextBuilder
+from src.agent.conversation_store import ConversationStore
+from src.agent.history import History, Turn
+from src.agent.intent_router import IntentRouter
+from src.agent.model_router import PURPOSE_CHAT, PURPOSE_TOOL_FOLLOWUP
+from src.agent.storage import create_storage
+from src.agent.tools import execute_tool_async
+from src.agent.prompt_builder import PromptAssembler
 from src.config import Config
-from typing import Dict, List
+from src.utils.helpers import sanitize_response
+from src.utils.logger import bind_request, log_stage, stage_durations
+from src.utils.metrics import errors_total, fallbacks_total, reply_latency
+from src.utils.tracing import span, start_span
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
 import logging
 import json
+import time
 
 logger = logging.getLogger(__name__)
 
+TIMEOUT_REPLY = "Maaf, aku butuh waktu terlalu lama untuk menjawab. Coba tanya lagi ya! ⏳"
+
 class FoodieAgent:
-    """Main FoodieBot agent with in-memory conversation storage"""
+    """Main FoodieBot agent with bounded in-memory conversation storage"""
     
-    def __init__(self):
+    def __init__(self, storage=None):
         self.llm = GroqClient()
-        self.system_prompt = get_system_prompt()
-        self.tools = get_tools_definition()
+        # System prompt and tool schemas are built once (stable, cacheable prefix)
+        self.prompt = PromptAssembler()
+        self.system_prompt = self.prompt.system_prompt
+        self.tools = self.prompt.tools
+        
+        # Durable backend (write-behind); in-memory by default
+        self.storage = storage or create_storage()
+        # Rolling summaries are persisted alongside the history they replace
+        self.context = ContextBuilder(self.llm, on_summary=self.storage.save_summary)
+        # Rule-based fast path for simple requests (no LLM round trips)
+        self.router = IntentRouter() if Config.INTENT_FAST_PATH else None
         
-        # In-memory storage for conversations (per user)
-        # Format: {discord_id: [{"role": "user/assistant", "content": "..."}]}
-        self.conversations = {}
+        # In-memory storage for conversations (per user), bounded by LRU + idle expiry
+        # Format: {discord_id: History([Turn("user/assistant", "..."), ...])}
+        self.conversations = ConversationStore(
+            max_users=Config.MAX_ACTIVE_USERS,
+            idle_ttl=Config.SESSION_IDLE_TTL,
+            on_evict=self.context.reset,
+            coerce=self._as_history
+        )
         
         # User preferences (optional, in-memory)
         # Format: {discord_id: {"location": "Jakarta", "budget": 50000}}
-        self.user_preferences = {}
+        self.user_preferences = ConversationStore(
+            max_users=Config.MAX_ACTIVE_USERS,
+            idle_ttl=Config.SESSION_IDLE_TTL,
+            name="user_preferences"
+        )
+        
+        logger.info("FoodieAgent initialized with storage: %s", self.storage.description)
+    
+    @staticmethod
+    def _as_history(messages) -> History:
+        """Store conversations as compact fixed-capacity ring buffers"""
+        if isinstance(messages, History):
+            return messages
+        return History(Config.MAX_CONVERSATION_HISTORY * 2, messages)
+    
+    def _read_stored_conversation(self, discord_id: str) -> Tuple[Optional[List[Dict]], Optional[str]]:
+        """Read a user's recent history and rolling summary from storage (blocking)"""
+        history = self.storage.load_conversation(discord_id, Config.MAX_CONVERSATION_HISTORY * 2)
+        return history, self.storage.load_summary(discord_id)
+    
+    async def _load_conversation(self, discord_id: str):
+        """Lazily restore a user's recent history and summary from durable storage"""
+        if not self.storage.persistent or discord_id in self.conversations:
+            return
+        
+        history, summary = await asyncio.to_thread(self._read_stored_conversation, discord_id)
+        if discord_id in self.conversations:
+            return
+        if summary and discord_id not in self.context.summaries:
+            self.context.summaries[discord_id] = summary
+        if history:
+            self.conversations[discord_id] = history
+            logger.info("Restored %s messages for user %s", len(history), discord_id)
+    
+    def _record_user_turn(self, discord_id: str, message: str) -> History:
+        """Append the user message to the user's history (created if needed)"""
+        # Get or create conversation
+        if discord_id not in self.conversations:
+            self.conversations[discord_id] = []
+            logger.info("New conversation started for user %s", discord_id)
+        
+        history = self.conversations[discord_id]
+        
+        # Add user message
+        user_turn = Turn("user", message)
+        history.append(user_turn)
+        self.storage.append_message(discord_id, user_turn)
+        
+        return history
+    
+    def _start_turn(self, discord_id: str, message: str) -> Tuple[History, List]:
+        """
+        Record the user message and build the messages for the LLM
+        
+        Returns:
+            (history, messages) - the stored history and the LLM request messages
+        """
+        history = self._record_user_turn(discord_id, message)
         
-        logger.info("FoodieAgent initialized with in-memory storage")
+        # Build messages: newest turns within the token budget, older ones
+        # are folded into a running summary in the background
+        messages = self.prompt.build(self.context.build(discord_id, history))
+        
+        return history, messages
+    
+    def _finish_turn(self, discord_id: str, history: History, response_text: str) -> str:
+        """Clean the final response and save it to history"""
+        # FILTER: Remove exposed function syntax (safety net)
+        response_text = sanitize_response(response_text)
+        
+        # Save assistant response
+        if response_text:
+            assistant_turn = Turn("assistant", response_text)
+            history.append(assistant_turn)
+            self.storage.append_message(discord_id, assistant_turn)
+        
+        return response_text
+    
+    async def _try_fast_path(self, discord_id: str, message: str, deadline: float) -> Optional[str]:
+        """Answer simple requests straight from a tool, or None to use the LLM"""
+        if self.router is None:
+            return None
+        
+        preferences = await self.get_user_preferences(discord_id)
+        try:
+            # The tool lookup counts against the same response deadline
+            reply = await asyncio.wait_for(
+                self.router.route(message, preferences.get("location")), self._remaining(deadline)
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Response deadline (%ss) hit on the fast path for user %s",
+                           Config.RESPONSE_TIMEOUT, discord_id)
+            fallbacks_total.inc(kind="timeout")
+            reply = TIMEOUT_REPLY
+        if reply is None:
+            return None
+        
+        # Keep the exchange in history so follow-ups have context
+        history = self._record_user_turn(discord_id, message)
+        return self._finish_turn(discord_id, history, reply)
+    
+    @staticmethod
+    def _request_done(discord_id: str, started: float, mode: str):
+        """Record reply latency and log it with the stage durations (JSON log lines carry them as fields)"""
+        elapsed = time.monotonic() - started
+        reply_latency.observe(elapsed, mode=mode)
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        stages = stage_durations()
+        logger.info(
+            "Replied to user %s in %.0fms (%s)", discord_id, elapsed * 1000,
+            ", ".join(f"{name}={ms:.0f}ms" for name, ms in stages.items()) or "no stages",
+            extra={"stages": stages}
+        )
+    
+    @staticmethod
+    def _remaining(deadline: float) -> float:
+        """Seconds left until the response deadline"""
+        return max(0.0, deadline - time.monotonic())
     
-    def process_message(self, discord_id: str, username: str, message: str) -> str:
+    async def _iter_within(self, stream: AsyncIterator, deadline: float) -> AsyncIterator:
+        """Iterate an async stream, raising asyncio.TimeoutError once the deadline passes"""
+        try:
+            while True:
+                try:
+                    # Only time spent waiting on the model counts, not the consumer
+                    with log_stage("llm"):
+                        item = await asyncio.wait_for(stream.__anext__(), self._remaining(deadline))
+                except StopAsyncIteration:
+                    return
+                yield item
+        finally:
+            await stream.aclose()
+    
+    async def process_message(self, discord_id: str, username: str, message: str) -> str:
         """Process user message and return bot response"""
+        trace_span = start_span("agent.process_message", user_id=discord_id)
+        # Log lines of this request carry the trace id
+        bind_request(discord_id, trace_span.trace_id)
+        started = time.monotonic()
+        # End-to-end budget for all LLM and tool calls of this turn
+        deadline = started + Config.RESPONSE_TIMEOUT
+        
         try:
-            # Get or create conversation
-            if discord_id not in self.conversations:
-                self.conversations[discord_id] = []
-                logger.info(f"New conversation started for user {discord_id}")
+            with log_stage("load"):
+                await self._load_conversation(discord_id)
             
-            history = self.conversations[discord_id]
+            with log_stage("fast_path"), span("agent.fast_path"):
+                fast_reply = await self._try_fast_path(discord_id, message, deadline)
+            if fast_reply is not None:
+                return fast_reply
             
-            # Add user message
-            history.append({"role": "user", "content": message})
+            history, messages = self._start_turn(discord_id, message)
             
-            # Keep only recent messages
-            if len(history) > Config.MAX_CONVERSATION_HISTORY * 2:
-                history = history[-Config.MAX_CONVERSATION_HISTORY * 2:]
-                self.conversations[discord_id] = history
+            try:
+                # Call LLM (dengan tools)
+                with log_stage("llm"):
+                    response = await asyncio.wait_for(
+                        self.llm.chat(messages, tools=self.tools, deadline=deadline), self._remaining(deadline)
+                    )
+                
+                # Handle tool calls
+                if response["tool_calls"]:
+                    response_text = await self._handle_tool_calls(response, messages, discord_id, deadline)
+                else:
+                    response_text = response["content"]
             
-            # Build messages
-            messages = [
-                {"role": "system", "content": self.system_prompt}
-            ] + history
+            except asyncio.TimeoutError:
+                logger.warning("Response deadline (%ss) hit for user %s", Config.RESPONSE_TIMEOUT, discord_id)
+                fallbacks_total.inc(kind="timeout")
+                response_text = TIMEOUT_REPLY
             
-            # Call LLM (dengan tools)
-            response = self.llm.chat(messages, tools=self.tools)
+            return self._finish_turn(discord_id, history, response_text)
+        
+        except Exception as e:
+            logger.error("Error processing message: %s", e)
+            errors_total.inc(component="agent")
+            return "Maaf, terjadi kesalahan. Coba lagi ya! 😅"
+        
+        finally:
+            self._request_done(discord_id, started, "reply")
+            trace_span.finish()
+    
+    async def process_message_stream(self, discord_id: str, username: str,
+                                     message: str) -> AsyncIterator[str]:
+        """
+        Process user message and yield the response text as it streams in
+        
+        Tool calls are executed between the streamed LLM calls (up to
+        MAX_TOOL_ROUNDS), so the caller only ever sees text chunks.
+        """
+        trace_span = start_span("agent.process_message_stream", user_id=discord_id)
+        bind_request(discord_id, trace_span.trace_id)
+        started = time.monotonic()
+        deadline = started + Config.RESPONSE_TIMEOUT
+        
+        try:
+            with log_stage("load"):
+                await self._load_conversation(discord_id)
+            
+            with log_stage("fast_path"), span("agent.fast_path"):
+                fast_reply = await self._try_fast_path(discord_id, message, deadline)
+            if fast_reply is not None:
+                yield fast_reply
+                return
             
-            # Handle tool calls
-            if response["tool_calls"]:
-                response_text = self._handle_tool_calls(response, messages, discord_id)
-            else:
-                response_text = response["content"]
+            history, messages = self._start_turn(discord_id, message)
+            chunks = []
+            tools = self.tools
+            rounds = 0
             
-            # FILTER: Remove exposed function syntax (safety net)
-            if response_text:
-                import re
-                # Remove <function=...> tags
-                response_text = re.sub(r'<function=.*?</function>', '', response_text)
-                # Remove JSON-like tool calls
-                response_text = re.sub(r'\{"location".*?\}', '', response_text)
-                response_text = response_text.strip()
+            try:
+                while True:
+                    tool_calls = None
+                    round_chunks = []
+                    
+                    # After tool results the model mostly phrases them: fast model
+                    purpose = PURPOSE_TOOL_FOLLOWUP if rounds else PURPOSE_CHAT
+                    stream = self.llm.chat_stream(messages, tools=tools, deadline=deadline, purpose=purpose)
+                    async for event in self._iter_within(stream, deadline):
+                        if "tool_calls" in event:
+                            tool_calls = event["tool_calls"]
+                        else:
+                            chunks.append(event["content"])
+                            round_chunks.append(event["content"])
+                            yield event["content"]
+                    
+                    if not tool_calls:
+                        break
+                    
+                    # Handle tool calls, then stream the next answer
+                    rounds += 1
+                    await self._run_tool_calls(
+                        tool_calls, "".join(round_chunks) or None, messages, discord_id, deadline
+                    )
+                    # Last round: no tools, so the model has to answer
+                    if rounds >= Config.MAX_TOOL_ROUNDS:
+                        tools = None
             
-            # Save assistant response
-            if response_text:
-                history.append({"role": "assistant", "content": response_text})
+            except asyncio.TimeoutError:
+                logger.warning("Response deadline (%ss) hit for user %s", Config.RESPONSE_TIMEOUT, discord_id)
+                fallbacks_total.inc(kind="timeout")
+                if not chunks:
+                    chunks.append(TIMEOUT_REPLY)
+                    yield TIMEOUT_REPLY
             
-            return response_text
+            self._finish_turn(discord_id, history, "".join(chunks))
         
         except Exception as e:
-            logger.error(f"Error processing message: {e}")
-            return "Maaf, terjadi kesalahan. Coba lagi ya! 😅"
+            logger.error("Error streaming message: %s", e)
+            errors_total.inc(component="agent")
+            yield "Maaf, terjadi kesalahan. Coba lagi ya! 😅"
+        
+        finally:
+            self._request_done(discord_id, started, "stream")
+            trace_span.finish()
     
-    def _handle_tool_calls(self, response: Dict, messages: List[Dict], 
-                          discord_id: str) -> str:
+    async def _run_tool_calls(self, tool_calls: List, content: Optional[str],
+                              messages: List[Dict], discord_id: str,
+                              deadline: Optional[float] = None):
+        """
+        Execute tool calls and append the assistant/tool messages
+        
+        Args:
+            tool_calls: Tool calls requested by the LLM
+            content: Assistant content that came with the tool calls
+            messages: Current conversation messages (appended in place)
+            discord_id: User ID
+            deadline: Optional monotonic deadline; tools still running then
+                      get a timeout result
+        """
+        # Execute tool calls concurrently (capped), results keep the original order
+        semaphore = asyncio.Semaphore(Config.MAX_PARALLEL_TOOLS)
+        
+        async def run_tool(tool_call) -> Dict:
+            function_name = tool_call.function.name
+            try:
+                arguments = json.loads(tool_call.function.arguments or "{}")
+                
+                async with semaphore:
+                    logger.info("Executing tool: %s for user %s", function_name, discord_id)
+                    # Execute the tool (off the event loop)
+                    result = await asyncio.wait_for(
+                        execute_tool_async(function_name, arguments),
+                        self._remaining(deadline) if deadline else None
+                    )
+            
+            except asyncio.TimeoutError:
+                logger.warning("Tool %s timed out for user %s", function_name, discord_id)
+                fallbacks_total.inc(kind="tool_timeout")
+                result = {"success": False, "message": "Timeout: tool tidak merespons tepat waktu"}
+            
+            except Exception as e:
+                # One failing tool must not take down the others
+                logger.error("Tool %s failed for user %s: %s", function_name, discord_id, e)
+                result = {"success": False, "message": f"Error: {str(e)}"}
+            
+            return {
+                "tool_call_id": tool_call.id,
+                "role": "tool",
+                "name": function_name,
+                "content": json.dumps(result, ensure_ascii=False)
+            }
+        
+        with log_stage("tools"), span("agent.tools", count=len(tool_calls)):
+            tool_results = await asyncio.gather(*[run_tool(tc) for tc in tool_calls])
+        
+        # Add tool results to messages
+        messages.append({
+            "role": "assistant",
+            "content": content,
+            "tool_calls": [
+                {
+                    "id": tc.id,
+                    "type": "function",
+                    "function": {
+                        "name": tc.function.name,
+                        "arguments": tc.function.arguments
+                    }
+                }
+                for tc in tool_calls
+            ]
+        })
+        
+        for tool_result in tool_results:
+            messages.append(tool_result)
+    
+    async def _handle_tool_calls(self, response: Dict, messages: List[Dict], 
+                          discord_id: str, deadline: float) -> str:
         """
         Handle function/tool calls from LLM
         
+        Runs up to MAX_TOOL_ROUNDS of tool calls (so the model can chain
+        lookups, e.g. weather then restaurants), each LLM and tool call
+        bounded by the time left until `deadline`.
+        
         Args:
             response: LLM response with tool calls
             messages: Current conversation messages
             discord_id: User ID
+            deadline: Monotonic deadline for the whole turn
             
         Returns:
-            Final response text
+            Final response text (best answer so far if the deadline is hit)
         """
+        best_answer = response["content"]
+        rounds = 0
+        
         try:
-            # Execute each tool call
-            tool_results = []
-            
-            for tool_call in response["tool_calls"]:
-                function_name = tool_call.function.name
-                arguments = json.loads(tool_call.function.arguments)
-                
-                logger.info(f"Executing tool: {function_name} for user {discord_id}")
+            while response["tool_calls"]:
+                rounds += 1
+                await self._run_tool_calls(
+                    response["tool_calls"], response["content"], messages, discord_id, deadline
+                )
                 
-                # Execute the tool
-                result = execute_tool(function_name, arguments)
-                
-                tool_results.append({
-                    "tool_call_id": tool_call.id,
-                    "role": "tool",
-                    "name": function_name,
-                    "content": json.dumps(result, ensure_ascii=False)
-                })
+                # Last round: no tools, so the model has to answer
+                tools = self.tools if rounds < Config.MAX_TOOL_ROUNDS else None
+                with log_stage("llm"):
+                    response = await asyncio.wait_for(
+                        self.llm.chat(messages, tools=tools, deadline=deadline, purpose=PURPOSE_TOOL_FOLLOWUP),
+                        self._remaining(deadline)
+                    )
+                if response["content"]:
+                    best_answer = response["content"]
             
-            # Add tool results to messages
-            messages.append({
-                "role": "assistant",
-                "content": response["content"],
-                "tool_calls": [
-                    {
-                        "id": tc.id,
-                        "type": "function",
-                        "function": {
-                            "name": tc.function.name,
-                            "arguments": tc.function.arguments
-                        }
-                    }
-                    for tc in response["tool_calls"]
-                ]
-            })
-            
-            for tool_result in tool_results:
-                messages.append(tool_result)
-            
-            # Get final response from LLM
-            final_response = self.llm.chat(messages)
-            
-            return final_response["content"]
+            return response["content"]
+        
+        except asyncio.TimeoutError:
+            logger.warning("Response deadline hit after %s tool round(s) for user %s", rounds, discord_id)
+            fallbacks_total.inc(kind="timeout")
+            return best_answer or TIMEOUT_REPLY
         
         except Exception as e:
-            logger.error(f"Error handling tool calls: {e}")
+            logger.error("Error handling tool calls: %s", e)
+            errors_total.inc(component="agent")
             return "Maaf, terjadi kesalahan saat memproses request kamu. 😅"
     
-    def reset_conversation(self, discord_id: str) -> str:
+    async def reset_conversation(self, discord_id: str) -> str:
         """Reset conversation history for user"""
-        if discord_id in self.conversations:
+        # History (and summary) may still only be on disk after a restart
+        await self._load_conversation(discord_id)
+        
+        if self.conversations.get(discord_id) or discord_id in self.context.summaries:
             self.conversations[discord_id] = []
-            logger.info(f"Conversation reset for user {discord_id}")
+            self.context.reset(discord_id)
+            self.storage.clear_conversation(discord_id)
+            logger.info("Conversation reset for user %s", discord_id)
             return "Conversation history berhasil direset! Mari mulai dari awal. 😊"
         else:
             return "Belum ada conversation history yang perlu direset."
@@ -167,19 +460,36 @@ class FoodieAgent:
             "bot_messages": bot_msgs
         }
     
-    def set_user_preference(self, discord_id: str, key: str, value: any) -> bool:
+    async def set_user_preference(self, discord_id: str, key: str, value: any) -> bool:
         """Set user preference"""
-        if discord_id not in self.user_preferences:
-            self.user_preferences[discord_id] = {}
-        
-        self.user_preferences[discord_id][key] = value
-        logger.info(f"Set preference {key}={value} for user {discord_id}")
+        preferences = await self.get_user_preferences(discord_id)
+        preferences[key] = value
+        self.user_preferences[discord_id] = preferences
+        self.storage.save_preferences(discord_id, preferences)
+        logger.info("Set preference %s=%s for user %s", key, value, discord_id)
         return True
     
-    def get_user_preferences(self, discord_id: str) -> Dict:
-        """Get user preferences"""
+    async def get_user_preferences(self, discord_id: str) -> Dict:
+        """Get user preferences (loaded from storage off the event loop)"""
+        if discord_id not in self.user_preferences and self.storage.persistent:
+            # May flush pending writes first: keep that disk I/O off the loop
+            stored = await asyncio.to_thread(self.storage.load_preferences, discord_id)
+            if stored and discord_id not in self.user_preferences:
+                self.user_preferences[discord_id] = stored
         return self.user_preferences.get(discord_id, {})
     
     def get_active_users_count(self) -> int:
-        """Get count of users with active conversations"""
-        return len(self.conversations)
\ No newline at end of file
+        """Get count of users with active conversations (used within SESSION_IDLE_TTL)"""
+        return self.conversations.active_count()
+    
+    def start_background_tasks(self):
+        """Start idle-session sweeps and the storage flusher (call once the event loop is running)"""
+        self.conversations.start_sweeper(Config.SESSION_SWEEP_INTERVAL)
+        self.user_preferences.start_sweeper(Config.SESSION_SWEEP_INTERVAL)
+        self.storage.start()
+    
+    async def close(self):
+        """Stop background tasks and flush pending writes"""
+        self.conversations.stop_sweeper()
+        self.user_preferences.stop_sweeper()
+        await self.storage.close()
\ No newline at end of file
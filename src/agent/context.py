@@ -0,0 +1,153 @@
+from src.agent.model_router import PURPOSE_SUMMARY
+from src.config import Config
+from typing import Dict, List, Optional, Set
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PROMPT = """Ringkas percakapan antara user dan FoodieBot di bawah ini dalam maksimal 5 kalimat.
+Pertahankan info penting tentang user: lokasi, budget, makanan favorit, diet/alergi, mood, dan rekomendasi yang sudah diberikan.
+Tulis ringkasan saja, tanpa pembuka."""
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Rough token estimate (~4 chars per token for Llama tokenizers)"""
+    if not text:
+        return 0
+    return len(text) // 4 + 1
+
+def message_tokens(message: Dict) -> int:
+    """Estimated tokens for one chat message"""
+    return estimate_tokens(message.get("content")) + MESSAGE_OVERHEAD_TOKENS
+
+
+class ContextBuilder:
+    """
+    Builds the conversation part of the prompt from a token budget.
+
+    The newest messages that fit in the budget go into the prompt verbatim.
+    Older messages are folded into a per-user running summary by a
+    background task, then dropped from history.
+    """
+
+    def __init__(self, llm, token_budget: int = None, on_summary=None):
+        self.llm = llm
+        self._token_budget = token_budget
+        # Called with (discord_id, summary, kept) whenever a summary changes (e.g. to
+        # persist it); `kept` is how many stored messages it does not cover
+        self.on_summary = on_summary
+
+        # Format: {discord_id: "summary text"}
+        self.summaries: Dict[str, str] = {}
+        self._pending: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def token_budget(self) -> int:
+        return self._token_budget or Config.CONTEXT_TOKEN_BUDGET
+
+    def build(self, discord_id: str, history) -> List:
+        """
+        Get the messages to send for this user's history
+
+        Returns:
+            Optional summary system message followed by the newest history
+            messages that fit in the token budget
+        """
+        summary = self.summaries.get(discord_id)
+        budget = self.token_budget
+        if summary:
+            budget -= estimate_tokens(summary) + MESSAGE_OVERHEAD_TOKENS
+
+        # Walk back from the newest message; always keep the latest one
+        start = len(history)
+        used = 0
+        while start > 0:
+            cost = message_tokens(history[start - 1])
+            if used + cost > budget and start < len(history):
+                break
+            used += cost
+            start -= 1
+
+        # A full ring buffer would silently overwrite the oldest turn on the
+        # next append; fold the older half into the summary first
+        fold = start
+        capacity = getattr(history, "capacity", None)
+        if capacity and len(history) >= capacity - 1:
+            fold = max(fold, len(history) // 2)
+
+        if fold > 0:
+            self._schedule_summary(discord_id, history, fold)
+
+        messages = []
+        if summary:
+            messages.append({
+                "role": "system",
+                "content": f"Ringkasan percakapan sebelumnya dengan user: {summary}"
+            })
+        return messages + history[start:]
+
+    def _schedule_summary(self, discord_id: str, history: List[Dict], count: int):
+        """Fold the oldest `count` messages into the summary in the background"""
+        if discord_id in self._pending:
+            return
+        try:
+            task = asyncio.get_running_loop().create_task(
+                self._summarize(discord_id, history, history[:count])
+            )
+        except RuntimeError:
+            # No event loop (sync caller): leave history as is
+            return
+        self._pending.add(discord_id)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _summarize(self, discord_id: str, history: List[Dict], folded: List[Dict]):
+        """
+        Summarize `folded` (oldest messages of `history`) and drop them
+
+        The messages are only dropped once their summary is stored; if the
+        LLM call fails they stay in history and the next build retries.
+        """
+        try:
+            previous = self.summaries.get(discord_id)
+            transcript = "\n".join(f"{m['role']}: {m['content']}" for m in folded if m.get("content"))
+            if previous:
+                transcript = f"Ringkasan sebelumnya: {previous}\n\n{transcript}"
+
+            response = await self.llm.chat(
+                [
+                    {"role": "system", "content": SUMMARY_PROMPT},
+                    {"role": "user", "content": transcript}
+                ],
+                temperature=0.3,
+                max_tokens=Config.SUMMARY_MAX_TOKENS,
+                purpose=PURPOSE_SUMMARY
+            )
+            summary = (response.get("content") or "").strip()
+            if not summary or response.get("error"):
+                logger.warning("Summarizing failed for user %s, keeping %s messages for a retry",
+                               discord_id, len(folded))
+            elif len(history) >= len(folded) and all(a is b for a, b in zip(history, folded)):
+                # History unchanged underneath us (e.g. no reset): store and drop
+                self.summaries[discord_id] = summary
+                del history[:len(folded)]
+                if self.on_summary:
+                    # Only messages with content are stored
+                    self.on_summary(discord_id, summary, sum(1 for m in history if m.get("content")))
+                logger.info("Folded %s messages into summary for user %s", len(folded), discord_id)
+            else:
+                logger.info("History of user %s changed while summarizing, summary dropped", discord_id)
+
+        except Exception as e:
+            logger.error("Error summarizing conversation for user %s: %s", discord_id, e)
+
+        finally:
+            self._pending.discard(discord_id)
+
+    def reset(self, discord_id: str):
+        """Forget the summary for a user"""
+        self.summaries.pop(discord_id, None)
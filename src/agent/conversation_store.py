@@ -0,0 +1,149 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+class ConversationStore(OrderedDict):
+    """
+    Bounded per-user store with LRU eviction and idle expiry.
+
+    Behaves like a dict keyed by discord_id. Reading or writing a user's
+    entry marks it as recently used; once more than `max_users` entries
+    exist the least recently used one is evicted, and a background sweep
+    drops entries idle for longer than `idle_ttl` seconds.
+    """
+
+    def __init__(self, max_users: int, idle_ttl: float,
+                 on_evict: Optional[Callable[[Hashable], None]] = None,
+                 coerce: Optional[Callable[[Any], Any]] = None,
+                 name: str = "conversations"):
+        super().__init__()
+        self.max_users = max_users
+        self.idle_ttl = idle_ttl
+        self.on_evict = on_evict
+        # Optional converter applied to stored values (e.g. list -> History)
+        self.coerce = coerce
+        self.name = name
+
+        # Format: {discord_id: last access (monotonic seconds)}
+        self._last_access: Dict[Hashable, float] = {}
+        self._sweeper: Optional[asyncio.Task] = None
+
+        self.evicted = 0
+        self.expired = 0
+
+    def _touch(self, key: Hashable):
+        self._last_access[key] = time.monotonic()
+        self.move_to_end(key)
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        self._touch(key)
+        return value
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def __setitem__(self, key, value):
+        if self.coerce is not None:
+            value = self.coerce(value)
+        super().__setitem__(key, value)
+        self._touch(key)
+        while len(self) > self.max_users:
+            oldest = next(iter(self))
+            self._remove(oldest)
+            self.evicted += 1
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._last_access.pop(key, None)
+
+    # OrderedDict's own pop/popitem/clear/setdefault bypass the methods
+    # above, so they're routed through them to keep _last_access in sync
+
+    def pop(self, key, default=_MISSING):
+        if key in self:
+            value = super().__getitem__(key)
+            del self[key]
+            return value
+        if default is _MISSING:
+            raise KeyError(key)
+        return default
+
+    def popitem(self, last: bool = True):
+        key, value = super().popitem(last)
+        self._last_access.pop(key, None)
+        return key, value
+
+    def clear(self):
+        super().clear()
+        self._last_access.clear()
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def _remove(self, key: Hashable):
+        del self[key]
+        if self.on_evict:
+            self.on_evict(key)
+
+    def sweep(self) -> int:
+        """Remove entries idle for longer than idle_ttl, returns number removed"""
+        cutoff = time.monotonic() - self.idle_ttl
+        # Entries are in LRU order, so stop at the first recent one
+        expired = []
+        for key in self:
+            if self._last_access.get(key, 0) >= cutoff:
+                break
+            expired.append(key)
+
+        for key in expired:
+            self._remove(key)
+        self.expired += len(expired)
+
+        if expired:
+            logger.info("Expired %s idle entries from %s", len(expired), self.name)
+        return len(expired)
+
+    def active_count(self) -> int:
+        """Number of entries used within idle_ttl"""
+        cutoff = time.monotonic() - self.idle_ttl
+        return sum(1 for last in self._last_access.values() if last >= cutoff)
+
+    def start_sweeper(self, interval: float):
+        """Start the background idle sweep (needs a running event loop)"""
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.get_running_loop().create_task(self._sweep_loop(interval))
+
+    async def _sweep_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error("Error sweeping %s: %s", self.name, e)
+
+    def stop_sweeper(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get size and eviction counters"""
+        return {
+            "name": self.name,
+            "size": len(self),
+            "active": self.active_count(),
+            "max_users": self.max_users,
+            "evicted": self.evicted,
+            "expired": self.expired
+        }
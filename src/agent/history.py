@@ -0,0 +1,111 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+import sys
+
+# One shared string object per role instead of one per message
+_ROLES = {role: sys.intern(role) for role in ("system", "user", "assistant", "tool")}
+
+class Turn:
+    """
+    Compact conversation entry (slotted, interned role).
+
+    Supports dict-style reads (`turn["role"]`, `turn.get("content")`) so code
+    written against plain message dicts keeps working; call `to_dict()` to
+    get the API form.
+    """
+
+    __slots__ = ("role", "content")
+
+    def __init__(self, role: str, content: Optional[str]):
+        self.role = _ROLES.get(role) or sys.intern(role)
+        self.content = content
+
+    @classmethod
+    def from_message(cls, message: Union["Turn", Dict]) -> "Turn":
+        if isinstance(message, Turn):
+            return message
+        return cls(message["role"], message.get("content"))
+
+    def __getitem__(self, key: str):
+        if key == "role":
+            return self.role
+        if key == "content":
+            return self.content
+        raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self) -> Dict:
+        return {"role": self.role, "content": self.content}
+
+    def __repr__(self) -> str:
+        return f"Turn({self.role!r}, {self.content!r})"
+
+
+class History:
+    """
+    Fixed-capacity ring buffer of Turns for one user.
+
+    Appending past `capacity` overwrites the oldest turn in place, so the
+    buffer never reallocates or copies once full.
+    """
+
+    __slots__ = ("capacity", "_buf", "_start")
+
+    def __init__(self, capacity: int, messages: Iterable = ()):
+        self.capacity = capacity
+        self._buf: List[Turn] = []
+        self._start = 0
+        for message in messages:
+            self.append(message)
+
+    def append(self, message: Union[Turn, Dict]):
+        turn = Turn.from_message(message)
+        if len(self._buf) < self.capacity:
+            self._buf.append(turn)
+        else:
+            self._buf[self._start] = turn
+            self._start = (self._start + 1) % self.capacity
+
+    def _ordered(self) -> List[Turn]:
+        if self._start == 0:
+            return self._buf
+        return self._buf[self._start:] + self._buf[:self._start]
+
+    def __len__(self) -> int:
+        return len(self._buf)
+
+    def __iter__(self) -> Iterator[Turn]:
+        buf, start = self._buf, self._start
+        for i in range(len(buf)):
+            yield buf[(start + i) % len(buf)]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._ordered()[index]
+        if index < 0:
+            index += len(self._buf)
+        if not 0 <= index < len(self._buf):
+            raise IndexError("history index out of range")
+        return self._buf[(self._start + index) % len(self._buf)]
+
+    def __delitem__(self, index):
+        ordered = list(self._ordered())
+        del ordered[index]
+        self._buf = ordered
+        self._start = 0
+
+    def to_messages(self) -> List[Dict]:
+        """Convert to API message dicts"""
+        return [turn.to_dict() for turn in self]
+
+    def __repr__(self) -> str:
+        return f"History(capacity={self.capacity}, turns={len(self._buf)})"
+
+
+def to_api_messages(messages: List) -> List[Dict]:
+    """Convert a mixed list of Turns and dicts to plain API dicts (new list)"""
+    return [m.to_dict() if isinstance(m, Turn) else m for m in messages]
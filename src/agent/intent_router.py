@@ -0,0 +1,270 @@
+from src.agent.tools import execute_tool_async
+from src.config import Config
+from src.utils.metrics import fallbacks_total
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+# Messages longer than this are never fast-pathed (too likely to carry extra intent)
+MAX_FAST_PATH_WORDS = 8
+
+# Anything hinting at a richer request goes to the LLM
+_COMPLEX_WORDS = {
+    "dan", "sama", "atau", "vs", "bandingin", "banding", "resep", "cara", "bikin",
+    "budget", "rb", "ribu", "murah", "diet", "sehat", "rekomendasiin", "terdekat",
+    "dekat", "restoran", "tempat", "kenapa", "gimana", "bagaimana",
+}
+
+_PORTIONS = {
+    "kecil": "small", "small": "small", "dikit": "small",
+    "sedang": "medium", "medium": "medium", "biasa": "medium",
+    "besar": "large", "large": "large", "jumbo": "large", "gede": "large",
+}
+_PORTION_LABELS = {"small": "kecil", "medium": "sedang", "large": "besar"}
+
+_CALORIE_WORDS = {"kalori", "kalorinya", "calorie", "calories", "kcal", "kkal"}
+_CALORIE_FILLER = {
+    "berapa", "brp", "sih", "ya", "dong", "deh", "nih", "kak", "min", "bot",
+    "satu", "porsi", "seporsi", "piring", "sepiring", "mangkok", "semangkok",
+    "ada", "itu", "ini", "di", "dalam", "dari", "untuk", "buat", "yang", "apa",
+    "hitung", "hitungin", "cek", "tolong", "kira", "kira-kira", "total", "isi",
+}
+# Questions about the user or about calories in general, not about one food
+_CALORIE_NOT_FOOD = {
+    "banyak", "tinggi", "rendah", "ga", "gak", "nggak", "enggak", "tidak",
+    "butuh", "butuhkan", "dibutuhkan", "perlu", "diperlukan", "sehari", "harian", "hari",
+}
+
+# Personal phrasing ("kota aku", "berat badan saya") needs context the fast path doesn't have
+_PRONOUNS = {"aku", "saya", "gue", "gw", "kamu", "ku", "ane"}
+
+_WEATHER_RE = re.compile(r"^(?:(?:bagaimana|gimana|gmn|cek|info)\s+)?cuaca(?:\s+(?P<rest>.*))?$")
+# get_weather only reports the current weather
+_WEATHER_NOW_RE = re.compile(r"\b(?:sekarang|hari ini|saat ini|skrg)\b")
+_FORECAST_RE = re.compile(r"\b(?:besok|lusa|nanti|ntar|minggu depan|bulan depan)\b")
+_WEATHER_FILLER = {"di", "ya", "sih", "dong", "nih", "kak", "min", "gimana", "bagaimana", "gmn"}
+_LOCATION_RE = re.compile(r"^[a-z][a-z .'-]*$")
+# Words that mean the rest of the message is not a place name
+_NOT_LOCATION = {
+    "apa", "enak", "makan", "minum", "buat", "untuk", "yang", "cocok", "kayak",
+    "gak", "ga", "nggak", "panas", "dingin", "hujan", "cerah", "lagi",
+}
+
+_MEAL_TIMES = (
+    (re.compile(r"\b(?:sarapan|makan pagi)\b"), "breakfast"),
+    (re.compile(r"\bmakan siang\b"), "lunch"),
+    (re.compile(r"\bmakan malam\b"), "dinner"),
+    (re.compile(r"\b(?:camilan|cemilan|ngemil|snack)\b"), "snack"),
+)
+# A meal word plus "apa" is as likely to be about a past meal; ask for an actual suggestion
+_MEAL_REQUEST_RE = re.compile(
+    r"\b(?:enaknya|rekomendasi|rekomen|rekom|ide|saran|sebaiknya|bagusnya|mending|cocoknya)\b"
+)
+_MEAL_PAST_WORDS = {"tadi", "kemarin", "udah", "sudah", "lupa"}
+_MEAL_LABELS = {
+    "breakfast": ("🌅", "sarapan"),
+    "lunch": ("☀️", "makan siang"),
+    "dinner": ("🌙", "makan malam"),
+    "snack": ("🍪", "camilan"),
+}
+
+_MOODS = {
+    "sedih": "sad", "galau": "sad", "bad mood": "sad",
+    "stres": "stressed", "stress": "stressed", "pusing": "stressed",
+    "senang": "happy", "happy": "happy", "bahagia": "happy",
+    "semangat": "energetic", "energik": "energetic",
+}
+_MOOD_LABELS = {"sad": "lagi sedih", "stressed": "lagi stres", "happy": "lagi senang", "energetic": "lagi semangat"}
+
+# (tool name, tool arguments, renderer for the tool result)
+Intent = Tuple[str, Dict[str, Any], Callable[[Dict], str]]
+
+
+def normalize(message: str) -> str:
+    """Lowercase, drop punctuation (keeps hyphens) and collapse whitespace"""
+    text = re.sub(r"[^\w\s'-]", " ", message.lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def render_calories(result: Dict) -> str:
+    portion = _PORTION_LABELS.get(result["portion"], result["portion"])
+    serving = f" (standar: {result['serving']})" if result.get("serving") else ""
+    return (
+        f"🍽️ **{result['food'].title()}** porsi {portion}{serving} kira-kira **{result['calories']} kkal**.\n"
+        f"• Protein: ~{result['protein_estimate']}g\n"
+        f"• Karbohidrat: ~{result['carbs_estimate']}g\n"
+        f"• Lemak: ~{result['fat_estimate']}g\n\n"
+        "Mau aku bandingin sama makanan lain? 😊"
+    )
+
+
+def render_weather(result: Dict) -> str:
+    food_context = result.get("food_context", "")
+    tip = f"\n\n💡 Lagi {food_context}." if food_context else ""
+    return (
+        f"🌤️ Cuaca di **{result['location']}** sekarang: {result['description']}, "
+        f"**{result['temperature']}°C** (terasa {result['feels_like']}°C), "
+        f"kelembapan {result['humidity']}%.{tip}\n"
+        "Mau aku kasih rekomendasi makanan yang pas? 😋"
+    )
+
+
+def render_meal(result: Dict) -> str:
+    emoji, label = _MEAL_LABELS.get(result["time_of_day"], ("🍽️", "makan"))
+    mood = _MOOD_LABELS.get(result.get("mood"))
+    audience = f"buat kamu yang {mood}" if mood else "buat kamu"
+    foods = "\n".join(f"• **{food}**" for food in result["recommendations"])
+    return (
+        f"{emoji} Ide {label} {audience}:\n{foods}\n\n"
+        "Mau yang lebih spesifik, misalnya sesuai budget atau lokasi? 😊"
+    )
+
+
+class IntentRouter:
+    """
+    Rule-based fast path for simple Indonesian requests.
+
+    Messages that clearly map onto a single tool call (calorie lookups,
+    weather checks, meal-time ideas) are answered by calling the tool
+    directly and filling an Indonesian template, skipping both LLM round
+    trips. Anything ambiguous, multi-part or unmatched returns None so the
+    caller falls back to the LLM.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.hits = 0
+        # Matched a rule, but the tool result wasn't good enough to answer
+        self.fallbacks = 0
+        self.hits_by_intent: Dict[str, int] = {}
+        self._latencies: List[float] = []
+
+    def match(self, message: str, location: Optional[str] = None) -> Optional[Intent]:
+        """
+        Map a message to (tool, arguments, renderer), or None if not confident
+
+        Args:
+            message: The user's message
+            location: The user's saved location, for weather questions without one
+        """
+        text = normalize(message)
+        words = text.split()
+        if not words or len(words) > MAX_FAST_PATH_WORDS or _PRONOUNS.intersection(words):
+            return None
+
+        # Weather questions never fall through to the other rules
+        weather = _WEATHER_RE.match(text)
+        if weather:
+            return self._match_weather(weather.group("rest") or "", location)
+        if _COMPLEX_WORDS.intersection(words):
+            return None
+
+        return self._match_calories(words) or self._match_meal(text, words)
+
+    def _match_weather(self, rest: str, location: Optional[str]) -> Optional[Intent]:
+        if _FORECAST_RE.search(rest):
+            return None
+
+        # Time words can sit anywhere ("cuaca hari ini di bandung"); what's left is the place
+        rest = _WEATHER_NOW_RE.sub(" ", rest)
+        place = " ".join(word for word in rest.split() if word not in _WEATHER_FILLER)
+        if not place:
+            return "get_weather", {"location": location or Config.DEFAULT_LOCATION}, render_weather
+
+        words = place.split()
+        if (not _LOCATION_RE.match(place) or len(words) > 3
+                or _COMPLEX_WORDS.intersection(words) or _NOT_LOCATION.intersection(words)):
+            return None
+        return "get_weather", {"location": place}, render_weather
+
+    def _match_calories(self, words: List[str]) -> Optional[Intent]:
+        if not _CALORIE_WORDS.intersection(words) or _CALORIE_NOT_FOOD.intersection(words):
+            return None
+
+        portion = "medium"
+        food_words = []
+        for word in words:
+            if word in _PORTIONS:
+                portion = _PORTIONS[word]
+            elif word not in _CALORIE_WORDS and word not in _CALORIE_FILLER:
+                food_words.append(word)
+
+        if not food_words or len(food_words) > 3 or any(w.isdigit() for w in food_words):
+            return None
+        return "calculate_calories", {"food_name": " ".join(food_words), "portion": portion}, render_calories
+
+    def _match_meal(self, text: str, words: List[str]) -> Optional[Intent]:
+        if "di" in words or any(w.isdigit() for w in words) or _MEAL_PAST_WORDS.intersection(words):
+            return None
+        if not _MEAL_REQUEST_RE.search(text):
+            return None
+
+        time_of_day = next((t for pattern, t in _MEAL_TIMES if pattern.search(text)), None)
+        if time_of_day is None:
+            return None
+
+        mood = next((m for word, m in _MOODS.items() if re.search(rf"\b{word}\b", text)), None)
+        arguments = {"time_of_day": time_of_day}
+        if mood:
+            arguments["mood"] = mood
+        return "get_meal_time_recommendation", arguments, render_meal
+
+    async def route(self, message: str, location: Optional[str] = None) -> Optional[str]:
+        """
+        Try to answer a message without the LLM
+
+        Args:
+            message: The user's message
+            location: The user's saved location, for weather questions without one
+
+        Returns:
+            Templated reply, or None to fall back to the LLM
+        """
+        start = time.perf_counter()
+        self.total += 1
+
+        intent = self.match(message, location)
+        if intent is None:
+            return None
+
+        tool_name, arguments, render = intent
+        try:
+            result = await execute_tool_async(tool_name, arguments)
+        except Exception as e:
+            logger.error("Fast path tool %s failed: %s", tool_name, e)
+            result = {"success": False}
+
+        # Failed lookups and fuzzy estimates are better explained by the LLM
+        if not result.get("success") or result.get("estimated"):
+            self.fallbacks += 1
+            fallbacks_total.inc(kind="fast_path")
+            return None
+
+        reply = render(result)
+
+        elapsed = time.perf_counter() - start
+        self.hits += 1
+        self.hits_by_intent[tool_name] = self.hits_by_intent.get(tool_name, 0) + 1
+        self._latencies.append(elapsed)
+        if len(self._latencies) > 1000:
+            del self._latencies[:500]
+
+        logger.info("Fast path answered with %s in %.1fms", tool_name, elapsed * 1000)
+        return reply
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get fast-path usage and latency"""
+        latencies = sorted(self._latencies)
+        p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0.0
+        return {
+            "total": self.total,
+            "fast_path": self.hits,
+            "fallbacks": self.fallbacks,
+            "hit_rate": round(self.hits / self.total, 3) if self.total else 0.0,
+            "by_intent": dict(self.hits_by_intent),
+            "avg_latency_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+            "p95_latency_ms": round(p95 * 1000, 2)
+        }
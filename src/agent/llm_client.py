@@ -1,23 +1,205 @@
-from groq import Groq
+from groq import AsyncGroq, RateLimitError
+from src.agent.context import estimate_tokens, message_tokens
+from src.agent.history import to_api_messages
+from src.agent.model_router import ModelRouter, PURPOSE_CHAT
+from src.agent.rate_limiter import RateLimiter, is_retryable, retry_after_seconds
 from src.config import Config
+from src.utils.metrics import errors_total, llm_latency
+from src.utils.tracing import start_span
+from types import SimpleNamespace
 from typing import List, Dict, Optional
+import asyncio
 import logging
 import json
+import time
 
 logger = logging.getLogger(__name__)
 
 class GroqClient:
-    """Groq API client for LLM interactions"""
+    """Async Groq API client for LLM interactions"""
     
-    def __init__(self):
-        self.client = Groq(api_key=Config.GROQ_API_KEY)
+    def __init__(self, base_url: str = None):
+        # Retries are owned by the rate limiter, not the SDK; every call also
+        # gets a hard timeout in _send
+        self.client = AsyncGroq(
+            api_key=Config.GROQ_API_KEY,
+            base_url=base_url or Config.GROQ_BASE_URL or None,
+            max_retries=0,
+            timeout=Config.GROQ_REQUEST_TIMEOUT
+        )
         self.model = Config.GROQ_MODEL
-        logger.info(f"Initialized Groq client with model: {self.model}")
+        # Fast model for simple calls, GROQ_MODEL for complex ones
+        self.router = ModelRouter(large_model=self.model)
+        self.limiter = RateLimiter()
+        self.max_retries = Config.GROQ_MAX_RETRIES
+        
+        # Hedging: duplicate a slow non-streamed request, first response wins
+        self.hedging = Config.GROQ_HEDGING
+        self.hedge_percentile = Config.GROQ_HEDGE_PERCENTILE
+        self.hedge_delay = Config.GROQ_HEDGE_DELAY
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self.timeouts = 0
+        # Format: {id(tools): estimated tokens}; tool lists are built once and reused
+        self._tool_tokens: Dict[int, int] = {}
+        if self.router.enabled:
+            logger.info("Initialized Groq client with models: %s (large), %s (fast)", self.model, self.router.fast_model)
+        else:
+            logger.info("Initialized Groq client with model: %s", self.model)
+    
+    def _build_params(self, messages: List, tools: Optional[List[Dict]],
+                      temperature: float, max_tokens: int, model: str) -> Dict:
+        """
+        Build request params shared by chat and chat_stream
+        
+        The caller's `messages` list is never modified. Tools are passed
+        through as-is; PromptAssembler formats them once at startup.
+        """
+        # Stored history is kept as compact Turns; API dicts are built only here
+        params = {
+            "model": model,
+            "messages": to_api_messages(messages),
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+
+        if tools:
+            params["tools"] = tools
+            params["tool_choice"] = "auto"
+
+        return params
+    
+    def _estimate_prompt_tokens(self, params: Dict) -> int:
+        """Rough prompt size used to reserve TPM capacity before sending"""
+        tokens = sum(message_tokens(m) for m in params["messages"])
+        tools = params.get("tools")
+        if tools:
+            key = id(tools)
+            if key not in self._tool_tokens:
+                self._tool_tokens[key] = estimate_tokens(json.dumps(tools))
+            tokens += self._tool_tokens[key]
+        return tokens
+    
+    def _hedge_after(self, model: str) -> float:
+        """Seconds to wait before hedging: the model's latency percentile once known"""
+        observed = self.router.latency_percentile(model, self.hedge_percentile)
+        return observed if observed is not None else self.hedge_delay
+    
+    async def _send(self, params: Dict, reserved: int, timeout: float):
+        """
+        One attempt: a single request, or a hedged pair for non-streamed calls
+        
+        Raises asyncio.TimeoutError once `timeout` seconds pass without a
+        response; requests still running are cancelled.
+        """
+        create = self.client.chat.completions.create
+        hedge_after = self._hedge_after(params["model"]) if self.hedging and not params.get("stream") else None
+        
+        if hedge_after is None or hedge_after >= timeout:
+            try:
+                return await asyncio.wait_for(create(**params), timeout)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                raise
+        
+        end = time.monotonic() + timeout
+        primary = asyncio.ensure_future(create(**params))
+        pending = {primary}
+        hedged = False
+        try:
+            done, _ = await asyncio.wait(pending, timeout=hedge_after)
+            # Only hedge if the rate limiter has room right now; never queue for it
+            if not done and self.limiter.try_acquire(reserved):
+                hedge = asyncio.ensure_future(create(**params))
+                pending.add(hedge)
+                hedged = True
+                self.hedges_sent += 1
+                logger.info("Hedging %s request after %.2fs", params['model'], hedge_after)
+            
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=max(0.0, end - time.monotonic()), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    self.timeouts += 1
+                    raise asyncio.TimeoutError(f"Groq request exceeded {timeout:.1f}s")
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedges_won += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # Cancel the loser (or everything, on timeout)
+            for task in pending:
+                task.cancel()
+            # The caller reconciles one reservation with the winner's usage
+            # (or keeps it, on failure); the second one is given back
+            if hedged:
+                self.limiter.release(reserved)
+    
+    async def _create(self, params: Dict, reserved: int, deadline: Optional[float]):
+        """
+        Send one completion request through the rate limiter
+        
+        Waits for RPM/TPM capacity, and retries 429s (after Retry-After) and
+        transient errors (with jittered backoff) while time remains before
+        `deadline`.
+        
+        Returns:
+            (response, started) - started is when the successful attempt was sent
+        """
+        if deadline is None:
+            deadline = time.monotonic() + Config.RESPONSE_TIMEOUT
+        
+        attempt = 0
+        while True:
+            await self.limiter.acquire(reserved, deadline)
+            started = time.monotonic()
+            # Hard per-call timeout, never past the turn deadline
+            timeout = min(Config.GROQ_REQUEST_TIMEOUT, max(0.0, deadline - started))
+            try:
+                return await self._send(params, reserved, timeout), started
+            except Exception as e:
+                if not is_retryable(e) or attempt >= self.max_retries:
+                    raise
+                
+                attempt += 1
+                if isinstance(e, RateLimitError):
+                    # Pauses every caller; acquire() does the waiting
+                    self.limiter.on_rate_limited(retry_after_seconds(e))
+                    delay = 0.0
+                else:
+                    delay = self.limiter.backoff(attempt)
+                
+                if time.monotonic() + delay > deadline:
+                    raise
+                
+                self.limiter.retries += 1
+                logger.warning("Groq request failed (%s), retry %s/%s in %.2fs", e, attempt, self.max_retries, delay)
+                await asyncio.sleep(delay)
     
-    def chat(self, messages: List[Dict[str, str]], 
+    def get_stats(self) -> Dict:
+        """Get limiter, routing and hedging/timeout stats"""
+        return {
+            "limiter": self.limiter.get_stats(),
+            "routing": self.router.get_stats(),
+            "hedging": {
+                "enabled": self.hedging,
+                "sent": self.hedges_sent,
+                "won": self.hedges_won,
+                "timeouts": self.timeouts
+            }
+        }
+    
+    async def chat(self, messages: List[Dict[str, str]], 
              tools: Optional[List[Dict]] = None,
              temperature: float = 0.7,
-             max_tokens: int = 1024) -> Dict:
+             max_tokens: int = 1024,
+             deadline: Optional[float] = None,
+             purpose: str = PURPOSE_CHAT) -> Dict:
         """
         Send chat completion request to Groq
         
@@ -26,59 +208,37 @@ class GroqClient:
             tools: Optional list of tool definitions for function calling
             temperature: Sampling temperature (0-2)
             max_tokens: Maximum tokens in response
+            deadline: Monotonic time by which throttling and retries must be
+                      done (defaults to RESPONSE_TIMEOUT from now)
+            purpose: What the call is for (chat, tool_followup, summary);
+                     used to pick the model
             
         Returns:
             Dict containing the response message
         """
+        model = self.router.choose(messages, purpose)
+        call_span = start_span("llm.chat", model=model, purpose=purpose)
         try:
-            params = {
-                "model": self.model,
-                "messages": messages,
-                "temperature": temperature,
-                "max_tokens": max_tokens
-            }
-
-            # Format tools agar valid untuk Groq API
-            if tools:
-                formatted_tools = []
-                for tool in tools:
-                    # Pastikan tool berisi struktur {'type': 'function', 'function': {...}}
-                    if "type" not in tool or tool.get("type") != "function":
-                        formatted_tools.append({
-                            "type": "function",
-                            "function": tool
-                        })
-                    else:
-                        formatted_tools.append(tool)
-                params["tools"] = formatted_tools
-                params["tool_choice"] = "auto"
-
-            # Tambahkan sistem pesan agar LLM tidak bikin restoran fiktif
-            if tools:
-                system_message = {
-                    "role": "system",
-                    "content": (
-                        "Kamu adalah asisten yang hanya boleh memberikan rekomendasi restoran "
-                        "berdasarkan hasil dari tool yang tersedia. Jika diminta mencari restoran, "
-                        "gunakan tool pencarian dan jangan membuat nama restoran sendiri. "
-                        "Selalu kembalikan hasil dari tool dalam konteks jawaban yang alami."
-                    )
-                }
-                # Jika belum ada system message, tambahkan di depan
-                if not any(m["role"] == "system" for m in messages):
-                    messages.insert(0, system_message)
-                else:
-                    messages[0] = system_message
-
-            params["messages"] = messages
+            params = self._build_params(messages, tools, temperature, max_tokens, model)
+            reserved = self._estimate_prompt_tokens(params)
             
             # Kirim ke Groq API
-            response = self.client.chat.completions.create(**params)
+            response, started = await self._create(params, reserved, deadline)
+            elapsed = time.monotonic() - started
+            self.router.record_latency(model, elapsed)
+            llm_latency.observe(elapsed, model=model)
+            usage = getattr(response, "usage", None)
+            self.limiter.record_usage(reserved, getattr(usage, "total_tokens", None))
             message = response.choices[0].message
+            call_span.set(
+                prompt_tokens=getattr(usage, "prompt_tokens", None),
+                completion_tokens=getattr(usage, "completion_tokens", None),
+                tool_calls=len(getattr(message, "tool_calls", None) or [])
+            )
 
             # Log untuk debugging
-            logger.debug(f"LLM Request: {messages[-1]['content'][:100]}...")
-            logger.debug(f"LLM Response: {message.content[:100] if message.content else 'Function call'}...")
+            logger.debug("LLM Request: %s...", (messages[-1]['content'] or '')[:100])
+            logger.debug("LLM Response: %s...", message.content[:100] if message.content else 'Function call')
             
             return {
                 "content": message.content,
@@ -87,40 +247,102 @@ class GroqClient:
             }
             
         except Exception as e:
-            logger.error(f"Error calling Groq API: {e}")
+            logger.error("Error calling Groq API (%s): %s", model, e)
+            self.router.record_latency(model, 0.0, error=True)
+            errors_total.inc(component="llm")
+            call_span.set(error=type(e).__name__)
             return {
                 "content": "Maaf, terjadi kesalahan saat memproses permintaan kamu. Coba lagi ya!",
                 "tool_calls": None,
-                "role": "assistant"
+                "role": "assistant",
+                "error": str(e)
             }
+        
+        finally:
+            call_span.finish()
     
-    def chat_stream(self, messages: List[Dict[str, str]], 
-                    temperature: float = 0.7,
-                    max_tokens: int = 1024):
+    async def chat_stream(self, messages: List[Dict[str, str]], 
+                          tools: Optional[List[Dict]] = None,
+                          temperature: float = 0.7,
+                          max_tokens: int = 1024,
+                          deadline: Optional[float] = None,
+                          purpose: str = PURPOSE_CHAT):
         """
         Stream chat completion response
         
         Args:
             messages: List of message dicts
+            tools: Optional list of tool definitions for function calling
             temperature: Sampling temperature
             max_tokens: Maximum tokens
+            deadline: Monotonic deadline for throttling and retries (before
+                      the first chunk; a started stream is never retried)
+            purpose: What the call is for; used to pick the model
             
         Yields:
-            Chunks of the response
+            Dicts with either a 'content' chunk, or (once, at the end) the
+            assembled 'tool_calls' if the model decided to call tools
         """
+        model = self.router.choose(messages, purpose)
+        # Not made current: the consumer runs between chunks
+        call_span = start_span("llm.chat_stream", activate=False, model=model, purpose=purpose)
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
-                stream=True
-            )
+            params = self._build_params(messages, tools, temperature, max_tokens, model)
+            params["stream"] = True
+            reserved = self._estimate_prompt_tokens(params)
+            
+            response, started = await self._create(params, reserved, deadline)
+            
+            # Tool call deltas arrive in pieces, keyed by index
+            tool_calls = {}
+            generated = 0
             
-            for chunk in response:
-                if chunk.choices[0].delta.content:
-                    yield chunk.choices[0].delta.content
+            async for chunk in response:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                
+                if delta.content:
+                    generated += estimate_tokens(delta.content)
+                    yield {"content": delta.content}
+                
+                for tc in delta.tool_calls or []:
+                    call = tool_calls.setdefault(tc.index, {"id": None, "name": "", "arguments": ""})
+                    if tc.id:
+                        call["id"] = tc.id
+                    if tc.function and tc.function.name:
+                        call["name"] += tc.function.name
+                    if tc.function and tc.function.arguments:
+                        call["arguments"] += tc.function.arguments
+            
+            # Full stream duration, comparable with non-streamed calls
+            elapsed = time.monotonic() - started
+            self.router.record_latency(model, elapsed)
+            llm_latency.observe(elapsed, model=model)
+            
+            # Streams carry no usage here; charge prompt + generated estimate
+            generated += sum(estimate_tokens(c["arguments"]) for c in tool_calls.values())
+            self.limiter.record_usage(reserved, reserved + generated)
+            call_span.set(prompt_tokens_est=reserved, completion_tokens_est=generated, tool_calls=len(tool_calls))
+            
+            if tool_calls:
+                yield {
+                    "tool_calls": [
+                        SimpleNamespace(
+                            id=call["id"],
+                            type="function",
+                            function=SimpleNamespace(name=call["name"], arguments=call["arguments"] or "{}")
+                        )
+                        for _, call in sorted(tool_calls.items())
+                    ]
+                }
                     
         except Exception as e:
-            logger.error(f"Error streaming from Groq API: {e}")
-            yield "Maaf, terjadi kesalahan saat streaming response."
+            logger.error("Error streaming from Groq API (%s): %s", model, e)
+            self.router.record_latency(model, 0.0, error=True)
+            errors_total.inc(component="llm")
+            call_span.set(error=type(e).__name__)
+            yield {"content": "Maaf, terjadi kesalahan saat streaming response."}
+        
+        finally:
+            call_span.finish()
@@ -0,0 +1,125 @@
+from collections import deque
+from src.config import Config
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Call purposes passed by callers of GroqClient
+PURPOSE_CHAT = "chat"
+PURPOSE_TOOL_FOLLOWUP = "tool_followup"
+PURPOSE_SUMMARY = "summary"
+
+# Words that usually mean a multi-step or reasoning-heavy request
+_COMPLEX_HINTS = (
+    "rekomendasi", "restoran", "tempat makan", "resep", "budget", "diet", "alergi",
+    "bandingin", "bandingkan", "kenapa", "jelaskan", "rencana", "menu", "terdekat",
+)
+
+# Latency samples kept per model
+LATENCY_WINDOW = 500
+
+
+class ModelRouter:
+    """
+    Picks the Groq model for each call: fast model for simple work, large
+    model for complex turns.
+
+    Summaries, follow-up calls that only phrase tool results, and short
+    messages without complexity hints go to `fast_model`; everything else
+    goes to `large_model`. Tools stay attached either way (the fast model
+    supports tool use), so a short turn can still look something up. Every
+    decision and each model's latency are recorded so the thresholds can be
+    tuned from real traffic.
+    """
+
+    def __init__(self, fast_model: str = None, large_model: str = None,
+                 simple_max_chars: int = None, enabled: bool = None):
+        self.fast_model = fast_model or Config.GROQ_FAST_MODEL
+        self.large_model = large_model or Config.GROQ_MODEL
+        self.simple_max_chars = simple_max_chars or Config.ROUTING_SIMPLE_MAX_CHARS
+        # When disabled every call uses the large model (latency is still recorded)
+        enabled = Config.MODEL_ROUTING if enabled is None else enabled
+        self.enabled = enabled and bool(self.fast_model) and self.fast_model != self.large_model
+
+        # Format: {(model, reason): count}
+        self.decisions: Dict[Tuple[str, str], int] = {}
+        # Format: {model: deque of seconds}
+        self._latencies: Dict[str, Deque[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    @staticmethod
+    def _last_user_text(messages: List) -> Optional[str]:
+        for message in reversed(messages):
+            if message["role"] == "user":
+                return message.get("content") or ""
+        return None
+
+    def classify(self, messages: List, purpose: str = PURPOSE_CHAT) -> Tuple[str, str]:
+        """Return (model, reason) for one call"""
+        if not self.enabled:
+            return self.large_model, "routing_off"
+        if purpose == PURPOSE_SUMMARY:
+            return self.fast_model, "summary"
+        if purpose == PURPOSE_TOOL_FOLLOWUP:
+            return self.fast_model, "tool_followup"
+
+        text = self._last_user_text(messages)
+        if text is None:
+            return self.large_model, "no_user_message"
+
+        lowered = text.lower()
+        if any(hint in lowered for hint in _COMPLEX_HINTS):
+            return self.large_model, "complex_hint"
+        if len(text) > self.simple_max_chars:
+            return self.large_model, "long"
+        return self.fast_model, "short"
+
+    def choose(self, messages: List, purpose: str = PURPOSE_CHAT) -> str:
+        """Pick the model for a call and record the decision"""
+        model, reason = self.classify(messages, purpose)
+        key = (model, reason)
+        self.decisions[key] = self.decisions.get(key, 0) + 1
+        logger.debug("Routed %s call to %s (%s)", purpose, model, reason)
+        return model
+
+    def record_latency(self, model: str, seconds: float, error: bool = False):
+        """Record how long a call to `model` took"""
+        if error:
+            self.errors[model] = self.errors.get(model, 0) + 1
+            return
+        self._latencies.setdefault(model, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+    def latency_percentile(self, model: str, percentile: float,
+                           min_samples: int = 20) -> Optional[float]:
+        """Observed latency percentile (0-1) for `model`, None until enough samples"""
+        samples = self._latencies.get(model)
+        if not samples or len(samples) < min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percentile))]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get routing decisions and per-model latency"""
+        total = sum(self.decisions.values())
+        fast = sum(count for (model, _), count in self.decisions.items() if model == self.fast_model)
+
+        models = {}
+        for model in {self.large_model, *self._latencies, *self.errors}:
+            samples = sorted(self._latencies.get(model, ()))
+            models[model] = {
+                "calls": len(samples),
+                "errors": self.errors.get(model, 0),
+                "avg_ms": round(sum(samples) / len(samples) * 1000, 1) if samples else 0.0,
+                "p95_ms": round(samples[int(len(samples) * 0.95)] * 1000, 1) if samples else 0.0
+            }
+
+        return {
+            "enabled": self.enabled,
+            "fast_model": self.fast_model,
+            "large_model": self.large_model,
+            "total": total,
+            "fast_share": round(fast / total, 3) if total else 0.0,
+            "decisions": {f"{model}:{reason}": count for (model, reason), count in self.decisions.items()},
+            "models": models
+        }
@@ -0,0 +1,254 @@
+from itertools import combinations
+from pathlib import Path
+from src.config import Config
+from typing import Dict, List, Optional, Set, Tuple
+import csv
+import logging
+import math
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATA_PATH = Path(__file__).parent / "data" / "nutrition.csv"
+
+# Minimum token overlap (Jaccard) for a partial name match
+MIN_MATCH_SCORE = 0.6
+# Minimum trigram similarity for correcting a misspelled token
+MIN_TOKEN_SIMILARITY = 0.5
+
+
+class FoodEntry:
+    """Nutrition facts for one standard serving of a food"""
+
+    __slots__ = ("name", "serving", "calories", "protein", "carbs", "fat")
+
+    def __init__(self, name: str, serving: str, calories: float,
+                 protein: float, carbs: float, fat: float):
+        self.name = name
+        self.serving = serving
+        self.calories = calories
+        self.protein = protein
+        self.carbs = carbs
+        self.fat = fat
+
+    def __repr__(self) -> str:
+        return f"FoodEntry({self.name!r}, {self.calories} kcal)"
+
+
+def normalize(text: str) -> str:
+    """Lowercase, drop punctuation (keeps hyphens) and collapse whitespace"""
+    text = re.sub(r"[^\w\s-]", " ", str(text).lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _tokens(text: str) -> Tuple[str, ...]:
+    # "gado-gado" and "gado gado" index the same
+    return tuple(text.replace("-", " ").split())
+
+
+def _trigrams(token: str) -> Set[str]:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NutritionIndex:
+    """
+    In-memory nutrition table with a prebuilt lookup index.
+
+    Every food name and alias is indexed three ways: an exact-key dict, an
+    inverted token index (token -> names containing it) for partial matches
+    such as "nasi goreng kampung", and a character-trigram index over the
+    token vocabulary to correct typos ("rendank"). A lookup only touches
+    names sharing enough of the query's tokens to pass MIN_MATCH_SCORE
+    (found by intersecting postings), so cost doesn't grow with the table.
+    """
+
+    def __init__(self, entries: List[Tuple[FoodEntry, List[str]]]):
+        self.entries: List[FoodEntry] = []
+        # Format: {normalized name/alias: entry}
+        self._exact: Dict[str, FoodEntry] = {}
+        # Indexed keys: (token set, " joined tokens ", entry)
+        self._keys: List[Tuple[Set[str], str, FoodEntry]] = []
+        # Format: {token: {key index, ...}}
+        self._postings: Dict[str, Set[int]] = {}
+        # Key indexes of foods' own names (the rest are aliases)
+        self._primary: Set[int] = set()
+        # Format: {trigram: {token, ...}}
+        self._trigrams: Dict[str, Set[str]] = {}
+        # Format: {token: number of trigrams}
+        self._gram_counts: Dict[str, int] = {}
+        # Memoized typo corrections, format: {token: corrected token or None}
+        self._corrections: Dict[str, Optional[str]] = {}
+
+        for entry, aliases in entries:
+            self.entries.append(entry)
+            for position, name in enumerate([entry.name, *aliases]):
+                key = normalize(name)
+                if not key or key in self._exact:
+                    continue
+                self._exact[key] = entry
+                self._exact.setdefault(" ".join(_tokens(key)), entry)
+
+                tokens = _tokens(key)
+                key_id = len(self._keys)
+                self._keys.append((set(tokens), f" {' '.join(tokens)} ", entry))
+                if position == 0:
+                    self._primary.add(key_id)
+                for token in set(tokens):
+                    self._postings.setdefault(token, set()).add(key_id)
+
+        for token in self._postings:
+            grams = _trigrams(token)
+            self._gram_counts[token] = len(grams)
+            for gram in grams:
+                self._trigrams.setdefault(gram, set()).add(token)
+
+    @classmethod
+    def from_csv(cls, path) -> "NutritionIndex":
+        """
+        Load a table with columns name, aliases ("|"-separated), serving,
+        calories, protein, carbs, fat (per standard serving)
+        """
+        entries = []
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                entry = FoodEntry(
+                    row["name"].strip(),
+                    row["serving"].strip(),
+                    float(row["calories"]),
+                    float(row["protein"]),
+                    float(row["carbs"]),
+                    float(row["fat"])
+                )
+                aliases = [a.strip() for a in (row.get("aliases") or "").split("|") if a.strip()]
+                entries.append((entry, aliases))
+
+        index = cls(entries)
+        logger.info("Nutrition index loaded: %s foods, %s names from %s", len(index.entries), len(index._keys), path)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _correct(self, token: str) -> Optional[str]:
+        """Closest vocabulary token by trigram similarity, or None"""
+        if token in self._postings:
+            return token
+        if len(token) < 4:
+            return None
+        if token in self._corrections:
+            return self._corrections[token]
+
+        grams = _trigrams(token)
+        counts: Dict[str, int] = {}
+        for gram in grams:
+            for candidate in self._trigrams.get(gram, ()):
+                counts[candidate] = counts.get(candidate, 0) + 1
+
+        best, best_score = None, 0.0
+        for candidate, shared in counts.items():
+            score = shared / (len(grams) + self._gram_counts[candidate] - shared)
+            if score > best_score:
+                best, best_score = candidate, score
+
+        corrected = best if best_score >= MIN_TOKEN_SIMILARITY else None
+        # Bounded so arbitrary user input can't grow it forever
+        if len(self._corrections) < 10000:
+            self._corrections[token] = corrected
+        return corrected
+
+    def lookup(self, query: str) -> Tuple[Optional[FoodEntry], float]:
+        """
+        Find the food best matching a free-text name
+
+        Returns:
+            (entry, score) - score is 1.0 for an exact name/alias match and
+            the token overlap otherwise; (None, 0.0) when nothing is close
+        """
+        key = normalize(query)
+        if not key:
+            return None, 0.0
+
+        entry = self._exact.get(key)
+        if entry is not None:
+            return entry, 1.0
+
+        # Fix typos token by token; unknown tokens stay and lower the overlap
+        tokens = [self._correct(t) or t for t in _tokens(key)]
+        known = {t for t in tokens if t in self._postings}
+        if not known:
+            return None, 0.0
+
+        if len(known) == len(set(tokens)):
+            entry = self._exact.get(" ".join(tokens))
+            if entry is not None:
+                return entry, 1.0
+
+        query_tokens = set(tokens)
+        if len(query_tokens) == 1:
+            return self._most_generic(tokens[0])
+
+        # A name can only reach MIN_MATCH_SCORE if it contains at least
+        # `need` query tokens, so candidates come from intersected postings
+        need = math.ceil(MIN_MATCH_SCORE * len(query_tokens))
+        if need > len(known):
+            return None, 0.0
+
+        rare_first = sorted(known, key=lambda t: len(self._postings[t]))
+        candidates: Set[int] = set()
+        for combo in combinations(rare_first, need):
+            ids = self._postings[combo[0]]
+            for token in combo[1:]:
+                ids = ids & self._postings[token]
+                if not ids:
+                    break
+            candidates |= ids
+
+        query_text = f" {' '.join(tokens)} "
+        best, best_rank = None, (0.0, 0, 0)
+        for key_id in candidates:
+            key_tokens, key_text, candidate = self._keys[key_id]
+            overlap = len(query_tokens & key_tokens)
+            score = overlap / (len(query_tokens) + len(key_tokens) - overlap)
+            # Tie-break: name appears in the query in order ("nasi goreng" in "nasi goreng ayam")
+            in_order = int(key_text in query_text)
+            rank = (score, in_order, overlap)
+            if rank > best_rank:
+                best, best_rank = candidate, rank
+
+        if best is None or best_rank[0] < MIN_MATCH_SCORE:
+            return None, 0.0
+        return best, round(best_rank[0], 2)
+
+    def _most_generic(self, token: str) -> Tuple[Optional[FoodEntry], float]:
+        """
+        Best guess for a one-word query ("martabak", "ayam") that isn't a
+        name itself: the shortest name containing it, preferring names that
+        start with it ("ayam goreng" over "mie ayam"), then foods' own names
+        over aliases, then table order
+        """
+        best_id = min(
+            self._postings[token],
+            key=lambda key_id: (
+                len(self._keys[key_id][0]),
+                not self._keys[key_id][1].startswith(f" {token} "),
+                key_id not in self._primary,
+                key_id
+            )
+        )
+        return self._keys[best_id][2], round(1 / len(self._keys[best_id][0]), 2)
+
+
+_index: Optional[NutritionIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_nutrition_index() -> NutritionIndex:
+    """Shared index, loaded from NUTRITION_DATA_PATH (or the bundled table) on first use"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = NutritionIndex.from_csv(Config.NUTRITION_DATA_PATH or DEFAULT_DATA_PATH)
+    return _index
@@ -0,0 +1,60 @@
+from src.agent.prompts import get_static_system_prompt, get_time_context
+from src.agent.tools import get_tools_definition
+from src.config import Config
+from typing import Dict, List, Optional
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+def format_tools(tools: List[Dict]) -> List[Dict]:
+    """Make sure every tool has the {'type': 'function', 'function': {...}} shape"""
+    formatted = []
+    for tool in tools:
+        if tool.get("type") != "function":
+            formatted.append({"type": "function", "function": tool})
+        else:
+            formatted.append(tool)
+    return formatted
+
+
+class PromptAssembler:
+    """
+    Assembles request messages around a byte-stable prefix.
+
+    The long system prompt and the tool schemas are built once. The only
+    changing part, the current date/time, is a separate short system
+    message rebuilt at most every `time_refresh` seconds, so every request
+    starts with the same bytes and provider-side prompt caching can hit.
+    """
+
+    def __init__(self, time_refresh: float = None):
+        self.time_refresh = time_refresh or Config.PROMPT_TIME_REFRESH
+
+        self.system_prompt = get_static_system_prompt()
+        self.system_message = {"role": "system", "content": self.system_prompt}
+        self.tools = format_tools(get_tools_definition())
+
+        self._time_message: Optional[Dict] = None
+        self._time_built_at = 0.0
+
+        logger.info("Prompt assembled: system ~%s chars, %s tools", len(self.system_prompt), len(self.tools))
+
+    def _get_time_message(self) -> Dict:
+        now = time.monotonic()
+        if self._time_message is None or now - self._time_built_at >= self.time_refresh:
+            self._time_message = {"role": "system", "content": get_time_context()}
+            self._time_built_at = now
+        return self._time_message
+
+    def build(self, context: List) -> List:
+        """
+        Build the messages for one request
+
+        Args:
+            context: Conversation context (summary + recent turns); not modified
+
+        Returns:
+            New list: stable system prompt, time context, then `context`
+        """
+        return [self.system_message, self._get_time_message(), *context]
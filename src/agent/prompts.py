@@ -38,8 +38,10 @@ EXPERTISE:
 
 AVAILABLE TOOLS:
 1. **get_weather(location)** - ONLY call this when user explicitly mentions weather/cuaca OR asks about weather-appropriate food
-2. **calculate_calories(food_name, portion)** - ONLY call when user asks about calories/kalori
-3. **get_meal_time_recommendation(time_of_day, mood)** - ONLY call when needed for specific time-based recommendations
+2. **calculate_calories(food_name, portion)** - ONLY call when user asks about calories/kalori of ONE food
+3. **calculate_meal_calories(items)** - Use for calories of a whole meal with several foods/drinks: ONE call with all items, not one calculate_calories call per item
+4. **get_meal_time_recommendation(time_of_day, mood)** - ONLY call when needed for specific time-based recommendations
+5. **search_nearby_restaurants(location, radius, keyword)** - Call when user asks for restaurants/tempat makan
 
 IMPORTANT RULES FOR TOOLS:
 - NEVER call tools in greeting/initial response
@@ -47,6 +49,7 @@ IMPORTANT RULES FOR TOOLS:
 - ONLY use tools when user specifically asks for that information
 - If you need weather info, use the tool - DON'T ask user for their location
 - Default location is {default_location} if user doesn't specify
+- Restaurant recommendations MUST come from search_nearby_restaurants results. NEVER make up restaurant names; present the tool results naturally
 
 CONVERSATION GUIDELINES:
 1. **First Message / Greeting**
@@ -92,24 +95,34 @@ RESPONSE FORMAT:
 
 CRITICAL: NEVER expose function call syntax to users. All tool calls should be invisible.
 
-Current time: {current_time}
-Current date: {current_date}
 Default location: {default_location}
 
 Let's help users discover amazing food! 🍕✨
 """
 
-def get_system_prompt() -> str:
-    """Get the system prompt with current date/time and config"""
+# Kept separate from SYSTEM_PROMPT so the long prompt stays byte-stable
+TIME_CONTEXT_PROMPT = """Current time: {current_time}
+Current date: {current_date}"""
+
+def get_static_system_prompt() -> str:
+    """Get the system prompt without time fields (stable between calls)"""
     from src.config import Config
-    now = datetime.now()
     
-    return SYSTEM_PROMPT.format(
+    return SYSTEM_PROMPT.format(default_location=Config.DEFAULT_LOCATION)
+
+def get_time_context(now: datetime = None) -> str:
+    """Get the current date/time block"""
+    now = now or datetime.now()
+    
+    return TIME_CONTEXT_PROMPT.format(
         current_time=now.strftime("%H:%M"),
-        current_date=now.strftime("%Y-%m-%d %A"),
-        default_location=Config.DEFAULT_LOCATION
+        current_date=now.strftime("%Y-%m-%d %A")
     )
 
+def get_system_prompt() -> str:
+    """Get the system prompt with current date/time and config"""
+    return f"{get_static_system_prompt()}\n{get_time_context()}"
+
 def get_time_based_greeting() -> str:
     """Get greeting based on time of day"""
     hour = datetime.now().hour
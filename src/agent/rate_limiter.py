@@ -0,0 +1,196 @@
+from groq import APIConnectionError, APIStatusError
+from src.config import Config
+from typing import Any, Dict, Optional
+import asyncio
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying (rate limit, overload, transient server errors)
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Continuously refilling bucket holding up to `capacity` units.
+
+    The level may go negative when actual usage turns out higher than what
+    was reserved; later callers then wait until the debt is refilled.
+    """
+
+    def __init__(self, capacity: float, per_seconds: float = 60.0):
+        self.capacity = capacity
+        self.rate = capacity / per_seconds
+        self.level = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available (0 if available now)"""
+        self._refill()
+        # A single request larger than the bucket only waits for a full bucket
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def consume(self, amount: float):
+        self._refill()
+        self.level -= amount
+
+    def refund(self, amount: float):
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+    def available(self) -> float:
+        self._refill()
+        return self.level
+
+
+class RateLimiter:
+    """
+    Client-side limiter for Groq requests-per-minute and tokens-per-minute.
+
+    `acquire` queues callers (FIFO) until both buckets can cover the request,
+    instead of firing it into a 429. A 429's Retry-After pauses every caller,
+    not just the one that got it. `backoff` gives jittered delays for
+    retrying transient errors.
+    """
+
+    def __init__(self, rpm: int = None, tpm: int = None,
+                 backoff_base: float = None, backoff_max: float = None):
+        self.requests = TokenBucket(rpm or Config.GROQ_RPM_LIMIT)
+        self.tokens = TokenBucket(tpm or Config.GROQ_TPM_LIMIT)
+        self.backoff_base = backoff_base or Config.GROQ_BACKOFF_BASE
+        self.backoff_max = backoff_max or Config.GROQ_BACKOFF_MAX
+
+        # Set from Retry-After; nobody is admitted before this (monotonic seconds)
+        self._blocked_until = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+        self.waiting = 0
+        self.admitted = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.rate_limited = 0
+        self.retries = 0
+
+    def _get_lock(self) -> asyncio.Lock:
+        # Created lazily so the limiter can be built outside an event loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def _wait_time(self, tokens: int) -> float:
+        blocked = max(0.0, self._blocked_until - time.monotonic())
+        return max(blocked, self.requests.wait_time(1), self.tokens.wait_time(tokens))
+
+    async def acquire(self, tokens: int, deadline: Optional[float] = None):
+        """
+        Wait until one request of ~`tokens` tokens fits the limits, then reserve it
+
+        Raises:
+            asyncio.TimeoutError: If the wait would run past `deadline`
+        """
+        start = time.monotonic()
+        self.waiting += 1
+        try:
+            # One caller at a time checks the buckets, so the queue stays FIFO
+            async with self._get_lock():
+                while True:
+                    wait = self._wait_time(tokens)
+                    if wait <= 0:
+                        break
+                    if deadline is not None and time.monotonic() + wait > deadline:
+                        raise asyncio.TimeoutError("rate limit wait exceeds deadline")
+                    await asyncio.sleep(wait)
+
+                self.requests.consume(1)
+                self.tokens.consume(tokens)
+        finally:
+            self.waiting -= 1
+
+        waited = time.monotonic() - start
+        self.admitted += 1
+        self.total_wait += waited
+        if waited > 0.01:
+            self.throttled += 1
+            logger.info("Groq request throttled for %.2fs (%s tokens)", waited, tokens)
+
+    def try_acquire(self, tokens: int) -> bool:
+        """Reserve capacity only if available right now (never waits)"""
+        if self.waiting or self._wait_time(tokens) > 0:
+            return False
+        self.requests.consume(1)
+        self.tokens.consume(tokens)
+        self.admitted += 1
+        return True
+
+    def release(self, tokens: int):
+        """Give back a token reservation whose request was abandoned (e.g. a losing hedge)"""
+        self.tokens.refund(tokens)
+
+    def record_usage(self, reserved: int, actual: Optional[int]):
+        """Correct the token bucket with the actual usage reported by the API"""
+        if actual is not None:
+            self.tokens.consume(actual - reserved)
+
+    def on_rate_limited(self, retry_after: Optional[float]):
+        """Pause all callers after a 429 (Retry-After, or a backoff guess)"""
+        self.rate_limited += 1
+        delay = retry_after if retry_after is not None else self.backoff(self.rate_limited)
+        self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+        logger.warning("Groq rate limited, pausing requests for %.1fs", delay)
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for retry `attempt` (1-based)"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get current bucket levels and throttling counters"""
+        return {
+            "rpm_limit": self.requests.capacity,
+            "tpm_limit": self.tokens.capacity,
+            "requests_available": round(self.requests.available(), 1),
+            "tokens_available": int(self.tokens.available()),
+            "blocked_for": round(max(0.0, self._blocked_until - time.monotonic()), 2),
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "throttled": self.throttled,
+            "avg_wait_ms": round(self.total_wait / self.admitted * 1000, 1) if self.admitted else 0.0,
+            "rate_limited": self.rate_limited,
+            "retries": self.retries
+        }
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Retry-After from an API error's response headers, in seconds"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        # HTTP-date form isn't used by Groq; fall back to backoff
+        return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """Connection problems, timeouts and retryable HTTP statuses"""
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code in RETRYABLE_STATUS
+    # Includes APITimeoutError
+    return isinstance(error, APIConnectionError)
@@ -0,0 +1,104 @@
+from src.config import Config
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class RequestScheduler:
+    """
+    Scheduler in front of the agent.
+
+    Requests from the same user run one at a time in arrival order, and a
+    global semaphore caps how many agent requests are in flight across all
+    users (each request may make several LLM calls).
+    """
+
+    def __init__(self, max_concurrent: int = None, wait_window: int = 1000):
+        self.max_concurrent = max_concurrent or Config.MAX_CONCURRENT_REQUESTS
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+
+        # Per-user FIFO locks, removed once the user has nothing pending
+        # Format: {discord_id: asyncio.Lock}
+        self._user_locks: Dict[str, asyncio.Lock] = {}
+        self._user_pending: Dict[str, int] = {}
+
+        self.queued = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.max_wait = 0.0
+        self._waits = deque(maxlen=wait_window)
+
+        logger.info("Request scheduler initialized (max_concurrent=%s)", self.max_concurrent)
+
+    async def submit(self, user_id: str, func: Callable[..., Awaitable[Any]],
+                     *args, **kwargs) -> Any:
+        """
+        Run `func(*args, **kwargs)` for a user once it is that user's turn
+        and a global slot is free
+
+        Args:
+            user_id: Key used for per-user ordering (discord_id)
+            func: Coroutine function to run
+
+        Returns:
+            Whatever `func` returns
+        """
+        enqueued_at = time.perf_counter()
+        lock = self._user_locks.get(user_id)
+        if lock is None:
+            lock = self._user_locks[user_id] = asyncio.Lock()
+        self._user_pending[user_id] = self._user_pending.get(user_id, 0) + 1
+        self.queued += 1
+        waiting = True
+
+        try:
+            async with lock:
+                async with self._semaphore:
+                    wait = time.perf_counter() - enqueued_at
+                    self.queued -= 1
+                    waiting = False
+                    self._record_wait(wait)
+
+                    if wait > 1.0:
+                        logger.info("Request for user %s waited %.2fs in queue", user_id, wait)
+
+                    self.in_flight += 1
+                    try:
+                        return await func(*args, **kwargs)
+                    finally:
+                        self.in_flight -= 1
+                        self.completed += 1
+        finally:
+            if waiting:
+                self.queued -= 1
+            self._user_pending[user_id] -= 1
+            if self._user_pending[user_id] == 0:
+                del self._user_pending[user_id]
+                del self._user_locks[user_id]
+
+    def _record_wait(self, wait: float):
+        self._waits.append(wait)
+        self.max_wait = max(self.max_wait, wait)
+
+    def get_stats(self) -> Dict:
+        """Get queue depth and wait time statistics"""
+        waits = sorted(self._waits)
+
+        def percentile(p: float) -> float:
+            if not waits:
+                return 0.0
+            return waits[min(len(waits) - 1, int(len(waits) * p))]
+
+        return {
+            "max_concurrent": self.max_concurrent,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queued,
+            "active_users": len(self._user_pending),
+            "completed": self.completed,
+            "avg_wait_ms": round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+            "p95_wait_ms": round(percentile(0.95) * 1000, 1),
+            "max_wait_ms": round(self.max_wait * 1000, 1)
+        }
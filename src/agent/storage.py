@@ -0,0 +1,264 @@
+from pathlib import Path
+from src.config import Config
+from typing import Dict, List, Optional
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class InMemoryStorage:
+    """Default backend: nothing is persisted, history lives only in RAM"""
+
+    persistent = False
+    description = "In-Memory (session-based)"
+
+    def load_conversation(self, discord_id: str, limit: int) -> Optional[List[Dict]]:
+        return None
+
+    def append_message(self, discord_id: str, message: Dict):
+        pass
+
+    def clear_conversation(self, discord_id: str):
+        pass
+
+    def load_preferences(self, discord_id: str) -> Optional[Dict]:
+        return None
+
+    def save_preferences(self, discord_id: str, preferences: Dict):
+        pass
+
+    def load_summary(self, discord_id: str) -> Optional[str]:
+        return None
+
+    def save_summary(self, discord_id: str, summary: str, kept: int):
+        pass
+
+    def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    discord_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_user ON messages (discord_id, id);
+CREATE TABLE IF NOT EXISTS preferences (
+    discord_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS summaries (
+    discord_id TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+class SQLiteStorage:
+    """
+    Durable SQLite (WAL) backend with write-behind batching.
+
+    Writes from the response path are only queued in memory; a background
+    task flushes them in one transaction every `flush_interval` seconds, or
+    sooner once `batch_size` writes are pending. Reads happen lazily, per
+    user, the first time that user is seen after a restart.
+    """
+
+    persistent = True
+    description = "SQLite (persistent)"
+
+    def __init__(self, path: str, flush_interval: float = 1.0, batch_size: int = 100):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # Shared by the flusher and lazy loads, both of which run in worker threads
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._db_lock = threading.Lock()
+
+        # Pending writes, in order: ("append", id, role, content, ts) / ("clear", id) /
+        # ("prefs", id, json) / ("summary", id, text, kept)
+        self._pending: List[tuple] = []
+        self._pending_lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+
+        self.flushes = 0
+        self.rows_written = 0
+
+        logger.info("SQLite storage initialized at %s", path)
+
+    # --- write path (never touches disk) ---
+
+    def _enqueue(self, op: tuple):
+        with self._pending_lock:
+            self._pending.append(op)
+            full = len(self._pending) >= self.batch_size
+        if full and self._wakeup is not None:
+            self._wakeup.set()
+
+    def append_message(self, discord_id: str, message: Dict):
+        if message.get("content"):
+            self._enqueue(("append", discord_id, message["role"], message["content"], time.time()))
+
+    def clear_conversation(self, discord_id: str):
+        self._enqueue(("clear", discord_id))
+
+    def save_preferences(self, discord_id: str, preferences: Dict):
+        self._enqueue(("prefs", discord_id, json.dumps(preferences, ensure_ascii=False)))
+
+    def save_summary(self, discord_id: str, summary: str, kept: int):
+        """Store a summary and drop the messages it covers (all but the newest `kept`)"""
+        self._enqueue(("summary", discord_id, summary, kept))
+
+    # --- flushing ---
+
+    def flush(self) -> int:
+        """Write all pending operations in one transaction (blocking)"""
+        # Hold the db lock while swapping, so a concurrent lazy load waits
+        # for this batch to land instead of reading before it
+        with self._db_lock:
+            with self._pending_lock:
+                ops, self._pending = self._pending, []
+            if not ops:
+                return 0
+
+            try:
+                with self._conn:
+                    for op in ops:
+                        if op[0] == "append":
+                            self._conn.execute(
+                                "INSERT INTO messages (discord_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+                                op[1:]
+                            )
+                        elif op[0] == "clear":
+                            self._conn.execute("DELETE FROM messages WHERE discord_id = ?", (op[1],))
+                            self._conn.execute("DELETE FROM summaries WHERE discord_id = ?", (op[1],))
+                        elif op[0] == "prefs":
+                            self._conn.execute(
+                                "INSERT OR REPLACE INTO preferences (discord_id, data, updated_at) VALUES (?, ?, ?)",
+                                (op[1], op[2], time.time())
+                            )
+                        elif op[0] == "summary":
+                            self._conn.execute(
+                                "INSERT OR REPLACE INTO summaries (discord_id, summary, updated_at) VALUES (?, ?, ?)",
+                                (op[1], op[2], time.time())
+                            )
+                            # Ops are applied in order, so the newest `kept` rows are
+                            # exactly the messages still in history when it was folded
+                            self._conn.execute(
+                                "DELETE FROM messages WHERE discord_id = ? AND id NOT IN "
+                                "(SELECT id FROM messages WHERE discord_id = ? ORDER BY id DESC LIMIT ?)",
+                                (op[1], op[1], op[3])
+                            )
+            except sqlite3.Error as e:
+                # Put the batch back so the next flush retries it
+                logger.error("Error flushing %s writes to SQLite: %s", len(ops), e)
+                with self._pending_lock:
+                    self._pending = ops + self._pending
+                return 0
+
+        self.flushes += 1
+        self.rows_written += len(ops)
+        return len(ops)
+
+    def start(self):
+        """Start the background flusher (needs a running event loop)"""
+        if self._flusher is None or self._flusher.done():
+            self._wakeup = asyncio.Event()
+            self._flusher = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                logger.error("Error in storage flusher: %s", e)
+
+    async def close(self):
+        """Stop the flusher and write everything still pending"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        await asyncio.to_thread(self.flush)
+        with self._db_lock:
+            self._conn.close()
+
+    # --- lazy reads ---
+
+    def _has_pending(self, discord_id: str) -> bool:
+        with self._pending_lock:
+            return any(op[1] == discord_id for op in self._pending)
+
+    def load_conversation(self, discord_id: str, limit: int) -> Optional[List[Dict]]:
+        """Load the newest `limit` messages for a user (blocking)"""
+        # Make sure writes queued before an eviction are visible
+        if self._has_pending(discord_id):
+            self.flush()
+
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT role, content FROM messages WHERE discord_id = ? ORDER BY id DESC LIMIT ?",
+                (discord_id, limit)
+            ).fetchall()
+
+        if not rows:
+            return None
+        return [{"role": role, "content": content} for role, content in reversed(rows)]
+
+    def load_preferences(self, discord_id: str) -> Optional[Dict]:
+        """Load stored preferences for a user (blocking)"""
+        if self._has_pending(discord_id):
+            self.flush()
+
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT data FROM preferences WHERE discord_id = ?", (discord_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def load_summary(self, discord_id: str) -> Optional[str]:
+        """Load the rolling conversation summary for a user (blocking)"""
+        if self._has_pending(discord_id):
+            self.flush()
+
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT summary FROM summaries WHERE discord_id = ?", (discord_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+
+def create_storage():
+    """Create the storage backend selected by STORAGE_BACKEND"""
+    backend = Config.STORAGE_BACKEND.lower()
+
+    if backend == "sqlite":
+        return SQLiteStorage(
+            Config.STORAGE_PATH,
+            flush_interval=Config.STORAGE_FLUSH_INTERVAL,
+            batch_size=Config.STORAGE_BATCH_SIZE
+        )
+    if backend != "memory":
+        logger.warning("Unknown STORAGE_BACKEND '%s', using in-memory storage", backend)
+    return InMemoryStorage()
@@ -1,12 +1,49 @@
 from typing import Dict, List, Any
+import asyncio
 import requests
+from src.agent.nutrition import get_nutrition_index
 from src.config import Config
+from src.utils.cache import TTLCache
+from src.utils.geo_cache import GeoCache
+from src.utils.http_client import http_get
+from src.utils.metrics import cache_hits_total, cache_misses_total, errors_total, tool_latency
+from src.utils.single_flight import SingleFlight
+from src.utils.tracing import span
 import logging
 import os
 import json
+import time
 
 logger = logging.getLogger(__name__)
 
+# Weather changes slowly; share results across users for WEATHER_CACHE_TTL seconds
+weather_cache = TTLCache(
+    ttl=Config.WEATHER_CACHE_TTL,
+    stale_ttl=Config.WEATHER_CACHE_STALE_TTL,
+    max_entries=Config.WEATHER_CACHE_MAX_ENTRIES,
+    name="weather"
+)
+
+# Geocodes and nearby searches, persisted across restarts and processes
+geo_cache = GeoCache(Config.GEO_CACHE_PATH, places_ttl=Config.PLACES_CACHE_TTL)
+
+# Concurrent identical calls to network-backed tools share one upstream request
+tool_flight = SingleFlight(name="tools")
+
+# Cache counters are read from the caches at scrape time
+cache_hits_total.set_function(lambda: weather_cache.hits + weather_cache.stale_hits, cache="weather")
+cache_misses_total.set_function(lambda: weather_cache.misses, cache="weather")
+cache_hits_total.set_function(lambda: geo_cache.geocode_hits, cache="geocode")
+cache_misses_total.set_function(lambda: geo_cache.geocode_misses, cache="geocode")
+cache_hits_total.set_function(lambda: geo_cache.places_hits, cache="places")
+cache_misses_total.set_function(lambda: geo_cache.places_misses, cache="places")
+
+# Serving-size multipliers relative to the table's standard serving
+PORTION_MULTIPLIERS = {"small": 0.7, "medium": 1.0, "large": 1.4}
+
+# Items beyond this in one calculate_meal_calories call are ignored
+MAX_MEAL_ITEMS = 20
+
 def get_tools_definition() -> List[Dict]:
     """
     Get tool definitions for function calling
@@ -33,7 +70,7 @@ def get_tools_definition() -> List[Dict]:
             "type": "function",
             "function": {
                 "name": "calculate_calories",
-                "description": "Hitung estimasi kalori untuk makanan tertentu",
+                "description": "Hitung estimasi kalori dan makro (protein, karbohidrat, lemak) untuk makanan tertentu",
                 "parameters": {
                     "type": "object",
                     "properties": {
@@ -51,6 +88,41 @@ def get_tools_definition() -> List[Dict]:
                 }
             }
         },
+        {
+            "type": "function",
+            "function": {
+                "name": "calculate_meal_calories",
+                "description": "Hitung kalori dan makro untuk satu kali makan berisi beberapa makanan/minuman sekaligus (contoh: nasi padang, es teh, kerupuk). Pakai ini daripada memanggil calculate_calories berkali-kali.",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "items": {
+                            "type": "array",
+                            "description": "Daftar makanan/minuman dalam satu kali makan",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "food_name": {
+                                        "type": "string",
+                                        "description": "Nama makanan/minuman"
+                                    },
+                                    "portion": {
+                                        "type": "string",
+                                        "enum": ["small", "medium", "large"]
+                                    },
+                                    "quantity": {
+                                        "type": "integer",
+                                        "description": "Jumlah porsi (default 1)"
+                                    }
+                                },
+                                "required": ["food_name"]
+                            }
+                        }
+                    },
+                    "required": ["items"]
+                }
+            }
+        },
         {
             "type": "function",
             "function": {
@@ -108,8 +180,9 @@ def execute_tool(function_name: str, arguments: Dict[str, Any]) -> Dict[str, Any
     """
     Execute tool/function and return result
     """
+    started = time.perf_counter()
     try:
-        logger.info(f"Executing tool: {function_name} with args: {arguments}")
+        logger.info("Executing tool: %s with args: %s", function_name, arguments)
         
         if function_name == "get_weather":
             return get_weather(arguments.get("location", Config.DEFAULT_LOCATION))
@@ -120,6 +193,9 @@ def execute_tool(function_name: str, arguments: Dict[str, Any]) -> Dict[str, Any
                 arguments.get("portion", "medium")
             )
         
+        elif function_name == "calculate_meal_calories":
+            return calculate_meal_calories(arguments.get("items"))
+        
         elif function_name == "get_meal_time_recommendation":
             return get_meal_time_recommendation(
                 arguments.get("time_of_day"),
@@ -140,14 +216,81 @@ def execute_tool(function_name: str, arguments: Dict[str, Any]) -> Dict[str, Any
             }
     
     except Exception as e:
-        logger.error(f"Error executing tool {function_name}: {e}")
+        logger.error("Error executing tool %s: %s", function_name, e)
+        errors_total.inc(component="tool")
         return {
             "success": False,
             "message": f"Error: {str(e)}"
         }
+    
+    finally:
+        tool_latency.observe(time.perf_counter() - started, tool=function_name)
+
+
+def _normalize_text(value) -> str:
+    return " ".join(str(value or "").lower().split())
+
+
+# Coalescing keys for network-backed tools, built from normalized arguments
+# (with the same defaults execute_tool applies). Local tools aren't coalesced.
+_FLIGHT_KEYS = {
+    "get_weather": lambda args: _normalize_location(args.get("location")),
+    "search_nearby_restaurants": lambda args: (
+        _normalize_text(args.get("location")),
+        str(args.get("radius", 3000)),
+        _normalize_text(args.get("keyword"))
+    ),
+}
+
+
+async def execute_tool_async(function_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Execute tool in a worker thread so blocking HTTP calls don't stall the event loop
+    
+    Identical in-flight calls to network-backed tools are coalesced into one
+    upstream request (see tool_flight). Each call is recorded as a span of
+    the current trace.
+    """
+    with span(f"tool.{function_name}", args=arguments) as tool_span:
+        result = await _run_tool(function_name, arguments)
+        tool_span.set(success=result.get("success"))
+        return result
+
+
+async def _run_tool(function_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    key_func = _FLIGHT_KEYS.get(function_name)
+    if key_func is None:
+        return await asyncio.to_thread(execute_tool, function_name, arguments)
+    
+    try:
+        key = (function_name, key_func(arguments))
+    except Exception:
+        # Odd arguments: let execute_tool report the problem
+        return await asyncio.to_thread(execute_tool, function_name, arguments)
+    
+    return await tool_flight.do(key, lambda: asyncio.to_thread(execute_tool, function_name, arguments))
+
+
+def _normalize_location(location: str) -> str:
+    """Normalize a location name for use as a cache key"""
+    return " ".join(str(location or Config.DEFAULT_LOCATION).lower().split())
 
 
 def get_weather(location: str) -> Dict[str, Any]:
+    """
+    Get weather information, served from cache when possible
+
+    Stale entries are returned immediately while a background refresh runs.
+    Failed lookups are not cached.
+    """
+    return weather_cache.get_or_load(
+        _normalize_location(location),
+        lambda: _fetch_weather(location),
+        cacheable=lambda result: result.get("success", False)
+    )
+
+
+def _fetch_weather(location: str) -> Dict[str, Any]:
     """
     Get weather information from OpenWeatherMap API
     """
@@ -169,11 +312,11 @@ def get_weather(location: str) -> Dict[str, Any]:
             "lang": "id"
         }
 
-        logger.info(f"Fetching weather data for {location}...")
-        response = requests.get(api_url, params=params, timeout=8)
+        logger.info("Fetching weather data for %s...", location)
+        response = http_get(api_url, params=params)
 
         if response.status_code != 200:
-            logger.warning(f"Weather API response {response.status_code}: {response.text}")
+            logger.warning("Weather API response %s: %s", response.status_code, response.text)
             return {
                 "success": False,
                 "message": f"Gagal mengambil data cuaca untuk {location}. Status: {response.status_code}"
@@ -210,18 +353,18 @@ def get_weather(location: str) -> Dict[str, Any]:
         else:
             weather_info["food_context"] = "cuaca nyaman - bebas pilih makanan apapun"
 
-        logger.info(f"Weather fetched: {weather_info['description']} ({temp}°C)")
+        logger.info("Weather fetched: %s (%s°C)", weather_info['description'], temp)
         return weather_info
 
     except requests.exceptions.RequestException as e:
-        logger.error(f"Weather API request failed: {e}")
+        logger.error("Weather API request failed: %s", e)
         return {
             "success": False,
             "message": f"Gagal mengambil data cuaca untuk {location}: {str(e)}"
         }
 
     except Exception as e:
-        logger.error(f"Unexpected error in get_weather: {e}")
+        logger.error("Unexpected error in get_weather: %s", e)
         return {
             "success": False,
             "message": f"Terjadi kesalahan internal saat memproses cuaca untuk {location}"
@@ -231,70 +374,138 @@ def get_weather(location: str) -> Dict[str, Any]:
 
 def calculate_calories(food_name: str, portion: str = "medium") -> Dict[str, Any]:
     """
-    Calculate estimated calories for food (mock data)
+    Calculate calories and macros for a food (per-serving nutrition table)
     """
     try:
-        calorie_database = {
-            "nasi goreng": 450,
-            "nasi putih": 200,
-            "mie goreng": 400,
-            "ayam goreng": 300,
-            "ayam bakar": 250,
-            "sate ayam": 200,
-            "bakso": 350,
-            "soto": 300,
-            "gado-gado": 280,
-            "rendang": 400,
-            "pizza": 600,
-            "burger": 550,
-            "sushi": 300,
-            "ramen": 450,
-            "pasta": 500,
-            "salad": 150,
-        }
-        
-        multipliers = {"small": 0.7, "medium": 1.0, "large": 1.4}
-        
         if not food_name:
             return {"success": False, "message": "Nama makanan tidak boleh kosong"}
         
-        if portion not in multipliers:
+        if portion not in PORTION_MULTIPLIERS:
             portion = "medium"
+        multiplier = PORTION_MULTIPLIERS[portion]
         
-        food_lower = str(food_name).lower()
-        base_calories, matched_food = None, None
+        entry, score = get_nutrition_index().lookup(food_name)
         
-        for food, cal in calorie_database.items():
-            if food in food_lower or food_lower in food:
-                base_calories, matched_food = cal, food
-                break
+        if entry is not None:
+            return {
+                "success": True,
+                "food": entry.name,
+                "portion": portion,
+                "serving": entry.serving,
+                "calories": int(entry.calories * multiplier),
+                "protein_estimate": int(entry.protein * multiplier),
+                "carbs_estimate": int(entry.carbs * multiplier),
+                "fat_estimate": int(entry.fat * multiplier),
+                "match_score": score,
+                "estimated": False
+            }
         
-        if base_calories is None:
-            if any(word in food_lower for word in ["nasi", "rice"]):
-                base_calories = 400
-                matched_food = food_name
-            elif any(word in food_lower for word in ["mie", "noodle", "pasta"]):
-                base_calories = 450
-                matched_food = food_name
-            elif any(word in food_lower for word in ["ayam", "chicken"]):
-                base_calories = 280
-                matched_food = food_name
-            else:
-                return {"success": False, "message": f"Data kalori '{food_name}' tidak tersedia."}
+        # Not in the table: rough guess from the food category
+        food_lower = str(food_name).lower()
+        if any(word in food_lower for word in ["nasi", "rice"]):
+            base_calories = 400
+        elif any(word in food_lower for word in ["mie", "noodle", "pasta"]):
+            base_calories = 450
+        elif any(word in food_lower for word in ["ayam", "chicken"]):
+            base_calories = 280
+        else:
+            return {"success": False, "message": f"Data kalori '{food_name}' tidak tersedia."}
         
-        final_calories = int(base_calories * multipliers.get(portion, 1.0))
+        final_calories = int(base_calories * multiplier)
         
         return {
             "success": True,
-            "food": matched_food,
+            "food": food_name,
             "portion": portion,
             "calories": final_calories,
             "protein_estimate": int(final_calories * 0.15 / 4),
             "carbs_estimate": int(final_calories * 0.50 / 4),
-            "fat_estimate": int(final_calories * 0.35 / 9)
+            "fat_estimate": int(final_calories * 0.35 / 9),
+            "estimated": True
         }
     except Exception as e:
-        logger.error(f"Error in calculate_calories: {e}")
+        logger.error("Error in calculate_calories: %s", e)
+        return {"success": False, "message": f"Error menghitung kalori: {str(e)}"}
+
+
+def calculate_meal_calories(items: List[Any]) -> Dict[str, Any]:
+    """
+    Calculate calories and macros for a whole meal in one call
+    
+    Each distinct food is resolved once against the nutrition index, then
+    per-item values and meal totals are computed in a single pass. Items are
+    {"food_name", "portion", "quantity"} dicts (plain strings also work).
+    """
+    try:
+        if not items or not isinstance(items, list):
+            return {"success": False, "message": "Daftar makanan tidak boleh kosong"}
+        
+        parsed = []
+        for item in items[:MAX_MEAL_ITEMS]:
+            if isinstance(item, str):
+                item = {"food_name": item}
+            name = str(item.get("food_name") or "").strip()
+            if not name:
+                continue
+            portion = item.get("portion") if item.get("portion") in PORTION_MULTIPLIERS else "medium"
+            try:
+                quantity = min(max(int(item.get("quantity") or 1), 1), 20)
+            except (TypeError, ValueError):
+                quantity = 1
+            parsed.append((name, portion, quantity))
+        
+        if not parsed:
+            return {"success": False, "message": "Daftar makanan tidak boleh kosong"}
+        
+        index = get_nutrition_index()
+        resolved = {name: index.lookup(name)[0] for name in {name for name, _, _ in parsed}}
+        
+        results, not_found = [], []
+        totals = {"calories": 0, "protein": 0, "carbs": 0, "fat": 0}
+        for name, portion, quantity in parsed:
+            entry = resolved[name]
+            factor = PORTION_MULTIPLIERS[portion] * quantity
+            
+            if entry is not None:
+                row = {
+                    "food": entry.name,
+                    "portion": portion,
+                    "quantity": quantity,
+                    "calories": int(entry.calories * factor),
+                    "protein": int(entry.protein * factor),
+                    "carbs": int(entry.carbs * factor),
+                    "fat": int(entry.fat * factor)
+                }
+            else:
+                # Same category-guess fallback as calculate_calories
+                guess = calculate_calories(name, portion)
+                if not guess["success"]:
+                    not_found.append(name)
+                    continue
+                row = {
+                    "food": name,
+                    "portion": portion,
+                    "quantity": quantity,
+                    "calories": guess["calories"] * quantity,
+                    "protein": guess["protein_estimate"] * quantity,
+                    "carbs": guess["carbs_estimate"] * quantity,
+                    "fat": guess["fat_estimate"] * quantity,
+                    "estimated": True
+                }
+            
+            results.append(row)
+            for key in totals:
+                totals[key] += row[key]
+        
+        if not results:
+            return {"success": False, "message": f"Data kalori untuk {', '.join(not_found)} tidak tersedia."}
+        
+        result = {"success": True, "items": results, "total": totals}
+        if not_found:
+            result["not_found"] = not_found
+        return result
+    except Exception as e:
+        logger.error("Error in calculate_meal_calories: %s", e)
         return {"success": False, "message": f"Error menghitung kalori: {str(e)}"}
 
 
@@ -323,41 +534,60 @@ def search_nearby_restaurants(location: str, radius: int = 3000, keyword: str =
     if not api_key:
         return {"error": "API key Google Maps tidak ditemukan."}
 
-    geocode_url = f"https://maps.googleapis.com/maps/api/geocode/json?address={location}&key={api_key}"
-    geo_resp = requests.get(geocode_url)
-    if geo_resp.status_code != 200:
-        return {"error": "Gagal mendapatkan koordinat lokasi."}
-    geo_data = geo_resp.json()
-
-    if not geo_data["results"]:
-        return {"error": f"Lokasi '{location}' tidak ditemukan di Google Maps."}
-
-    lat = geo_data["results"][0]["geometry"]["location"]["lat"]
-    lng = geo_data["results"][0]["geometry"]["location"]["lng"]
-
-    places_url = (
-        f"https://maps.googleapis.com/maps/api/place/nearbysearch/json"
-        f"?location={lat},{lng}&radius={radius}&type=restaurant&key={api_key}"
-    )
-    if keyword:
-        places_url += f"&keyword={keyword}"
-
-    resp = requests.get(places_url)
-    if resp.status_code != 200:
-        return {"error": "Gagal mengambil data restoran dari Google Maps."}
-
-    places_data = resp.json()
-    if not places_data.get("results"):
-        return {"error": f"Tidak ada restoran ditemukan di sekitar {location}."}
-
-    results = []
-    for r in places_data["results"][:3]:
-        place = {
-            "name": r.get("name"),
-            "address": r.get("vicinity"),
-            "rating": r.get("rating", "N/A"),
-            "maps_url": f"https://www.google.com/maps/place/?q=place_id:{r.get('place_id')}"
+    # Geocode (cached permanently)
+    coords = geo_cache.get_geocode(location)
+    if coords is None:
+        geo_resp = http_get(
+            f"{Config.GOOGLE_MAPS_BASE_URL}/maps/api/geocode/json",
+            params={"address": location, "key": api_key}
+        )
+        if geo_resp.status_code != 200:
+            return {"error": "Gagal mendapatkan koordinat lokasi."}
+        geo_data = geo_resp.json()
+
+        if not geo_data["results"]:
+            return {"error": f"Lokasi '{location}' tidak ditemukan di Google Maps."}
+
+        lat = geo_data["results"][0]["geometry"]["location"]["lat"]
+        lng = geo_data["results"][0]["geometry"]["location"]["lng"]
+        geo_cache.set_geocode(location, lat, lng)
+    else:
+        lat, lng = coords
+
+    # Nearby search (cached per cell/radius/keyword for PLACES_CACHE_TTL)
+    places = geo_cache.get_places(lat, lng, radius, keyword)
+    if places is None:
+        places_params = {
+            "location": f"{lat},{lng}",
+            "radius": radius,
+            "type": "restaurant",
+            "key": api_key
         }
-        results.append(place)
+        if keyword:
+            places_params["keyword"] = keyword
+
+        resp = http_get(
+            f"{Config.GOOGLE_MAPS_BASE_URL}/maps/api/place/nearbysearch/json",
+            params=places_params
+        )
+        if resp.status_code != 200:
+            return {"error": "Gagal mengambil data restoran dari Google Maps."}
+
+        places_data = resp.json()
+        if not places_data.get("results"):
+            return {"error": f"Tidak ada restoran ditemukan di sekitar {location}."}
+
+        results = []
+        for r in places_data["results"][:3]:
+            place = {
+                "name": r.get("name"),
+                "address": r.get("vicinity"),
+                "rating": r.get("rating", "N/A"),
+                "maps_url": f"https://www.google.com/maps/place/?q=place_id:{r.get('place_id')}"
+            }
+            results.append(place)
+
+        places = {"total_found": len(places_data["results"]), "top_recommendations": results}
+        geo_cache.set_places(lat, lng, radius, keyword, places)
 
-    return {"location": location, "total_found": len(places_data["results"]), "top_recommendations": results}
+    return {"location": location, **places}
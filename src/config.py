@@ -16,15 +16,104 @@ class Config:
     
     # Weather API (OpenWeatherMap - Free)
     WEATHER_API_KEY = os.getenv("WEATHER_API_KEY")
-    WEATHER_API_URL = "https://api.openweathermap.org/data/2.5/weather"
+    WEATHER_API_URL = os.getenv("WEATHER_API_URL", "https://api.openweathermap.org/data/2.5/weather")
+    
+    # Google Maps API base URL (override to point at a local stand-in server)
+    GOOGLE_MAPS_BASE_URL = os.getenv("GOOGLE_MAPS_BASE_URL", "https://maps.googleapis.com")
+    
+    # Weather cache (seconds); stale entries are served while refreshing
+    WEATHER_CACHE_TTL = int(os.getenv("WEATHER_CACHE_TTL", "600"))
+    WEATHER_CACHE_STALE_TTL = int(os.getenv("WEATHER_CACHE_STALE_TTL", "1800"))
+    WEATHER_CACHE_MAX_ENTRIES = int(os.getenv("WEATHER_CACHE_MAX_ENTRIES", "256"))
+    
+    # Google Maps cache (SQLite); geocodes never expire, places expire after TTL seconds
+    GEO_CACHE_PATH = os.getenv("GEO_CACHE_PATH", "cache/geo_cache.db")
+    PLACES_CACHE_TTL = int(os.getenv("PLACES_CACHE_TTL", "86400"))
+    
+    # Shared HTTP client for external tools (seconds / connections per host)
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+    HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "8"))
+    HTTP_POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "4"))
+    HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))
     
     # Logging
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
     LOG_FILE = os.getenv("LOG_FILE", "logs/foodiebot.log")
+    # Log file format: "text" (default) or "json" (one JSON object per line)
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+    # Rotate the log file at LOG_MAX_BYTES, keeping LOG_BACKUP_COUNT old files
+    LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+    LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+    
+    # Prometheus metrics endpoint (http://METRICS_HOST:METRICS_PORT/metrics); port 0 disables it
+    METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+    
+    # Tracing: per-message spans; traces slower than TRACE_SLOW_THRESHOLD seconds go to TRACE_FILE
+    TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+    TRACE_SLOW_THRESHOLD = float(os.getenv("TRACE_SLOW_THRESHOLD", "10"))
+    TRACE_FILE = os.getenv("TRACE_FILE", "logs/slow_traces.jsonl")
     
     # Agent Settings
     MAX_CONVERSATION_HISTORY = int(os.getenv("MAX_CONVERSATION_HISTORY", "10"))
+    
+    # Conversation store: max users kept in memory, idle expiry and sweep interval (seconds)
+    MAX_ACTIVE_USERS = int(os.getenv("MAX_ACTIVE_USERS", "5000"))
+    SESSION_IDLE_TTL = int(os.getenv("SESSION_IDLE_TTL", "3600"))
+    SESSION_SWEEP_INTERVAL = int(os.getenv("SESSION_SWEEP_INTERVAL", "300"))
+    
+    # Storage backend: "memory" (default) or "sqlite" (durable, write-behind)
+    STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "memory")
+    STORAGE_PATH = os.getenv("STORAGE_PATH", "data/foodiebot.db")
+    STORAGE_FLUSH_INTERVAL = float(os.getenv("STORAGE_FLUSH_INTERVAL", "1.0"))
+    STORAGE_BATCH_SIZE = int(os.getenv("STORAGE_BATCH_SIZE", "100"))
+    
+    # Seconds between refreshes of the date/time block in the prompt
+    PROMPT_TIME_REFRESH = int(os.getenv("PROMPT_TIME_REFRESH", "60"))
+    
+    # Prompt context: history tokens sent per request; older turns get summarized
+    CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+    SUMMARY_MAX_TOKENS = int(os.getenv("SUMMARY_MAX_TOKENS", "256"))
     RESPONSE_TIMEOUT = int(os.getenv("RESPONSE_TIMEOUT", "30"))
+    MAX_TOOL_ROUNDS = int(os.getenv("MAX_TOOL_ROUNDS", "3"))
+    
+    # Groq endpoint override (e.g. a local stand-in server) and hard per-call timeout (seconds)
+    GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "")
+    GROQ_REQUEST_TIMEOUT = float(os.getenv("GROQ_REQUEST_TIMEOUT", "20"))
+    
+    # Hedged requests: resend a non-streamed call still pending after the model's
+    # GROQ_HEDGE_PERCENTILE latency (GROQ_HEDGE_DELAY seconds until enough samples)
+    GROQ_HEDGING = os.getenv("GROQ_HEDGING", "false").lower() == "true"
+    GROQ_HEDGE_PERCENTILE = float(os.getenv("GROQ_HEDGE_PERCENTILE", "0.95"))
+    GROQ_HEDGE_DELAY = float(os.getenv("GROQ_HEDGE_DELAY", "3.0"))
+    
+    # Model routing: simple calls (short turns, tool follow-ups, summaries) use the fast model
+    MODEL_ROUTING = os.getenv("MODEL_ROUTING", "true").lower() == "true"
+    GROQ_FAST_MODEL = os.getenv("GROQ_FAST_MODEL", "llama-3.1-8b-instant")
+    ROUTING_SIMPLE_MAX_CHARS = int(os.getenv("ROUTING_SIMPLE_MAX_CHARS", "80"))
+    
+    # Groq rate limits (client-side throttling) and retries for 429/transient errors
+    GROQ_RPM_LIMIT = int(os.getenv("GROQ_RPM_LIMIT", "30"))
+    GROQ_TPM_LIMIT = int(os.getenv("GROQ_TPM_LIMIT", "6000"))
+    GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "3"))
+    GROQ_BACKOFF_BASE = float(os.getenv("GROQ_BACKOFF_BASE", "0.5"))
+    GROQ_BACKOFF_MAX = float(os.getenv("GROQ_BACKOFF_MAX", "8"))
+    
+    # Scheduler: max agent requests in flight across all users
+    MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "8"))
+    
+    # Max tool calls from one LLM turn executed in parallel
+    MAX_PARALLEL_TOOLS = int(os.getenv("MAX_PARALLEL_TOOLS", "4"))
+    
+    # Streaming replies (progressive Discord message edits)
+    STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "true").lower() == "true"
+    STREAM_EDIT_INTERVAL = float(os.getenv("STREAM_EDIT_INTERVAL", "1.0"))
+    
+    # Nutrition table for calorie lookups (CSV); empty = bundled src/agent/data/nutrition.csv
+    NUTRITION_DATA_PATH = os.getenv("NUTRITION_DATA_PATH", "")
+    
+    # Answer simple calorie/weather/meal-time requests from tools directly, without the LLM
+    INTENT_FAST_PATH = os.getenv("INTENT_FAST_PATH", "true").lower() == "true"
     
     # Default Location for Weather
     DEFAULT_LOCATION = os.getenv("DEFAULT_LOCATION", "Jakarta")
@@ -1,7 +1,16 @@
 import discord
 from discord.ext import commands
 from src.agent.agent_core import FoodieAgent
+from src.agent.scheduler import RequestScheduler
+from src.agent.tools import tool_flight
+from src.integrations.streaming import StreamingReply
 from src.config import Config
+from src.utils.helpers import split_message
+from src.utils.http_client import close_session
+from src.utils.metrics import (
+    active_conversations, discord_send_latency, errors_total, queue_depth, start_metrics_server
+)
+from src.utils.tracing import close_tracing, span
 import logging
 
 logger = logging.getLogger(__name__)
@@ -21,11 +30,35 @@ class FoodieDiscordBot(commands.Bot):
         )
         
         self.agent = FoodieAgent()
+        self.scheduler = RequestScheduler()
+        self.metrics_server = None
+        
+        # Gauges are read at scrape time
+        active_conversations.set_function(lambda: len(self.agent.conversations))
+        queue_depth.set_function(lambda: self.scheduler.queued)
         logger.info("Discord bot initialized")
     
+    async def setup_hook(self):
+        """Called once the event loop is running, before connecting"""
+        self.agent.start_background_tasks()
+        if Config.METRICS_PORT:
+            try:
+                self.metrics_server = start_metrics_server(Config.METRICS_HOST, Config.METRICS_PORT)
+            except OSError as e:
+                logger.warning("Metrics endpoint disabled: %s", e)
+    
+    async def close(self):
+        """Flush agent storage before disconnecting"""
+        await self.agent.close()
+        if self.metrics_server:
+            self.metrics_server.shutdown()
+            self.metrics_server.server_close()
+        close_tracing()
+        await super().close()
+    
     async def on_ready(self):
         """Called when bot is ready"""
-        logger.info(f"Bot logged in as {self.user.name} ({self.user.id})")
+        logger.info("Bot logged in as %s (%s)", self.user.name, self.user.id)
         print(f"✅ FoodieBot is online as {self.user.name}!")
         print(f"📊 Ready to serve food recommendations!")
         
@@ -63,31 +96,61 @@ class FoodieDiscordBot(commands.Bot):
         if not content:
             return
         
-        # Show typing indicator
-        async with message.channel.typing():
-            try:
-                # Process message through agent
-                response = self.agent.process_message(
-                    discord_id=str(message.author.id),
-                    username=message.author.name,
-                    message=content
-                )
-                
-                # Send response (split if too long)
-                if len(response) <= 2000:
-                    await message.reply(response)
-                else:
-                    # Split long messages
-                    chunks = [response[i:i+2000] for i in range(0, len(response), 2000)]
-                    for i, chunk in enumerate(chunks):
-                        if i == 0:
-                            await message.reply(chunk)
-                        else:
-                            await message.channel.send(chunk)
+        discord_id = str(message.author.id)
+        
+        # One trace per message: agent, LLM and tool spans hang off it
+        with span("discord.message", user_id=discord_id, stream=Config.STREAM_RESPONSES):
+            # Stream the reply with progressive edits
+            if Config.STREAM_RESPONSES:
+                try:
+                    await self.scheduler.submit(discord_id, self._stream_reply, message, content)
+                except Exception as e:
+                    logger.error("Error streaming message: %s", e)
+                    errors_total.inc(component="discord")
+                    await message.reply("Maaf, terjadi kesalahan. Coba lagi ya! 😅")
+                return
             
-            except Exception as e:
-                logger.error(f"Error processing message: {e}")
-                await message.reply("Maaf, terjadi kesalahan. Coba lagi ya! 😅")
+            # Show typing indicator
+            async with message.channel.typing():
+                try:
+                    # Process message through agent (in order per user)
+                    response = await self.scheduler.submit(
+                        discord_id,
+                        self.agent.process_message,
+                        discord_id=discord_id,
+                        username=message.author.name,
+                        message=content
+                    )
+                    
+                    # Send response (split if too long)
+                    chunks = split_message(response)
+                    with span("discord.send", chunks=len(chunks)):
+                        for i, chunk in enumerate(chunks):
+                            if i == 0:
+                                with discord_send_latency.time(op="reply"):
+                                    await message.reply(chunk)
+                            else:
+                                with discord_send_latency.time(op="send"):
+                                    await message.channel.send(chunk)
+                
+                except Exception as e:
+                    logger.error("Error processing message: %s", e)
+                    errors_total.inc(component="discord")
+                    await message.reply("Maaf, terjadi kesalahan. Coba lagi ya! 😅")
+    
+    async def _stream_reply(self, message: discord.Message, content: str):
+        """Stream the agent response into progressively edited messages"""
+        reply = StreamingReply(message)
+        
+        async with message.channel.typing():
+            async for chunk in self.agent.process_message_stream(
+                discord_id=str(message.author.id),
+                username=message.author.name,
+                message=content
+            ):
+                await reply.feed(chunk)
+        
+        await reply.finish()
 
 
 def setup_commands(bot: FoodieDiscordBot):
@@ -157,7 +220,7 @@ def setup_commands(bot: FoodieDiscordBot):
     @bot.command(name="reset")
     async def reset_command(ctx):
         """Reset conversation history"""
-        response = bot.agent.reset_conversation(str(ctx.author.id))
+        response = await bot.agent.reset_conversation(str(ctx.author.id))
         await ctx.send(f"🔄 {response}")
     
     @bot.command(name="stats", aliases=["statistik"])
@@ -212,6 +275,50 @@ def setup_commands(bot: FoodieDiscordBot):
             inline=True
         )
         
+        # Add scheduler queue info
+        queue_stats = bot.scheduler.get_stats()
+        embed.add_field(
+            name="Queue",
+            value=(
+                f"{queue_stats['in_flight']}/{queue_stats['max_concurrent']} running, "
+                f"{queue_stats['queue_depth']} waiting\n"
+                f"avg wait {queue_stats['avg_wait_ms']}ms"
+            ),
+            inline=True
+        )
+        
+        # Add fast path (no-LLM answers) usage
+        if bot.agent.router is not None:
+            router_stats = bot.agent.router.get_stats()
+            embed.add_field(
+                name="Fast Path",
+                value=(
+                    f"{router_stats['fast_path']}/{router_stats['total']} answered without LLM\n"
+                    f"avg {router_stats['avg_latency_ms']}ms"
+                ),
+                inline=True
+            )
+        
+        # Add tool call coalescing
+        flight_stats = tool_flight.get_stats()
+        embed.add_field(
+            name="Tool Calls",
+            value=f"{flight_stats['upstream_calls']} upstream, {flight_stats['saved']} saved by coalescing",
+            inline=True
+        )
+        
+        # Add Groq rate limiter state
+        limiter_stats = bot.agent.llm.limiter.get_stats()
+        embed.add_field(
+            name="Groq Limits",
+            value=(
+                f"{limiter_stats['requests_available']:.0f}/{limiter_stats['rpm_limit']} req, "
+                f"{limiter_stats['tokens_available']}/{limiter_stats['tpm_limit']} tokens\n"
+                f"{limiter_stats['waiting']} waiting, {limiter_stats['rate_limited']}× 429"
+            ),
+            inline=True
+        )
+        
         await ctx.send(embed=embed)
     
     @bot.command(name="about", aliases=["tentang", "info"])
@@ -226,9 +333,11 @@ def setup_commands(bot: FoodieDiscordBot):
             color=discord.Color.green()
         )
         
+        router = bot.agent.llm.router
+        models = f"{router.large_model}\n{router.fast_model} (fast)" if router.enabled else router.large_model
         embed.add_field(
             name="🧠 AI Model",
-            value="Groq API - Llama 3.1 70B",
+            value=f"Groq API - {models}",
             inline=True
         )
         
@@ -240,7 +349,7 @@ def setup_commands(bot: FoodieDiscordBot):
         
         embed.add_field(
             name="💾 Storage",
-            value="In-Memory (session-based)",
+            value=bot.agent.storage.description,
             inline=True
         )
         
@@ -275,7 +384,9 @@ def setup_commands(bot: FoodieDiscordBot):
         
         # Use agent to get weather
         message = f"Bagaimana cuaca di {location}?"
-        response = bot.agent.process_message(
+        response = await bot.scheduler.submit(
+            str(ctx.author.id),
+            bot.agent.process_message,
             str(ctx.author.id),
             ctx.author.name,
             message
@@ -300,8 +411,11 @@ def run_discord_bot():
         bot.run(Config.DISCORD_BOT_TOKEN)
     
     except Exception as e:
-        logger.error(f"Error running Discord bot: {e}")
+        logger.error("Error running Discord bot: %s", e)
         raise
+    
+    finally:
+        close_session()
 
 
 if __name__ == "__main__":
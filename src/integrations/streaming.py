@@ -0,0 +1,101 @@
+import discord
+from src.config import Config
+from src.utils.helpers import DISCORD_MESSAGE_LIMIT, sanitize_response, split_message
+from src.utils.metrics import discord_send_latency
+from typing import List, Optional
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+_FUNCTION_OPEN = "<function="
+_FUNCTION_CLOSE = "</function>"
+
+def _hold_back_open_tag(text: str, final: bool = False) -> str:
+    """
+    Cut off a trailing <function=...> tag that hasn't closed yet, so it is
+    never shown before sanitize_response can strip it. Mid-stream a trailing
+    prefix of the opening tag ("<func") is held back too.
+    """
+    start = text.rfind(_FUNCTION_OPEN)
+    if start != -1 and text.find(_FUNCTION_CLOSE, start) == -1:
+        return text[:start]
+    if not final:
+        for size in range(min(len(_FUNCTION_OPEN) - 1, len(text)), 0, -1):
+            if _FUNCTION_OPEN.startswith(text[-size:]):
+                return text[:-size]
+    return text
+
+class StreamingReply:
+    """
+    Progressively renders a streamed LLM response into Discord messages.
+
+    The first message is posted as soon as visible text arrives, then edited
+    in place at most once per `edit_interval` seconds (Discord rate-limits
+    message edits). Text past the 2000-char limit rolls over into follow-up
+    messages in the same channel; pages no longer needed (the text shrank
+    once sanitized) are deleted. Function-call tags are held back until
+    they close, so they are never shown.
+    """
+
+    def __init__(self, message: discord.Message, edit_interval: float = None,
+                 limit: int = DISCORD_MESSAGE_LIMIT):
+        self.source = message
+        self.edit_interval = Config.STREAM_EDIT_INTERVAL if edit_interval is None else edit_interval
+        self.limit = limit
+
+        self.text = ""
+        self.sent: List[discord.Message] = []
+        self._rendered: List[str] = []
+        self._started_at = time.perf_counter()
+        self._last_flush = 0.0
+
+        # Time from request to first visible token (seconds)
+        self.first_visible_latency: Optional[float] = None
+
+    async def feed(self, chunk: str):
+        """Add a streamed chunk, flushing to Discord if it's time"""
+        self.text += chunk
+
+        # Post the first message right away, then throttle edits
+        if not self.sent or time.perf_counter() - self._last_flush >= self.edit_interval:
+            await self.flush()
+
+    async def flush(self, final: bool = False):
+        """Render the current text into Discord messages"""
+        visible = sanitize_response(_hold_back_open_tag(self.text, final))
+        pages = split_message(visible or "", self.limit)
+
+        for i, page in enumerate(pages):
+            if i < len(self.sent):
+                if self._rendered[i] != page:
+                    with discord_send_latency.time(op="edit"):
+                        await self.sent[i].edit(content=page)
+                    self._rendered[i] = page
+            else:
+                if i == 0:
+                    with discord_send_latency.time(op="reply"):
+                        sent = await self.source.reply(page)
+                    self.first_visible_latency = time.perf_counter() - self._started_at
+                    logger.info("First visible token after %.0fms", self.first_visible_latency * 1000)
+                else:
+                    with discord_send_latency.time(op="send"):
+                        sent = await self.source.channel.send(page)
+                self.sent.append(sent)
+                self._rendered.append(page)
+
+        # Sanitizing can shrink the text: drop pages past the end
+        while len(self.sent) > len(pages):
+            with discord_send_latency.time(op="delete"):
+                await self.sent.pop().delete()
+            self._rendered.pop()
+
+        self._last_flush = time.perf_counter()
+
+    async def finish(self, fallback: str = "Maaf, terjadi kesalahan. Coba lagi ya! 😅"):
+        """Flush the final text; send `fallback` if nothing was ever shown"""
+        await self.flush(final=True)
+
+        if not self.sent:
+            with discord_send_latency.time(op="reply"):
+                await self.source.reply(fallback)
@@ -0,0 +1,126 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class TTLCache:
+    """
+    Thread-safe in-memory cache with TTL, LRU bound and stale-while-revalidate.
+
+    Fresh entries (younger than `ttl`) are returned directly. Stale entries
+    (younger than `ttl + stale_ttl`) are returned immediately while a single
+    background thread reloads them. Anything older is treated as a miss.
+    """
+
+    def __init__(self, ttl: float, max_entries: int, stale_ttl: float = 0, name: str = "cache"):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.name = name
+
+        # Format: {key: (value, stored_at)}, oldest-used first
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing = set()
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any],
+                    cacheable: Callable[[Any], bool] = lambda value: True) -> Any:
+        """
+        Get a cached value, calling `loader` on a miss
+
+        Args:
+            key: Cache key (already normalized)
+            loader: Zero-arg callable that fetches a fresh value
+            cacheable: Predicate deciding whether a loaded value is stored
+                       (e.g. skip failed API responses)
+
+        Returns:
+            Cached or freshly loaded value
+        """
+        now = time.monotonic()
+        refresh = False
+
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                age = now - stored_at
+
+                if age < self.ttl:
+                    self.hits += 1
+                    self._data.move_to_end(key)
+                    return value
+
+                if age < self.ttl + self.stale_ttl:
+                    self.stale_hits += 1
+                    self._data.move_to_end(key)
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        refresh = True
+                else:
+                    del self._data[key]
+                    entry = None
+
+            if entry is None:
+                self.misses += 1
+
+        if entry is not None:
+            if refresh:
+                threading.Thread(
+                    target=self._refresh, args=(key, loader, cacheable),
+                    name=f"{self.name}-refresh", daemon=True
+                ).start()
+            return value
+
+        value = loader()
+        if cacheable(value):
+            self.set(key, value)
+        return value
+
+    def _refresh(self, key: Hashable, loader: Callable[[], Any],
+                 cacheable: Callable[[Any], bool]):
+        """Reload a stale entry in the background"""
+        try:
+            value = loader()
+            if cacheable(value):
+                self.set(key, value)
+                self.refreshes += 1
+        except Exception as e:
+            logger.warning("Background refresh failed for %s key %r: %s", self.name, key, e)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entry if full"""
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._data.clear()
+
+    def get_stats(self) -> Dict:
+        """Get hit/miss counters"""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "name": self.name,
+            "size": len(self._data),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "hit_rate": round((self.hits + self.stale_hits) / lookups, 3) if lookups else 0.0
+        }
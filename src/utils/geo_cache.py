@@ -0,0 +1,171 @@
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS geocode (
+    query TEXT PRIMARY KEY,
+    lat REAL NOT NULL,
+    lng REAL NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS places (
+    cell TEXT NOT NULL,
+    radius INTEGER NOT NULL,
+    keyword TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (cell, radius, keyword)
+);
+"""
+
+class GeoCache:
+    """
+    On-disk SQLite cache for Google Maps lookups.
+
+    Geocodes are stored indefinitely (city coordinates don't move). Nearby
+    search results are stored per (rounded lat/lng cell, radius, keyword)
+    and expire after `places_ttl` seconds; expired rows are deleted when
+    the cache is opened and every `purge_every` places writes. The database runs in WAL mode
+    with a busy timeout, so several bot processes can share one file.
+    """
+
+    def __init__(self, path: str, places_ttl: float, cell_precision: int = 3, purge_every: int = 500):
+        self.path = path
+        self.places_ttl = places_ttl
+        # 3 decimals ~ 110m cells
+        self.cell_precision = cell_precision
+        self.purge_every = purge_every
+
+        # sqlite3 connections can't be shared across threads; tools run in a thread pool
+        self._local = threading.local()
+        self._purge_lock = threading.Lock()
+        # None until the first connection purges on open
+        self._writes_since_purge: Optional[int] = None
+
+        self.geocode_hits = 0
+        self.geocode_misses = 0
+        self.places_hits = 0
+        self.places_misses = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        """Get this thread's connection, creating the database on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+            with self._purge_lock:
+                purge = self._writes_since_purge is None
+                if purge:
+                    self._writes_since_purge = 0
+            if purge:
+                self._purge(conn)
+        return conn
+
+    @staticmethod
+    def _normalize(text: Optional[str]) -> str:
+        return " ".join(str(text or "").lower().split())
+
+    def _cell(self, lat: float, lng: float) -> str:
+        return f"{round(lat, self.cell_precision)},{round(lng, self.cell_precision)}"
+
+    def get_geocode(self, query: str) -> Optional[Tuple[float, float]]:
+        """Get cached (lat, lng) for a location query"""
+        try:
+            row = self._conn().execute(
+                "SELECT lat, lng FROM geocode WHERE query = ?", (self._normalize(query),)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("Geo cache read failed: %s", e)
+            row = None
+
+        if row is None:
+            self.geocode_misses += 1
+            return None
+        self.geocode_hits += 1
+        return row[0], row[1]
+
+    def set_geocode(self, query: str, lat: float, lng: float):
+        """Store coordinates for a location query (no expiry)"""
+        try:
+            self._conn().execute(
+                "INSERT OR REPLACE INTO geocode (query, lat, lng, created_at) VALUES (?, ?, ?, ?)",
+                (self._normalize(query), lat, lng, time.time())
+            )
+        except sqlite3.Error as e:
+            logger.warning("Geo cache write failed: %s", e)
+
+    def get_places(self, lat: float, lng: float, radius: int,
+                   keyword: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Get cached nearby search results if younger than places_ttl"""
+        try:
+            row = self._conn().execute(
+                "SELECT payload, created_at FROM places WHERE cell = ? AND radius = ? AND keyword = ?",
+                (self._cell(lat, lng), int(radius), self._normalize(keyword))
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("Geo cache read failed: %s", e)
+            row = None
+
+        if row is None or time.time() - row[1] > self.places_ttl:
+            self.places_misses += 1
+            return None
+        self.places_hits += 1
+        return json.loads(row[0])
+
+    def set_places(self, lat: float, lng: float, radius: int,
+                   keyword: Optional[str], payload: Dict[str, Any]):
+        """Store nearby search results for a cell"""
+        try:
+            self._conn().execute(
+                "INSERT OR REPLACE INTO places (cell, radius, keyword, payload, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self._cell(lat, lng), int(radius), self._normalize(keyword),
+                 json.dumps(payload, ensure_ascii=False), time.time())
+            )
+        except sqlite3.Error as e:
+            logger.warning("Geo cache write failed: %s", e)
+            return
+
+        with self._purge_lock:
+            self._writes_since_purge += 1
+            purge = self._writes_since_purge >= self.purge_every
+            if purge:
+                self._writes_since_purge = 0
+        if purge:
+            self.purge_expired()
+
+    def purge_expired(self) -> int:
+        """Delete expired places rows, returns number removed"""
+        return self._purge(self._conn())
+
+    def _purge(self, conn: sqlite3.Connection) -> int:
+        try:
+            cursor = conn.execute(
+                "DELETE FROM places WHERE created_at < ?", (time.time() - self.places_ttl,)
+            )
+        except sqlite3.Error as e:
+            logger.warning("Geo cache purge failed: %s", e)
+            return 0
+        if cursor.rowcount:
+            logger.info("Purged %s expired places from the geo cache", cursor.rowcount)
+        return cursor.rowcount
+
+    def get_stats(self) -> Dict:
+        """Get hit/miss counters (this process only)"""
+        return {
+            "geocode_hits": self.geocode_hits,
+            "geocode_misses": self.geocode_misses,
+            "places_hits": self.places_hits,
+            "places_misses": self.places_misses
+        }
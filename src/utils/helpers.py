@@ -0,0 +1,21 @@
+import re
+from typing import List
+
+DISCORD_MESSAGE_LIMIT = 2000
+
+_FUNCTION_TAG_RE = re.compile(r'<function=.*?</function>')
+_TOOL_JSON_RE = re.compile(r'\{"location".*?\}')
+
+def sanitize_response(text: str) -> str:
+    """Remove exposed function syntax from LLM output (safety net)"""
+    if not text:
+        return text
+    # Remove <function=...> tags
+    text = _FUNCTION_TAG_RE.sub('', text)
+    # Remove JSON-like tool calls
+    text = _TOOL_JSON_RE.sub('', text)
+    return text.strip()
+
+def split_message(text: str, limit: int = DISCORD_MESSAGE_LIMIT) -> List[str]:
+    """Split text into Discord-sized chunks"""
+    return [text[i:i + limit] for i in range(0, len(text), limit)]
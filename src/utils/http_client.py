@@ -0,0 +1,72 @@
+from requests.adapters import HTTPAdapter
+from src.config import Config
+from typing import Optional
+import asyncio
+import logging
+import requests
+import threading
+
+logger = logging.getLogger(__name__)
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+class PooledSession(requests.Session):
+    """requests.Session that applies a default (connect, read) timeout"""
+
+    def __init__(self, timeout):
+        super().__init__()
+        self.default_timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.default_timeout)
+        return super().request(method, url, **kwargs)
+
+
+def get_session() -> requests.Session:
+    """
+    Get the shared HTTP session used by all external tools
+
+    Connections are kept alive and pooled per host, so repeat calls to
+    OpenWeatherMap / Google Maps skip the TCP+TLS handshake.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = PooledSession(timeout=(Config.HTTP_CONNECT_TIMEOUT, Config.HTTP_READ_TIMEOUT))
+                # pool_block: wait for a free connection instead of opening extra ones
+                adapter = HTTPAdapter(
+                    pool_connections=Config.HTTP_POOL_HOSTS,
+                    pool_maxsize=Config.HTTP_POOL_MAXSIZE,
+                    pool_block=True
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+                logger.info(
+                    "HTTP session initialized (max %s connections/host, timeout %ss/%ss)",
+                    Config.HTTP_POOL_MAXSIZE, Config.HTTP_CONNECT_TIMEOUT, Config.HTTP_READ_TIMEOUT
+                )
+    return _session
+
+
+def http_get(url: str, params: dict = None, timeout=None, **kwargs) -> requests.Response:
+    """GET through the shared pooled session (default timeouts apply)"""
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+    return get_session().get(url, params=params, **kwargs)
+
+
+async def http_get_async(url: str, params: dict = None, timeout=None, **kwargs) -> requests.Response:
+    """GET through the shared pooled session without blocking the event loop"""
+    return await asyncio.to_thread(http_get, url, params, timeout, **kwargs)
+
+
+def close_session():
+    """Close pooled connections (on shutdown)"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -1,14 +1,111 @@
-import logging
-import colorlog
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 from src.config import Config
+from typing import Dict, Optional
+import atexit
+import copy
+import json
+import logging
+import queue
+import time
+import uuid
+import colorlog
+
+# Per-request log context (copied into tasks and to_thread workers automatically)
+_request_id: ContextVar[str] = ContextVar("request_id", default="-")
+_user_id: ContextVar[str] = ContextVar("user_id", default="-")
+# Format: {stage: seconds}, shared by everything running for the request
+_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar("log_stages", default=None)
+
+_listener: Optional[QueueListener] = None
+
+
+def bind_request(user_id, request_id: str = None) -> str:
+    """Start a new log context for one request and return its request id (new unless given)"""
+    request_id = request_id or uuid.uuid4().hex[:12]
+    _request_id.set(request_id)
+    _user_id.set(str(user_id))
+    _stages.set({})
+    return request_id
+
+
+@contextmanager
+def log_stage(name: str):
+    """Time a stage of the current request (repeated stages add up)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stages = _stages.get()
+        if stages is not None:
+            stages[name] = stages.get(name, 0.0) + time.perf_counter() - started
+
+
+def stage_durations() -> Dict[str, float]:
+    """Stage durations (ms) recorded so far for the current request"""
+    return {name: round(seconds * 1000, 1) for name, seconds in (_stages.get() or {}).items()}
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamp records with the request/user id of the code that logged them"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # Runs in the caller's task/thread, before the record is queued
+        record.request_id = _request_id.get()
+        record.user_id = _user_id.get()
+        return True
+
+
+class ContextQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting (tracebacks included) to the listener's handlers"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stock prepare() formats the record here and folds the traceback
+        # into msg; only merge the args (they may change once queued) and keep
+        # exc_info so each formatter renders it in its own format
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, ids and stage durations"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+            "user_id": getattr(record, "user_id", "-")
+        }
+        stages = getattr(record, "stages", None)
+        if stages:
+            entry["stages_ms"] = stages
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
 
 def setup_logger():
-    """Setup application logger with color and file output"""
+    """
+    Setup application logger with color and file output
+    
+    The root logger only puts records on a queue; a background listener
+    thread formats them and does the console/file I/O, so logging never
+    blocks the event loop. The file rotates at LOG_MAX_BYTES.
+    """
+    global _listener
+    stop_logging()
     
-    # Create logs directory if not exists
-    log_dir = Path("logs")
-    log_dir.mkdir(exist_ok=True)
+    # Create log directory if not exists
+    log_file = Path(Config.LOG_FILE)
+    log_file.parent.mkdir(parents=True, exist_ok=True)
     
     # Get root logger
     logger = logging.getLogger()
@@ -35,20 +132,54 @@ def setup_logger():
     )
     
     console_handler.setFormatter(console_format)
-    logger.addHandler(console_handler)
     
-    # File handler
-    file_handler = logging.FileHandler(Config.LOG_FILE, encoding='utf-8')
+    # File handler (size-based rotation)
+    file_handler = RotatingFileHandler(
+        log_file,
+        maxBytes=Config.LOG_MAX_BYTES,
+        backupCount=Config.LOG_BACKUP_COUNT,
+        encoding='utf-8'
+    )
     file_handler.setLevel(logging.INFO)
     
-    file_format = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    if Config.LOG_FORMAT.lower() == "json":
+        file_format = JsonFormatter()
+    else:
+        file_format = logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
     
     file_handler.setFormatter(file_format)
-    logger.addHandler(file_handler)
+    
+    # Queue in front of both handlers; the listener thread does the I/O
+    log_queue = queue.SimpleQueue()
+    queue_handler = ContextQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+    logger.addHandler(queue_handler)
+    
+    _listener = QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+    _listener.start()
     
     logger.info("Logger initialized")
     
-    return logger
\ No newline at end of file
+    return logger
+
+
+def stop_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is None:
+        return
+    
+    root = logging.getLogger()
+    for handler in [h for h in root.handlers if isinstance(h, QueueHandler)]:
+        root.removeHandler(handler)
+    
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+
+
+atexit.register(stop_logging)
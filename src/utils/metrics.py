@@ -0,0 +1,254 @@
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Sequence, Tuple
+import bisect
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets (seconds): tools and Discord calls are sub-second, LLM calls can take 30s
+FAST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SLOW_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs: Sequence[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    """Base for labelled metrics; label values are passed as keyword arguments"""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        # Format: {label values: value}
+        self._values: Dict[Tuple[str, ...], float] = {}
+        # Format: {label values: callable}, read at scrape time
+        self._functions: Dict[Tuple[str, ...], Callable[[], float]] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def set_function(self, func: Callable[[], float], **labels):
+        """Read the value from `func()` at scrape time (for counts kept elsewhere)"""
+        with self._lock:
+            self._functions[self._key(labels)] = func
+
+    def value(self, **labels) -> float:
+        """Current value for one label set (0 if never set)"""
+        key = self._key(labels)
+        func = self._functions.get(key)
+        return func() if func else self._values.get(key, 0.0)
+
+    def _samples(self) -> List[Tuple[str, Tuple[Tuple[str, str], ...], float]]:
+        with self._lock:
+            values = dict(self._values)
+            functions = dict(self._functions)
+
+        for key, func in functions.items():
+            try:
+                values[key] = func()
+            except Exception as e:
+                logger.warning("Metric %s callback failed: %s", self.name, e)
+
+        return [(self.name, tuple(zip(self.labels, key)), value) for key, value in sorted(values.items())]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type_name}"]
+        for name, pairs, value in self._samples():
+            lines.append(f"{name}{_format_labels(pairs)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+
+    type_name = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram of observed values (e.g. latencies in seconds)"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = FAST_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Format: {label values: [per-bucket counts..., +Inf count, sum]}
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the `with` block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        """Number of observations for one label set"""
+        series = self._series.get(self._key(labels))
+        return int(sum(series[:-1])) if series else 0
+
+    def _samples(self):
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+
+        samples = []
+        for key, values in sorted(series.items()):
+            pairs = tuple(zip(self.labels, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values[:-1]):
+                cumulative += count
+                samples.append((f"{self.name}_bucket", pairs + (("le", _format_value(bound)),), cumulative))
+            samples.append((f"{self.name}_sum", pairs, values[-1]))
+            samples.append((f"{self.name}_count", pairs, cumulative))
+        return samples
+
+
+class MetricsRegistry:
+    """Named metrics rendered together in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = FAST_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labels, buckets))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def start_metrics_server(host: str, port: int, metrics: MetricsRegistry = None) -> ThreadingHTTPServer:
+    """
+    Serve `GET /metrics` on a daemon thread (port 0 picks a free port)
+
+    Returns:
+        The running server; call `.shutdown()` to stop it
+    """
+    metrics = metrics or registry
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            payload = metrics.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info("Metrics endpoint on http://%s:%s/metrics", host, server.server_address[1])
+    return server
+
+
+# Process-wide registry and the bot's metrics
+registry = MetricsRegistry()
+
+llm_latency = registry.histogram(
+    "foodiebot_llm_latency_seconds", "Groq completion latency by model", ["model"], SLOW_BUCKETS
+)
+tool_latency = registry.histogram(
+    "foodiebot_tool_latency_seconds", "Tool execution latency by tool", ["tool"]
+)
+reply_latency = registry.histogram(
+    "foodiebot_reply_latency_seconds", "End-to-end agent reply latency", ["mode"], SLOW_BUCKETS
+)
+discord_send_latency = registry.histogram(
+    "foodiebot_discord_send_latency_seconds", "Discord reply/send/edit latency", ["op"]
+)
+errors_total = registry.counter(
+    "foodiebot_errors_total", "Errors by component", ["component"]
+)
+fallbacks_total = registry.counter(
+    "foodiebot_fallbacks_total", "Degraded answers by kind (fast path to LLM, timeout replies)", ["kind"]
+)
+cache_hits_total = registry.counter(
+    "foodiebot_cache_hits_total", "Cache hits by cache", ["cache"]
+)
+cache_misses_total = registry.counter(
+    "foodiebot_cache_misses_total", "Cache misses by cache", ["cache"]
+)
+active_conversations = registry.gauge(
+    "foodiebot_active_conversations", "Conversations held in memory"
+)
+queue_depth = registry.gauge(
+    "foodiebot_queue_depth", "Agent requests waiting in the scheduler"
+)
@@ -0,0 +1,63 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable
+import asyncio
+import copy
+import logging
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical async calls into one.
+
+    While a call for `key` is in flight, further calls with the same key
+    wait for that call instead of starting their own, and each gets a copy
+    of its result (or its exception). The entry is dropped as soon as the
+    call finishes, so nothing is cached beyond the flight itself.
+    """
+
+    def __init__(self, name: str = "single_flight"):
+        self.name = name
+
+        # Format: {key: running task}
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run `func()` for `key`, or join the identical call already running
+
+        A caller that is cancelled (e.g. by its own timeout) only stops
+        waiting; the shared call keeps running for the others.
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            logger.debug("%s: joined in-flight call for %r", self.name, key)
+            # Followers get their own copy so nobody mutates a shared result
+            return copy.deepcopy(await asyncio.shield(task))
+
+        task = asyncio.ensure_future(func())
+        self._inflight[key] = task
+        self.executed += 1
+        task.add_done_callback(lambda _: self._forget(key, task))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Nobody may be left awaiting a failed call; don't warn about it
+        if not task.cancelled():
+            task.exception()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get upstream calls made vs saved by coalescing"""
+        total = self.executed + self.coalesced
+        return {
+            "name": self.name,
+            "upstream_calls": self.executed,
+            "saved": self.coalesced,
+            "saved_rate": round(self.coalesced / total, 3) if total else 0.0,
+            "in_flight": len(self._inflight)
+        }
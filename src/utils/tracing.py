@@ -0,0 +1,231 @@
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from pathlib import Path
+from src.config import Config
+from typing import Any, Dict, List, Optional
+import atexit
+import json
+import logging
+import queue
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Spans kept per trace (a runaway tool loop must not grow a trace forever)
+MAX_SPANS_PER_TRACE = 200
+
+# Innermost open span of the current task (copied into child tasks and to_thread workers)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Trace:
+    """All spans recorded for one incoming message"""
+
+    __slots__ = ("trace_id", "started_at", "spans", "dropped", "finished")
+
+    def __init__(self, trace_id: str = None):
+        self.trace_id = trace_id or uuid.uuid4().hex[:12]
+        # Wall clock, for the dump; span offsets use perf_counter
+        self.started_at = time.time()
+        self.spans: List["Span"] = []
+        self.dropped = 0
+        self.finished = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        root = self.spans[0]
+        return {
+            "trace_id": self.trace_id,
+            "name": root.name,
+            "started_at": self.started_at,
+            "duration_ms": root.duration_ms,
+            "dropped_spans": self.dropped,
+            "spans": [item.to_dict(root.start) for item in self.spans]
+        }
+
+
+class Span:
+    """One timed stage of a trace, with attributes such as model or token counts"""
+
+    __slots__ = ("trace", "span_id", "parent_id", "name", "attrs", "start", "end", "_token")
+
+    def __init__(self, trace: Trace, name: str, parent: Optional["Span"], attrs: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = uuid.uuid4().hex[:8]
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.attrs = attrs
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self._token: Optional[Token] = None
+
+    @property
+    def trace_id(self) -> str:
+        return self.trace.trace_id
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return round((end - self.start) * 1000, 1)
+
+    def set(self, **attrs):
+        """Add attributes (e.g. token counts) to the span"""
+        self.attrs.update(attrs)
+
+    def finish(self):
+        """End the span; ending the root span completes the trace"""
+        if self.end is not None:
+            return
+        self.end = time.perf_counter()
+
+        if self._token is not None:
+            try:
+                _current_span.reset(self._token)
+            except ValueError:
+                # Ended from another context (e.g. an async generator closed elsewhere)
+                pass
+
+        if self.parent_id is None:
+            _finish_trace(self.trace)
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "offset_ms": round((self.start - origin) * 1000, 1),
+            "duration_ms": self.duration_ms,
+            "attrs": self.attrs
+        }
+
+
+class _NoopSpan:
+    """Stand-in returned while tracing is disabled"""
+
+    trace_id = None
+
+    def set(self, **attrs):
+        pass
+
+    def finish(self):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def start_span(name: str, activate: bool = True, **attrs) -> Span:
+    """
+    Open a span under the current one, or start a new trace if none is open
+
+    The span becomes the current span until `finish()` is called (unless
+    `activate` is False, e.g. in an async generator whose consumer runs
+    between chunks); use `span()` where a `with` block fits.
+    """
+    if not Config.TRACING_ENABLED:
+        return _NOOP_SPAN
+
+    parent = _current_span.get()
+    if parent is None or parent.trace.finished:
+        trace, parent = Trace(), None
+    else:
+        trace = parent.trace
+
+    new_span = Span(trace, name, parent, attrs)
+    if len(trace.spans) < MAX_SPANS_PER_TRACE:
+        trace.spans.append(new_span)
+    else:
+        trace.dropped += 1
+    if activate:
+        new_span._token = _current_span.set(new_span)
+    return new_span
+
+
+@contextmanager
+def span(name: str, activate: bool = True, **attrs):
+    """Record the `with` block as a span; errors are noted on the span and re-raised"""
+    current = start_span(name, activate, **attrs)
+    try:
+        yield current
+    except BaseException as e:
+        current.set(error=type(e).__name__)
+        raise
+    finally:
+        current.finish()
+
+
+def current_trace_id() -> Optional[str]:
+    """Trace id of the current span, or None outside a trace"""
+    current = _current_span.get()
+    return current.trace_id if current else None
+
+
+class SlowTraceWriter:
+    """Appends slow traces as JSON lines from a background thread (no disk I/O on the event loop)"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._queue: "queue.SimpleQueue[Optional[Dict]]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.written = 0
+
+    def submit(self, trace: Dict[str, Any]):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="slow-trace-writer", daemon=True)
+                self._thread.start()
+        self._queue.put(trace)
+
+    def _run(self):
+        while True:
+            trace = self._queue.get()
+            if trace is None:
+                return
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with self.path.open("a", encoding="utf-8") as f:
+                    f.write(json.dumps(trace, ensure_ascii=False, default=str) + "\n")
+                self.written += 1
+            except OSError as e:
+                logger.warning("Could not write slow trace: %s", e)
+
+    def close(self, timeout: float = 5.0):
+        """Write everything queued so far and stop the thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+
+
+_writer: Optional[SlowTraceWriter] = None
+
+
+def get_slow_trace_writer() -> SlowTraceWriter:
+    """Get the shared writer for Config.TRACE_FILE"""
+    global _writer
+    if _writer is None or _writer.path != Path(Config.TRACE_FILE):
+        _writer = SlowTraceWriter(Config.TRACE_FILE)
+    return _writer
+
+
+def close_tracing():
+    """Flush slow traces still queued for writing"""
+    if _writer is not None:
+        _writer.close()
+
+
+atexit.register(close_tracing)
+
+
+def _finish_trace(trace: Trace):
+    trace.finished = True
+    duration = trace.spans[0].duration_ms / 1000
+    if duration < Config.TRACE_SLOW_THRESHOLD:
+        return
+
+    logger.warning("Slow trace %s: %s took %.1fs, written to %s",
+                   trace.trace_id, trace.spans[0].name, duration, Config.TRACE_FILE)
+    get_slow_trace_writer().submit(trace.to_dict())
@@ -0,0 +1,500 @@
+"""
+Record/replay stand-in for the bot's upstream APIs, for tests, benchmarks and
+offline runs.
+
+One local server answers the Groq chat completions endpoint, the
+OpenWeatherMap `weather` endpoint and the Google geocode and nearbysearch
+endpoints. In replay mode responses come from a cassette (JSON file of
+recorded interactions). In record mode requests are forwarded to the real
+APIs and the responses saved to the cassette, with API keys stripped.
+Groq answers can instead be generated (`SyntheticGroq`, or the Groq-only
+`FakeGroqServer`) for load tests that need any number of distinct prompts.
+Latency, 429s and timeouts can be injected per service.
+
+Point the bot at it with the settings from `StandinServer.config()`
+(GROQ_BASE_URL, WEATHER_API_URL, GOOGLE_MAPS_BASE_URL), or from the shell:
+
+    python tests/standins.py --cassette tests/cassettes/foodiebot.json [--mode record] [--port 8765]
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+import argparse
+import json
+import random
+import threading
+import time
+import requests
+
+# service: (real upstream, paths served)
+SERVICES = {
+    "groq": ("https://api.groq.com", ("/openai/v1/chat/completions",)),
+    "weather": ("https://api.openweathermap.org", ("/data/2.5/weather",)),
+    "google": ("https://maps.googleapis.com", ("/maps/api/geocode/json", "/maps/api/place/nearbysearch/json")),
+}
+
+# Never written to a cassette
+SECRET_PARAMS = {"key", "appid"}
+FORWARD_HEADERS = ("Authorization", "Content-Type", "Accept")
+
+DEFAULT_CASSETTE = Path(__file__).parent / "cassettes" / "foodiebot.json"
+
+# 429 bodies in each API's own error format
+RATE_LIMIT_BODIES = {
+    "groq": {"error": {"message": "Rate limit reached for requests per minute (RPM)",
+                       "type": "requests", "code": "rate_limit_exceeded"}},
+    "weather": {"cod": 429, "message": "Your account is temporary blocked due to exceeding of requests limitation"},
+    "google": {"error_message": "You have exceeded your rate-limit for this API.",
+               "results": [], "status": "OVER_QUERY_LIMIT"},
+}
+
+
+def service_for(path: str):
+    for name, (_, paths) in SERVICES.items():
+        if path in paths:
+            return name
+    return None
+
+
+def match_key(path: str, query: dict, body: dict) -> str:
+    """
+    Key a request is recorded and replayed under
+
+    Groq requests are keyed by stream flag and the last message (role and
+    text); the other APIs by their query parameters, without API keys.
+    """
+    if body:
+        messages = body.get("messages") or [{}]
+        last = messages[-1]
+        text = " ".join(str(last.get("content") or "").lower().split())[:200]
+        return f"{path}|stream={bool(body.get('stream'))}|{last.get('role')}:{text}"
+
+    params = sorted((k, " ".join(str(v).lower().split())) for k, v in query.items() if k not in SECRET_PARAMS)
+    return path + "?" + "&".join(f"{k}={v}" for k, v in params)
+
+
+class Cassette:
+    """Recorded interactions, loaded from and saved to a JSON file"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.interactions = []
+        self._lock = threading.Lock()
+        if self.path.exists():
+            self.interactions = json.loads(self.path.read_text(encoding="utf-8"))["interactions"]
+
+    @staticmethod
+    def _shape(key: str):
+        """(path, stream flag, last role) of a Groq key; just the path for the others"""
+        parts = key.split("|", 2)
+        if len(parts) < 3:
+            return (key.split("?", 1)[0],)
+        return parts[0], parts[1], parts[2].split(":", 1)[0]
+
+    def find(self, path: str, key: str, strict: bool = False):
+        """
+        Interaction recorded for `key`; unless strict, falls back to the
+        closest recording (same stream mode and last role, then same path)
+        """
+        exact = [i for i in self.interactions if i["key"] == key]
+        if exact or strict:
+            return exact[-1] if exact else None
+
+        shape = self._shape(key)
+        for depth in range(len(shape), 0, -1):
+            candidates = [i for i in self.interactions if self._shape(i["key"])[:depth] == shape[:depth]]
+            if candidates:
+                return candidates[0]
+        return None
+
+    def add(self, interaction: dict):
+        with self._lock:
+            # Newest recording wins
+            self.interactions = [i for i in self.interactions if i["key"] != interaction["key"]]
+            self.interactions.append(interaction)
+
+    def save(self):
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(
+                json.dumps({"interactions": self.interactions}, indent=2, ensure_ascii=False) + "\n",
+                encoding="utf-8"
+            )
+
+
+class Faults:
+    """
+    Injected misbehaviour for one service
+
+    Args:
+        latency: Fixed latency (seconds) for every response, in place of the
+                 recorded (or generated) one; None replays the recorded latency
+        jitter: Extra random latency, uniform in [0, jitter] seconds, added on top
+        rate_limit_rate: Share (0-1) of requests answered with a 429
+        timeout_rate: Share (0-1) of requests that never get a response
+        retry_after: Retry-After seconds sent with injected 429s
+        hang: How long a timed-out request is held before the connection drops
+        script: Outcomes ("ok", "429", "timeout") used in order before the rates apply
+    """
+
+    def __init__(self, latency: float = None, jitter: float = 0.0, rate_limit_rate: float = 0.0,
+                 timeout_rate: float = 0.0, retry_after: float = 1.0, hang: float = 30.0, script=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_rate = rate_limit_rate
+        self.timeout_rate = timeout_rate
+        self.retry_after = retry_after
+        self.hang = hang
+        self.script = list(script or [])
+
+
+class SyntheticGroq:
+    """
+    Generated Groq chat completions, used instead of the cassette
+
+    Args:
+        delays: Latency (seconds) for each request in arrival order; requests
+                past the end of the list use `default_delay`
+        default_delay: Latency for requests not covered by `delays`
+        reply: Assistant message content returned
+        tool_call_rate: Share (0-1) of requests that offer tools and end in a
+                        user message which get a tool call instead of text
+        tool_calls: (name, arguments) pairs the tool calls cycle through
+        chunk_size: Characters per content chunk when streaming
+        seed: Seed for tool-call decisions (runs are repeatable)
+    """
+
+    def __init__(self, delays=None, default_delay: float = 0.0, reply: str = "Halo dari fake Groq!",
+                 tool_call_rate: float = 0.0, tool_calls=None, chunk_size: int = 16, seed: int = 0):
+        self.delays = list(delays or [])
+        self.default_delay = default_delay
+        self.reply = reply
+        self.tool_call_rate = tool_call_rate
+        self.tool_calls = list(tool_calls or [("calculate_calories", {"food_name": "nasi goreng"})])
+        self.chunk_size = chunk_size
+        self.requests = []
+        self.tool_calls_sent = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def respond(self, body: dict) -> dict:
+        """Interaction (in cassette format) answering one request"""
+        messages = body.get("messages") or [{}]
+        with self._lock:
+            index = len(self.requests)
+            self.requests.append(body)
+            delay = self.delays[index] if index < len(self.delays) else self.default_delay
+
+            tool_call = None
+            wants_tool = body.get("tools") and messages[-1].get("role") == "user"
+            if wants_tool and self._random.random() < self.tool_call_rate:
+                name, arguments = self.tool_calls[self.tool_calls_sent % len(self.tool_calls)]
+                self.tool_calls_sent += 1
+                tool_call = {
+                    "id": f"call_fake_{self.tool_calls_sent}",
+                    "type": "function",
+                    "function": {"name": name, "arguments": json.dumps(arguments)}
+                }
+
+        interaction = {"status": 200, "latency": delay}
+        if body.get("stream"):
+            events = [f"data: {json.dumps(chunk)}\n\n" for chunk in self._chunks(body, tool_call, index)]
+            interaction.update(content_type="text/event-stream", body_text="".join(events) + "data: [DONE]\n\n")
+        else:
+            interaction.update(content_type="application/json", body=self._completion(body, tool_call, index))
+        return interaction
+
+    def _completion(self, body: dict, tool_call, index: int) -> dict:
+        message = {"role": "assistant", "content": None if tool_call else self.reply}
+        if tool_call:
+            message["tool_calls"] = [tool_call]
+        prompt_tokens = len(json.dumps(body.get("messages", []))) // 4
+        return {
+            "id": f"chatcmpl-fake-{index + 1}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": message,
+                "finish_reason": "tool_calls" if tool_call else "stop"
+            }],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 5,
+                      "total_tokens": prompt_tokens + 5}
+        }
+
+    def _chunks(self, body: dict, tool_call, index: int):
+        """Streamed deltas: content in `chunk_size` pieces, or one tool call delta"""
+        if tool_call:
+            deltas = [{"role": "assistant", "tool_calls": [dict(tool_call, index=0)]}]
+        else:
+            text = self.reply
+            deltas = [{"role": "assistant", "content": text[i:i + self.chunk_size]}
+                      for i in range(0, len(text), self.chunk_size)]
+        for i, delta in enumerate(deltas):
+            last = i == len(deltas) - 1
+            yield {
+                "id": f"chatcmpl-fake-{index + 1}",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "fake"),
+                "choices": [{
+                    "index": 0,
+                    "delta": delta,
+                    "finish_reason": ("tool_calls" if tool_call else "stop") if last else None
+                }]
+            }
+
+
+class StandinServer:
+    """
+    Local stand-in for Groq, OpenWeatherMap and Google Maps
+
+    Args:
+        cassette: Cassette file (replayed, or written in record mode)
+        mode: "replay" or "record"
+        faults: {service: Faults}; the "*" entry applies to services not listed
+        strict: Replay only exact matches (unmatched requests get a 404)
+        upstreams: {service: base URL} overriding the real APIs in record mode
+        port: Port to listen on (0 picks a free one)
+        seed: Seed for jitter and injected failures (runs are repeatable)
+        groq: SyntheticGroq generating Groq answers (never recorded or replayed)
+    """
+
+    def __init__(self, cassette=DEFAULT_CASSETTE, mode: str = "replay", faults=None,
+                 strict: bool = False, upstreams=None, port: int = 0, seed: int = 0,
+                 groq: SyntheticGroq = None):
+        if mode not in ("replay", "record"):
+            raise ValueError(f"Unknown mode: {mode}")
+        self.cassette = Cassette(cassette)
+        self.mode = mode
+        self.groq = groq
+        self.faults = dict(faults or {})
+        self.strict = strict
+        self.upstreams = {name: upstream for name, (upstream, _) in SERVICES.items()}
+        self.upstreams.update(upstreams or {})
+
+        # Format: {service: {outcome: count}}
+        self.stats = {name: {} for name in SERVICES}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._closing = threading.Event()
+        self._session = requests.Session()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def config(self) -> dict:
+        """Config overrides that route the bot's upstream calls here"""
+        return {
+            "GROQ_BASE_URL": self.url,
+            "WEATHER_API_URL": f"{self.url}/data/2.5/weather",
+            "GOOGLE_MAPS_BASE_URL": self.url,
+        }
+
+    def _count(self, service: str, outcome: str):
+        with self._lock:
+            counts = self.stats[service]
+            counts[outcome] = counts.get(outcome, 0) + 1
+
+    def _plan(self, service: str):
+        """Pick (outcome, extra latency) for one request"""
+        faults = self.faults.get(service) or self.faults.get("*") or Faults()
+        with self._lock:
+            if faults.script:
+                outcome = faults.script.pop(0)
+            else:
+                roll = self._random.random()
+                if roll < faults.timeout_rate:
+                    outcome = "timeout"
+                elif roll < faults.timeout_rate + faults.rate_limit_rate:
+                    outcome = "429"
+                else:
+                    outcome = "ok"
+            jitter = self._random.uniform(0, faults.jitter) if faults.jitter else 0.0
+        return outcome, faults, jitter
+
+    def _forward(self, service: str, method: str, path: str, query: dict, raw: bytes, headers) -> dict:
+        """Send the request to the real API and record the response"""
+        started = time.monotonic()
+        response = self._session.request(
+            method, self.upstreams[service] + path, params=query, data=raw or None,
+            headers={h: headers[h] for h in FORWARD_HEADERS if headers.get(h)}, timeout=60
+        )
+        content_type = response.headers.get("Content-Type", "application/json")
+        interaction = {
+            "service": service,
+            "method": method,
+            "path": path,
+            "key": match_key(path, query, json.loads(raw) if raw else None),
+            "status": response.status_code,
+            "content_type": content_type,
+            "latency": round(time.monotonic() - started, 3),
+        }
+        if "json" in content_type:
+            interaction["body"] = response.json()
+        else:
+            interaction["body_text"] = response.text
+
+        # Failed upstream calls are passed through but not recorded
+        if response.status_code < 400:
+            self.cassette.add(interaction)
+            self.cassette.save()
+        return interaction
+
+    def _handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+            def _handle(self, method: str):
+                parts = urlsplit(self.path)
+                query = dict(parse_qsl(parts.query))
+                raw = self.rfile.read(int(self.headers.get("Content-Length", 0) or 0))
+                service = service_for(parts.path)
+                if service is None:
+                    return self._send(404, "application/json", {"error": f"Unknown path {parts.path}"})
+
+                outcome, faults, jitter = standin._plan(service)
+                standin._count(service, outcome)
+
+                if outcome == "timeout":
+                    # Hold the connection, then drop it without a response
+                    standin._closing.wait(faults.hang)
+                    self.close_connection = True
+                    return
+
+                if outcome == "429":
+                    standin._closing.wait((faults.latency or 0.0) + jitter)
+                    return self._send(429, "application/json", RATE_LIMIT_BODIES[service],
+                                      {"Retry-After": str(faults.retry_after)})
+
+                body = json.loads(raw) if raw else None
+                # Forwarded requests already took the real API's time
+                forwarded = False
+                try:
+                    if service == "groq" and standin.groq is not None:
+                        interaction = standin.groq.respond(body or {})
+                    elif standin.mode == "record":
+                        interaction = standin._forward(service, method, parts.path, query, raw, self.headers)
+                        forwarded = True
+                    else:
+                        interaction = standin.cassette.find(
+                            parts.path, match_key(parts.path, query, body), standin.strict
+                        )
+                        if interaction is None:
+                            standin._count(service, "unmatched")
+                            return self._send(404, "application/json", {"error": "No recorded interaction"})
+                except requests.RequestException as e:
+                    return self._send(502, "application/json", {"error": f"Upstream failed: {e}"})
+
+                if forwarded:
+                    delay = 0.0
+                else:
+                    delay = interaction.get("latency", 0.0) if faults.latency is None else faults.latency
+                # Cut short when the server shuts down
+                standin._closing.wait(delay + jitter)
+                body = interaction.get("body", interaction.get("body_text", ""))
+                self._send(interaction["status"], interaction["content_type"], body)
+
+            def _send(self, status: int, content_type: str, body, headers=None):
+                payload = (body if isinstance(body, str) else json.dumps(body, ensure_ascii=False)).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", content_type)
+                    self.send_header("Content-Length", str(len(payload)))
+                    for name, value in (headers or {}).items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    # Client gave up (timeout or losing hedge)
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._closing.set()
+        self._server.shutdown()
+        self._server.server_close()
+        self._session.close()
+
+
+class FakeGroqServer(StandinServer):
+    """
+    Groq-only stand-in with generated answers (no cassette needed): a
+    StandinServer whose Groq endpoint is served by a SyntheticGroq
+
+    Args:
+        delays, default_delay, reply, tool_call_rate, tool_calls, chunk_size:
+            See SyntheticGroq
+        jitter: Extra random latency, uniform in [0, jitter] seconds
+        seed: Seed for jitter and tool-call decisions (runs are repeatable)
+    """
+
+    def __init__(self, delays=None, default_delay: float = 0.0, reply: str = "Halo dari fake Groq!",
+                 jitter: float = 0.0, tool_call_rate: float = 0.0, tool_calls=None,
+                 chunk_size: int = 16, seed: int = 0):
+        super().__init__(
+            faults={"groq": Faults(jitter=jitter)},
+            seed=seed,
+            groq=SyntheticGroq(delays, default_delay, reply, tool_call_rate, tool_calls, chunk_size, seed)
+        )
+
+    @property
+    def requests(self):
+        """Request bodies received, in arrival order"""
+        return self.groq.requests
+
+    @property
+    def tool_calls_sent(self) -> int:
+        return self.groq.tool_calls_sent
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record/replay stand-in for Groq, OpenWeatherMap and Google Maps")
+    parser.add_argument("--cassette", default=str(DEFAULT_CASSETTE))
+    parser.add_argument("--mode", choices=["replay", "record"], default="replay")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=None, help="Fixed latency (s); default replays recorded latency")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of requests answered with 429")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="Share of requests that never answer")
+    parser.add_argument("--strict", action="store_true", help="Replay exact matches only")
+    args = parser.parse_args()
+
+    faults = {"*": Faults(latency=args.latency, jitter=args.jitter, rate_limit_rate=args.rate_limit_rate,
+                          timeout_rate=args.timeout_rate)}
+    with StandinServer(args.cassette, args.mode, faults, args.strict, port=args.port) as server:
+        print(f"Stand-in server ({args.mode}) on {server.url}, cassette {args.cassette}")
+        print("Point the bot at it with:")
+        for name, value in server.config().items():
+            print(f"  export {name}={value}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
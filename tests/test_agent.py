@@ -1,6 +1,12 @@
+import asyncio
+import json
+import time
 import pytest
 from unittest.mock import Mock, patch, MagicMock
-from src.agent.agent_core import FoodieAgent
+from src.agent.agent_core import FoodieAgent, TIMEOUT_REPLY
+from src.agent.context import SUMMARY_PROMPT, message_tokens
+from src.agent.intent_router import IntentRouter
+from src.config import Config
 from src.agent.tools import execute_tool, calculate_calories
 
 class TestFoodieAgent:
@@ -21,7 +27,8 @@ class TestFoodieAgent:
         assert isinstance(agent.user_preferences, dict)
         print("✅ Test 1 passed: Agent initialization")
     
-    def test_new_user_conversation(self, agent):
+    @pytest.mark.asyncio
+    async def test_new_user_conversation(self, agent):
         """Test 2: New user gets empty conversation history"""
         user_id = "test_user_123"
         
@@ -34,7 +41,7 @@ class TestFoodieAgent:
             "tool_calls": None,
             "role": "assistant"
         }):
-            response = agent.process_message(user_id, "testuser", "Halo")
+            response = await agent.process_message(user_id, "testuser", "Halo")
             
             # After first message
             assert user_id in agent.conversations
@@ -42,7 +49,8 @@ class TestFoodieAgent:
             assert response is not None
             print("✅ Test 2 passed: New user conversation")
     
-    def test_conversation_memory(self, agent):
+    @pytest.mark.asyncio
+    async def test_conversation_memory(self, agent):
         """Test 3: Agent remembers previous conversation"""
         user_id = "test_user_456"
         
@@ -54,11 +62,11 @@ class TestFoodieAgent:
             }
             
             # First message
-            agent.process_message(user_id, "testuser", "Aku suka nasi goreng")
+            await agent.process_message(user_id, "testuser", "Aku suka nasi goreng")
             assert len(agent.conversations[user_id]) == 2
             
             # Second message
-            agent.process_message(user_id, "testuser", "Ada rekomendasi lain?")
+            await agent.process_message(user_id, "testuser", "Ada rekomendasi lain?")
             assert len(agent.conversations[user_id]) == 4
             
             # Check that history is passed to LLM
@@ -67,7 +75,8 @@ class TestFoodieAgent:
             assert len(second_call_messages) > 2  # system + history
             print("✅ Test 3 passed: Conversation memory")
     
-    def test_reset_conversation(self, agent):
+    @pytest.mark.asyncio
+    async def test_reset_conversation(self, agent):
         """Test 4: Conversation reset works correctly"""
         user_id = "test_user_789"
         
@@ -80,7 +89,7 @@ class TestFoodieAgent:
         assert len(agent.conversations[user_id]) == 2
         
         # Reset
-        response = agent.reset_conversation(user_id)
+        response = await agent.reset_conversation(user_id)
         
         assert len(agent.conversations[user_id]) == 0
         assert "reset" in response.lower()
@@ -126,12 +135,281 @@ class TestFoodieAgent:
         
         print("✅ Test 6 passed: Tool execution")
     
-    def test_error_handling(self, agent):
+    @pytest.mark.asyncio
+    async def test_error_handling(self, agent):
         """Test 7: Agent handles errors gracefully"""
         with patch.object(agent.llm, 'chat', side_effect=Exception("API Error")):
-            response = agent.process_message("error_user", "testuser", "Test message")
+            response = await agent.process_message("error_user", "testuser", "Test message")
             
             # Should return error message, not crash
             assert response is not None
             assert "kesalahan" in response.lower() or "error" in response.lower()
-            print("✅ Test 7 passed: Error handling")
\ No newline at end of file
+            print("✅ Test 7 passed: Error handling")
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_users(self, agent):
+        """Test 8: Slow LLM calls for different users run concurrently"""
+        async def slow_chat(messages, tools=None, **kwargs):
+            await asyncio.sleep(0.2)
+            return {"content": "Response", "tool_calls": None, "role": "assistant"}
+        
+        with patch.object(agent.llm, 'chat', side_effect=slow_chat):
+            start = time.perf_counter()
+            responses = await asyncio.gather(*[
+                agent.process_message(f"user_{i}", "testuser", "Halo")
+                for i in range(5)
+            ])
+            elapsed = time.perf_counter() - start
+        
+        assert responses == ["Response"] * 5
+        assert elapsed < 0.5  # 5 x 0.2s would be 1s if serialized
+        print("✅ Test 8 passed: Concurrent users")
+    
+    @pytest.mark.asyncio
+    async def test_streaming_with_tool_calls(self, agent):
+        """Test 9: Streaming runs tools between LLM calls and yields only text"""
+        tool_call = MagicMock()
+        tool_call.id = "call_1"
+        tool_call.function.name = "calculate_calories"
+        tool_call.function.arguments = '{"food_name": "bakso"}'
+        
+        async def fake_stream(messages, tools=None, **kwargs):
+            if messages[-1]["role"] == "user":
+                yield {"tool_calls": [tool_call]}
+            else:
+                assert messages[-1]["role"] == "tool"
+                yield {"content": "Bakso sekitar "}
+                yield {"content": "350 kalori 🍜"}
+        
+        # LLM path (fast path off): tools run between the streamed calls
+        with patch.object(agent.llm, 'chat_stream', side_effect=fake_stream), \
+             patch.object(agent, 'router', None):
+            chunks = [c async for c in agent.process_message_stream("stream_user", "testuser", "Kalori bakso?")]
+        
+        assert "".join(chunks) == "Bakso sekitar 350 kalori 🍜"
+        assert agent.conversations["stream_user"][-1]["content"] == "Bakso sekitar 350 kalori 🍜"
+        
+        # Fast path: the same question is answered from the tool without streaming from the LLM
+        with patch.object(agent.llm, 'chat_stream', side_effect=AssertionError("LLM called")):
+            chunks = [c async for c in agent.process_message_stream("stream_user", "testuser", "Kalori bakso?")]
+        
+        assert len(chunks) == 1 and "bakso" in chunks[0].lower()
+        assert agent.conversations["stream_user"][-1]["content"] == chunks[0]
+        print("✅ Test 9 passed: Streaming with tool calls")
+    
+    @pytest.mark.asyncio
+    async def test_parallel_tool_calls(self, agent):
+        """Test 10: Tool calls in one turn run concurrently, keep order and isolate failures"""
+        def make_call(call_id, name, arguments):
+            tool_call = MagicMock()
+            tool_call.id = call_id
+            tool_call.function.name = name
+            tool_call.function.arguments = arguments
+            return tool_call
+        
+        tool_calls = [
+            make_call("call_1", "get_weather", '{"location": "Jakarta"}'),
+            make_call("call_2", "search_nearby_restaurants", '{"location": "Jakarta"}'),
+            make_call("call_3", "calculate_calories", 'not json'),
+        ]
+        
+        async def slow_tool(name, arguments):
+            await asyncio.sleep(0.2)
+            return {"success": True, "tool": name}
+        
+        messages = []
+        with patch("src.agent.agent_core.execute_tool_async", side_effect=slow_tool):
+            start = time.perf_counter()
+            await agent._run_tool_calls(tool_calls, None, messages, "tool_user")
+            elapsed = time.perf_counter() - start
+        
+        results = messages[1:]
+        assert elapsed < 0.35  # 2 x 0.2s would be 0.4s if serialized
+        assert [r["tool_call_id"] for r in results] == ["call_1", "call_2", "call_3"]
+        assert '"tool": "get_weather"' in results[0]["content"]
+        assert '"success": false' in results[2]["content"]
+        print("✅ Test 10 passed: Parallel tool calls")
+    
+    @pytest.mark.asyncio
+    async def test_multi_round_tool_loop(self, agent):
+        """Test 11: The model can chain several rounds of tool calls"""
+        def make_call(call_id, name):
+            tool_call = MagicMock()
+            tool_call.id = call_id
+            tool_call.function.name = name
+            tool_call.function.arguments = '{"location": "Jakarta"}'
+            return tool_call
+        
+        responses = [
+            {"content": None, "tool_calls": [make_call("call_1", "get_weather")], "role": "assistant"},
+            {"content": None, "tool_calls": [make_call("call_2", "search_nearby_restaurants")], "role": "assistant"},
+            {"content": "Lagi hujan, coba **Bakso A** 🍜", "tool_calls": None, "role": "assistant"},
+        ]
+        
+        with patch.object(agent.llm, 'chat', side_effect=responses) as mock_chat, \
+             patch("src.agent.agent_core.execute_tool_async", return_value={"success": True}):
+            response = await agent.process_message("loop_user", "testuser", "Hujan, makan di mana?")
+        
+        assert response == "Lagi hujan, coba **Bakso A** 🍜"
+        assert mock_chat.call_count == 3
+        final_messages = mock_chat.call_args_list[2][0][0]
+        assert [m["role"] for m in final_messages[-4:]] == ["assistant", "tool", "assistant", "tool"]
+        print("✅ Test 11 passed: Multi-round tool loop")
+    
+    @pytest.mark.asyncio
+    async def test_response_deadline(self, agent):
+        """Test 12: A slow LLM call or fast-path lookup is cut off at RESPONSE_TIMEOUT"""
+        async def hanging_chat(messages, tools=None, **kwargs):
+            await asyncio.sleep(5)
+        
+        with patch.object(agent.llm, 'chat', side_effect=hanging_chat), \
+             patch.object(Config, 'RESPONSE_TIMEOUT', 0.1):
+            start = time.perf_counter()
+            response = await agent.process_message("slow_user", "testuser", "Halo")
+            elapsed = time.perf_counter() - start
+        
+        assert elapsed < 1
+        assert response == TIMEOUT_REPLY
+        
+        # A slow fast-path lookup is bounded by the same deadline
+        async def hanging_tool(name, arguments):
+            await asyncio.sleep(5)
+        
+        with patch("src.agent.intent_router.execute_tool_async", side_effect=hanging_tool), \
+             patch.object(Config, 'RESPONSE_TIMEOUT', 0.1):
+            start = time.perf_counter()
+            chunks = [c async for c in agent.process_message_stream("slow_user", "testuser", "Kalori bakso?")]
+            elapsed = time.perf_counter() - start
+        
+        assert elapsed < 1
+        assert chunks == [TIMEOUT_REPLY]
+        print("✅ Test 12 passed: Response deadline")
+    
+    @pytest.mark.asyncio
+    async def test_token_budget_summarization(self, agent):
+        """Test 13: Old turns beyond the token budget are folded into a summary"""
+        user_id = "long_chat_user"
+        
+        async def fake_chat(messages, tools=None, **kwargs):
+            if messages[0]["content"] == SUMMARY_PROMPT:
+                return {"content": "User suka pedas, tinggal di Bandung.", "tool_calls": None, "role": "assistant"}
+            return {"content": "Oke! " + "x" * 200, "tool_calls": None, "role": "assistant"}
+        
+        with patch.object(agent.llm, 'chat', side_effect=fake_chat) as mock_chat, \
+             patch.object(Config, 'CONTEXT_TOKEN_BUDGET', 150):
+            for i in range(4):
+                await agent.process_message(user_id, "testuser", f"Pesan panjang {i} " + "y" * 200)
+                await asyncio.sleep(0)
+            
+            await asyncio.gather(*agent.context._tasks)
+            await agent.process_message(user_id, "testuser", "Rekomendasi?")
+        
+        reply_calls = [c[0][0] for c in mock_chat.call_args_list if c[0][0][0]["content"] != SUMMARY_PROMPT]
+        last_messages = reply_calls[-1]
+        assert agent.context.summaries[user_id] == "User suka pedas, tinggal di Bandung."
+        assert "User suka pedas" in last_messages[2]["content"]
+        assert sum(message_tokens(m) for m in last_messages[2:]) <= 150
+        assert len(agent.conversations[user_id]) < 10
+        print("✅ Test 13 passed: Token budget summarization")
+    
+    @pytest.mark.asyncio
+    async def test_stable_prompt_prefix(self, agent):
+        """Test 14: Requests share a byte-stable prefix and caller lists are not mutated"""
+        with patch.object(agent.llm.client.chat.completions, 'create') as mock_create:
+            mock_create.side_effect = Exception("offline")
+            
+            first = agent.prompt.build([{"role": "user", "content": "Halo"}])
+            second = agent.prompt.build([{"role": "user", "content": "Cuaca?"}])
+            snapshot = [dict(m) for m in first]
+            
+            await agent.llm.chat(first, tools=agent.tools)
+            await agent.llm.chat(second, tools=agent.tools)
+        
+        sent_first, sent_second = [c.kwargs for c in mock_create.call_args_list]
+        assert first == snapshot
+        assert sent_first["messages"][0] == sent_second["messages"][0]
+        assert sent_first["messages"][0]["content"] == agent.system_prompt
+        assert json.dumps(sent_first["tools"]) == json.dumps(sent_second["tools"])
+        print("✅ Test 14 passed: Stable prompt prefix")
+    
+    @pytest.mark.asyncio
+    async def test_intent_fast_path(self, agent):
+        """Test 15: Simple requests are answered from tools without calling the LLM"""
+        weather = {
+            "success": True, "location": "Bandung", "temperature": 22, "feels_like": 22,
+            "humidity": 80, "description": "hujan ringan", "food_context": "hujan - cocok untuk makanan hangat berkuah"
+        }
+        
+        with patch.object(agent.llm, 'chat', side_effect=AssertionError("LLM called")), \
+             patch("src.agent.intent_router.execute_tool_async", side_effect=[
+                 calculate_calories("nasi goreng", "large"), weather
+             ]):
+            calories = await agent.process_message("fast_user", "testuser", "Kalori nasi goreng porsi besar berapa?")
+            chunks = [c async for c in agent.process_message_stream("fast_user", "testuser", "Bagaimana cuaca di Bandung?")]
+        
+        assert "630 kkal" in calories
+        assert "Bandung" in "".join(chunks) and "22°C" in "".join(chunks)
+        assert len(agent.conversations["fast_user"]) == 4
+        
+        stats = agent.router.get_stats()
+        assert stats["fast_path"] == 2 and stats["hit_rate"] == 1.0
+        assert stats["by_intent"] == {"calculate_calories": 1, "get_weather": 1}
+        print("✅ Test 15 passed: Intent fast path")
+    
+    @pytest.mark.asyncio
+    async def test_intent_router_fallback(self):
+        """Test 16: Ambiguous, multi-part or uncertain requests go to the LLM"""
+        router = IntentRouter()
+        
+        assert router.match("sarapan enaknya apa ya")[1] == {"time_of_day": "breakfast"}
+        assert router.match("ide makan malam dong, lagi sedih")[1] == {"time_of_day": "dinner", "mood": "sad"}
+        assert router.match("cuaca hari ini di Bandung")[1] == {"location": "bandung"}
+        
+        # No place given: the saved location, else the default one
+        assert router.match("cuaca hari ini", "Surabaya")[1] == {"location": "Surabaya"}
+        assert router.match("Gimana cuaca sekarang?")[1] == {"location": Config.DEFAULT_LOCATION}
+        
+        # Forecasts, personal phrasing and questions that only mention a keyword
+        for message in [
+            "cuaca besok di bandung", "cuaca nanti malam", "cuaca minggu depan",
+            "cuaca enak buat makan apa", "cek cuaca kota aku",
+            "tadi sarapan apa ya aku lupa", "kemarin makan malam apa ya",
+            "kalorinya banyak ga", "berapa kalori yang aku butuhkan sehari",
+        ]:
+            assert router.match(message) is None, message
+        assert router.match("Rekomendasi makan siang di Bandung budget 30rb?") is None
+        assert router.match("kalori nasi goreng dan es teh?") is None
+        assert router.match("Halo, apa kabar?") is None
+        
+        # Category guesses (not in the database) are left to the LLM
+        assert await router.route("kalori nasi pelangi berapa?") is None
+        assert router.get_stats()["fallbacks"] == 1
+        print("✅ Test 16 passed: Intent router fallback")
+    
+    @pytest.mark.asyncio
+    async def test_failed_summary_keeps_history(self, agent):
+        """Test 17: Turns are only dropped once their summary is stored; a failed summary is retried"""
+        user_id = "flaky_summary_user"
+        agent.conversations[user_id] = [
+            {"role": "user" if i % 2 == 0 else "assistant", "content": f"Pesan {i} " + "y" * 200}
+            for i in range(6)
+        ]
+        history = agent.conversations[user_id]
+        results = [
+            {"error": "Groq unavailable", "content": "Maaf, terjadi kesalahan."},
+            {"content": "User suka pedas.", "tool_calls": None, "role": "assistant"}
+        ]
+        
+        with patch.object(agent.llm, 'chat', side_effect=results), \
+             patch.object(Config, 'CONTEXT_TOKEN_BUDGET', 150):
+            agent.context.build(user_id, history)
+            await asyncio.gather(*agent.context._tasks)
+            assert len(history) == 6
+            assert user_id not in agent.context.summaries
+            
+            agent.context.build(user_id, history)
+            await asyncio.gather(*agent.context._tasks)
+        
+        assert agent.context.summaries[user_id] == "User suka pedas."
+        assert len(history) < 6
+        print("✅ Test 17 passed: Failed summary keeps history")
@@ -0,0 +1,208 @@
+import asyncio
+import sqlite3
+import time
+import pytest
+from unittest.mock import patch
+from src.agent.agent_core import FoodieAgent
+from src.agent.conversation_store import ConversationStore
+from src.agent.history import History, Turn, to_api_messages
+from src.agent.storage import SQLiteStorage
+
+class TestConversationStore:
+    """Test cases for ConversationStore"""
+
+    def test_lru_eviction(self):
+        """Test 1: Least recently used user is evicted past max_users"""
+        evicted = []
+        store = ConversationStore(max_users=2, idle_ttl=60, on_evict=evicted.append)
+
+        store["a"] = []
+        store["b"] = []
+        store["a"].append({"role": "user", "content": "Halo"})
+        store["c"] = []
+
+        assert list(store) == ["a", "c"]
+        assert evicted == ["b"]
+        assert store.get_stats()["evicted"] == 1
+        print("✅ Test 1 passed: LRU eviction")
+
+    def test_idle_sweep(self):
+        """Test 2: Idle users are swept and no longer count as active"""
+        store = ConversationStore(max_users=10, idle_ttl=0.05)
+        store["idle"] = []
+        time.sleep(0.06)
+        store["recent"] = []
+
+        assert store.active_count() == 1
+        assert store.sweep() == 1
+        assert "idle" not in store
+        assert "recent" in store
+        print("✅ Test 2 passed: Idle sweep")
+
+    @pytest.mark.asyncio
+    async def test_background_sweeper(self):
+        """Test 3: The background sweeper expires idle users"""
+        store = ConversationStore(max_users=10, idle_ttl=0.01)
+        store["idle"] = []
+
+        store.start_sweeper(interval=0.02)
+        await asyncio.sleep(0.1)
+        store.stop_sweeper()
+
+        assert len(store) == 0
+        assert store.get_stats()["expired"] == 1
+        print("✅ Test 3 passed: Background sweeper")
+
+    def test_dict_methods_keep_bookkeeping(self):
+        """Test 4: pop, popitem, clear and setdefault keep access times and coercion in sync"""
+        store = ConversationStore(max_users=10, idle_ttl=60, coerce=lambda messages: History(4, messages))
+        for key in ("a", "b", "c", "d"):
+            store[key] = []
+
+        assert len(store.pop("a")) == 0 and store.pop("missing", None) is None
+        assert store.popitem()[0] == "d"
+        assert store.active_count() == 2
+
+        assert isinstance(store.setdefault("e", []), History)
+        assert store.setdefault("e", None) is store["e"]
+        assert store.active_count() == 3
+
+        store.clear()
+        assert store.active_count() == 0 and store.sweep() == 0
+        with pytest.raises(KeyError):
+            store.pop("a")
+        print("✅ Test 4 passed: Dict methods keep bookkeeping")
+
+
+class TestSQLiteStorage:
+    """Test cases for the durable SQLite backend"""
+
+    @pytest.mark.asyncio
+    async def test_write_behind_and_lazy_load(self, tmp_path):
+        """Test 5: Replies don't write to disk; history is restored lazily after restart"""
+        path = str(tmp_path / "foodiebot.db")
+        agent = FoodieAgent(storage=SQLiteStorage(path, flush_interval=60))
+
+        with patch.object(agent.llm, 'chat', return_value={
+            "content": "Coba soto ayam 🍲", "tool_calls": None, "role": "assistant"
+        }):
+            await agent.process_message("durable_user", "testuser", "Makan apa ya?")
+
+        # Nothing on disk yet: the write is queued, not done on the response path
+        reader = sqlite3.connect(path)
+        assert reader.execute("SELECT COUNT(*) FROM messages").fetchone()[0] == 0
+
+        await agent.set_user_preference("durable_user", "location", "Bandung")
+        await agent.close()
+        assert reader.execute("SELECT COUNT(*) FROM messages").fetchone()[0] == 2
+
+        # "Restart": a new agent loads the user only when they show up
+        restarted = FoodieAgent(storage=SQLiteStorage(path))
+        assert "durable_user" not in restarted.conversations
+
+        with patch.object(restarted.llm, 'chat', return_value={
+            "content": "Siap!", "tool_calls": None, "role": "assistant"
+        }) as mock_chat:
+            await restarted.process_message("durable_user", "testuser", "Yang lain?")
+
+        sent = mock_chat.call_args[0][0]
+        assert [m["content"] for m in sent[2:]] == ["Makan apa ya?", "Coba soto ayam 🍲", "Yang lain?"]
+        assert await restarted.get_user_preferences("durable_user") == {"location": "Bandung"}
+        await restarted.close()
+        print("✅ Test 5 passed: Write-behind and lazy load")
+
+    @pytest.mark.asyncio
+    async def test_background_flush(self, tmp_path):
+        """Test 6: The background flusher writes batches without an explicit flush"""
+        storage = SQLiteStorage(str(tmp_path / "foodiebot.db"), flush_interval=0.02)
+        storage.start()
+
+        storage.append_message("user_a", {"role": "user", "content": "Halo"})
+        storage.clear_conversation("user_b")
+        await asyncio.sleep(0.1)
+
+        assert storage.rows_written == 2
+        assert storage.load_conversation("user_a", 10) == [{"role": "user", "content": "Halo"}]
+        await storage.close()
+        print("✅ Test 6 passed: Background flush")
+
+    @pytest.mark.asyncio
+    async def test_summary_survives_restart_and_reset(self, tmp_path):
+        """Test 7: Rolling summaries are persisted; reset only reports success when there is history"""
+        path = str(tmp_path / "foodiebot.db")
+        agent = FoodieAgent(storage=SQLiteStorage(path, flush_interval=60))
+        agent.conversations["summarized_user"] = [{"role": "user", "content": "Aku di Bandung"}]
+        agent.context.on_summary("summarized_user", "User tinggal di Bandung.", 0)
+        agent.storage.append_message("summarized_user", {"role": "user", "content": "Aku di Bandung"})
+        await agent.close()
+
+        restarted = FoodieAgent(storage=SQLiteStorage(path))
+        assert "Belum ada" in await restarted.reset_conversation("unknown_user")
+
+        await restarted._load_conversation("summarized_user")
+        assert restarted.context.summaries["summarized_user"] == "User tinggal di Bandung."
+        assert "reset" in (await restarted.reset_conversation("summarized_user")).lower()
+        await restarted.close()
+
+        again = FoodieAgent(storage=SQLiteStorage(path))
+        assert "Belum ada" in await again.reset_conversation("summarized_user")
+        await again.close()
+        print("✅ Test 7 passed: Summary survives restart; reset reports accurately")
+
+    @pytest.mark.asyncio
+    async def test_folded_messages_not_restored(self, tmp_path):
+        """Test 8: Messages folded into the summary are not loaded again after a restart"""
+        path = str(tmp_path / "foodiebot.db")
+        agent = FoodieAgent(storage=SQLiteStorage(path, flush_interval=60))
+        agent.context._token_budget = 24
+        for i in range(4):
+            history = agent._record_user_turn("folded_user", f"MSG{i * 2}")
+            agent._finish_turn("folded_user", history, f"MSG{i * 2 + 1}")
+
+        async def fake_chat(messages, **kwargs):
+            return {"content": "Ringkasan MSG0-MSG3"}
+
+        with patch.object(agent.llm, "chat", side_effect=fake_chat):
+            agent.context.build("folded_user", history)
+            await asyncio.gather(*agent.context._tasks)
+        assert [m["content"] for m in history] == ["MSG4", "MSG5", "MSG6", "MSG7"]
+        await agent.close()
+
+        restarted = FoodieAgent(storage=SQLiteStorage(path))
+        await restarted._load_conversation("folded_user")
+        assert restarted.context.summaries["folded_user"] == "Ringkasan MSG0-MSG3"
+        assert [m["content"] for m in restarted.conversations["folded_user"]] == ["MSG4", "MSG5", "MSG6", "MSG7"]
+        await restarted.close()
+        print("✅ Test 8 passed: Folded messages are pruned from storage")
+
+
+class TestHistory:
+    """Test cases for the compact History ring buffer"""
+
+    def test_ring_buffer_overwrites_oldest(self):
+        """Test 9: Appending past capacity keeps the newest turns in order"""
+        history = History(3)
+        for i in range(5):
+            history.append({"role": "user" if i % 2 == 0 else "assistant", "content": f"m{i}"})
+
+        assert len(history) == 3
+        assert [t["content"] for t in history] == ["m2", "m3", "m4"]
+        assert history[0].content == "m2"
+        assert history[-1].content == "m4"
+
+        del history[:2]
+        assert history.to_messages() == [{"role": "user", "content": "m4"}]
+        print("✅ Test 9 passed: Ring buffer overwrites oldest")
+
+    def test_turns_are_compact(self):
+        """Test 10: Turns are slotted with interned roles and convert at the API boundary"""
+        a = Turn("assistant", "Halo")
+        b = Turn("".join(["assist", "ant"]), "Hai")
+
+        assert not hasattr(a, "__dict__")
+        assert a.role is b.role
+        assert to_api_messages([{"role": "system", "content": "s"}, a]) == [
+            {"role": "system", "content": "s"},
+            {"role": "assistant", "content": "Halo"}
+        ]
+        print("✅ Test 10 passed: Turns are compact")
@@ -0,0 +1,92 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from src.integrations.streaming import StreamingReply
+
+def make_message():
+    """Fake discord.Message whose reply/send return editable messages"""
+    message = MagicMock()
+    message.reply = AsyncMock(side_effect=lambda content: MagicMock(content=content, edit=AsyncMock(), delete=AsyncMock()))
+    message.channel.send = AsyncMock(side_effect=lambda content: MagicMock(content=content, edit=AsyncMock(), delete=AsyncMock()))
+    return message
+
+class TestStreamingReply:
+    """Test cases for StreamingReply"""
+
+    @pytest.mark.asyncio
+    async def test_first_chunk_posts_immediately(self):
+        """Test 1: First visible text is posted right away, later edits are throttled"""
+        message = make_message()
+        reply = StreamingReply(message, edit_interval=60)
+
+        await reply.feed("Halo")
+        await reply.feed(" juga")
+
+        message.reply.assert_awaited_once_with("Halo")
+        reply.sent[0].edit.assert_not_awaited()
+        assert reply.first_visible_latency is not None
+
+        await reply.finish()
+        reply.sent[0].edit.assert_awaited_once_with(content="Halo juga")
+        print("✅ Test 1 passed: First chunk posts immediately")
+
+    @pytest.mark.asyncio
+    async def test_rollover_past_limit(self):
+        """Test 2: Text past the message limit rolls over to new messages"""
+        message = make_message()
+        reply = StreamingReply(message, edit_interval=0, limit=10)
+
+        await reply.feed("a" * 8)
+        await reply.feed("b" * 8)
+        await reply.finish()
+
+        assert len(reply.sent) == 2
+        reply.sent[0].edit.assert_awaited_with(content="aaaaaaaabb")
+        message.channel.send.assert_awaited_once_with("bbbbbb")
+        print("✅ Test 2 passed: Rollover past limit")
+
+    @pytest.mark.asyncio
+    async def test_fallback_when_empty(self):
+        """Test 3: Fallback is sent when the stream produced no visible text"""
+        message = make_message()
+        reply = StreamingReply(message)
+
+        await reply.feed('<function=get_weather>{}</function>')
+        await reply.finish(fallback="fallback")
+
+        message.reply.assert_awaited_once_with("fallback")
+        print("✅ Test 3 passed: Fallback when empty")
+
+    @pytest.mark.asyncio
+    async def test_open_function_tag_is_held_back(self):
+        """Test 4: A function tag is never shown while it streams in, even split across chunks"""
+        message = make_message()
+        reply = StreamingReply(message, edit_interval=0)
+
+        for chunk in ["Cek dulu ya <fun", "ction=get_weather>{\"location\": ", "\"Bandung\"}</func", "tion> Bandung hujan!"]:
+            await reply.feed(chunk)
+        await reply.finish()
+
+        shown = [call.args[0] for call in message.reply.await_args_list]
+        shown += [call.kwargs["content"] for call in reply.sent[0].edit.await_args_list]
+        assert shown[0] == "Cek dulu ya"
+        assert all("<" not in text and "location" not in text for text in shown)
+        assert reply._rendered == ["Cek dulu ya  Bandung hujan!"]
+        print("✅ Test 4 passed: Open function tag is held back")
+
+    @pytest.mark.asyncio
+    async def test_surplus_pages_are_deleted(self):
+        """Test 5: Pages left over after the sanitized text shrinks are deleted"""
+        message = make_message()
+        reply = StreamingReply(message, edit_interval=0, limit=10)
+
+        await reply.feed("a" * 8 + '{"location": "Band')
+        assert len(reply.sent) == 3
+        extra = reply.sent[1:]
+
+        await reply.feed('ung"}')
+        await reply.finish()
+
+        assert len(reply.sent) == 1 and reply._rendered == ["a" * 8]
+        for page in extra:
+            page.delete.assert_awaited_once()
+        print("✅ Test 5 passed: Surplus pages are deleted")
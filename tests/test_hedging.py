@@ -0,0 +1,51 @@
+import time
+import pytest
+from standins import FakeGroqServer
+from unittest.mock import patch
+from src.agent.llm_client import GroqClient
+from src.config import Config
+
+MESSAGES = [{"role": "user", "content": "Halo"}]
+
+
+class TestHedgedRequests:
+    """Test cases for hedged and deadline-bounded Groq calls (local fake server)"""
+
+    @pytest.mark.asyncio
+    async def test_hedge_beats_slow_request(self):
+        """Test 1: A request slower than the hedge threshold is duplicated and the fast copy wins"""
+        with FakeGroqServer(delays=[2.0, 0.0]) as server:
+            client = GroqClient(base_url=server.url)
+            client.hedging = True
+            client.hedge_delay = 0.2
+
+            start = time.monotonic()
+            with patch.object(client.limiter, "release", wraps=client.limiter.release) as release:
+                response = await client.chat(MESSAGES)
+            elapsed = time.monotonic() - start
+
+        assert response["content"] == "Halo dari fake Groq!" and "error" not in response
+        assert elapsed < 1.0
+        assert len(server.requests) == 2
+        assert client.hedges_sent == 1 and client.hedges_won == 1
+        # The losing copy's TPM reservation is given back
+        release.assert_called_once()
+        assert release.call_args.args[0] > 0
+        print("✅ Test 1 passed: Hedge beats slow request")
+
+    @pytest.mark.asyncio
+    async def test_every_call_has_hard_timeout(self):
+        """Test 2: A hung completion is cut off at GROQ_REQUEST_TIMEOUT instead of hanging the turn"""
+        with FakeGroqServer(default_delay=3.0) as server, \
+             patch.object(Config, "GROQ_REQUEST_TIMEOUT", 0.3):
+            client = GroqClient(base_url=server.url)
+            client.max_retries = 0
+
+            start = time.monotonic()
+            response = await client.chat(MESSAGES)
+            elapsed = time.monotonic() - start
+
+        assert "error" in response
+        assert elapsed < 1.0
+        assert client.get_stats()["hedging"]["timeouts"] == 1
+        print("✅ Test 2 passed: Every call has hard timeout")
@@ -0,0 +1,98 @@
+import json
+import logging
+import pytest
+from logging.handlers import QueueHandler
+from unittest.mock import patch
+from src.config import Config
+from src.utils.logger import bind_request, log_stage, setup_logger, stage_durations, stop_logging
+
+
+@pytest.fixture
+def log_config(tmp_path):
+    """Point the file log at a temp dir and restore the root logger afterwards"""
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+    log_file = tmp_path / "foodiebot.log"
+
+    with patch.object(Config, "LOG_FILE", str(log_file)), \
+         patch.object(Config, "LOG_LEVEL", "INFO"):
+        yield log_file
+
+    stop_logging()
+    root.handlers[:] = saved_handlers
+    root.setLevel(saved_level)
+
+
+class TestLogger:
+    """Test cases for the queued logging pipeline"""
+
+    def test_json_lines_carry_request_context(self, log_config):
+        """Test 1: Root logger only queues; JSON lines carry request/user id and stages"""
+        with patch.object(Config, "LOG_FORMAT", "json"):
+            root = setup_logger()
+
+        assert len(root.handlers) == 1 and isinstance(root.handlers[0], QueueHandler)
+
+        request_id = bind_request("user-42")
+        with log_stage("llm"):
+            pass
+        logging.getLogger("test").info("Reply sent to %s", "user-42", extra={"stages": stage_durations()})
+        stop_logging()
+
+        entries = [json.loads(line) for line in log_config.read_text(encoding="utf-8").splitlines()]
+        entry = entries[-1]
+        assert entry["message"] == "Reply sent to user-42"
+        assert entry["request_id"] == request_id and entry["user_id"] == "user-42"
+        assert "llm" in entry["stages_ms"]
+        print("✅ Test 1 passed: JSON lines carry request context")
+
+    def test_json_lines_keep_tracebacks_separate(self, log_config):
+        """Test 2: Tracebacks reach the listener's formatters and land in the "exc" field"""
+        with patch.object(Config, "LOG_FORMAT", "json"):
+            setup_logger()
+
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logging.getLogger("test").exception("Tool %s failed", "get_weather")
+        stop_logging()
+
+        lines = log_config.read_text(encoding="utf-8").splitlines()
+        entry = json.loads(lines[-1])
+        assert entry["message"] == "Tool get_weather failed"
+        assert entry["exc"].startswith("Traceback") and "ValueError: boom" in entry["exc"]
+        print("✅ Test 2 passed: JSON lines keep tracebacks separate")
+
+    def test_log_file_rotates(self, log_config):
+        """Test 3: The log file is rotated at LOG_MAX_BYTES"""
+        with patch.object(Config, "LOG_MAX_BYTES", 2000), \
+             patch.object(Config, "LOG_BACKUP_COUNT", 2):
+            setup_logger()
+
+        for i in range(200):
+            logging.getLogger("test").info("Filler line %s", i)
+        stop_logging()
+
+        files = sorted(p.name for p in log_config.parent.iterdir())
+        assert files == ["foodiebot.log", "foodiebot.log.1", "foodiebot.log.2"]
+        assert log_config.stat().st_size <= 2000
+        print("✅ Test 3 passed: Log file rotates")
+
+    def test_disabled_levels_are_not_formatted(self, log_config):
+        """Test 4: Arguments of disabled log calls are never formatted"""
+        setup_logger()
+
+        class Expensive:
+            calls = 0
+
+            def __str__(self):
+                Expensive.calls += 1
+                return "expensive"
+
+        logging.getLogger("test").debug("Payload: %s", Expensive())
+        logging.getLogger("test").info("Payload: %s", Expensive())
+        stop_logging()
+
+        assert Expensive.calls == 1
+        assert "Payload: expensive" in log_config.read_text(encoding="utf-8")
+        print("✅ Test 4 passed: Disabled levels are not formatted")
@@ -0,0 +1,59 @@
+import urllib.error
+import urllib.request
+import pytest
+from src.agent.tools import execute_tool, weather_cache
+from src.utils.metrics import MetricsRegistry, start_metrics_server, tool_latency
+
+
+class TestMetrics:
+    """Test cases for the metrics registry and /metrics endpoint"""
+
+    def test_prometheus_text_format(self):
+        """Test 1: Counters, gauges and histograms render in the Prometheus text format"""
+        registry = MetricsRegistry()
+        errors = registry.counter("app_errors_total", "Errors", ["component"])
+        depth = registry.gauge("app_queue_depth", "Queue depth")
+        latency = registry.histogram("app_latency_seconds", "Latency", ["tool"], buckets=(0.1, 1.0))
+
+        errors.inc(component="llm")
+        errors.inc(2, component="llm")
+        depth.set_function(lambda: 7)
+        for value in (0.05, 0.5, 3.0):
+            latency.observe(value, tool="get_weather")
+
+        text = registry.render()
+        assert "# TYPE app_errors_total counter" in text
+        assert 'app_errors_total{component="llm"} 3' in text
+        assert "app_queue_depth 7" in text
+        assert 'app_latency_seconds_bucket{tool="get_weather",le="0.1"} 1' in text
+        assert 'app_latency_seconds_bucket{tool="get_weather",le="1"} 2' in text
+        assert 'app_latency_seconds_bucket{tool="get_weather",le="+Inf"} 3' in text
+        assert 'app_latency_seconds_count{tool="get_weather"} 3' in text
+        assert 'app_latency_seconds_sum{tool="get_weather"} 3.55' in text
+
+        with pytest.raises(ValueError):
+            errors.inc(tool="oops")
+        print("✅ Test 1 passed: Prometheus text format")
+
+    def test_metrics_endpoint_serves_bot_metrics(self):
+        """Test 2: Tool latency and cache counters are scraped from the local endpoint"""
+        before = tool_latency.count(tool="calculate_calories")
+        execute_tool("calculate_calories", {"food_name": "nasi goreng"})
+        assert tool_latency.count(tool="calculate_calories") == before + 1
+
+        server = start_metrics_server("127.0.0.1", 0)
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}"
+            with urllib.request.urlopen(f"{url}/metrics", timeout=5) as response:
+                assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+                text = response.read().decode()
+            with pytest.raises(urllib.error.HTTPError):
+                urllib.request.urlopen(f"{url}/other", timeout=5)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        assert 'foodiebot_tool_latency_seconds_count{tool="calculate_calories"}' in text
+        assert f'foodiebot_cache_hits_total{{cache="weather"}} {weather_cache.hits + weather_cache.stale_hits}' in text
+        assert "# TYPE foodiebot_llm_latency_seconds histogram" in text
+        print("✅ Test 2 passed: Metrics endpoint serves bot metrics")
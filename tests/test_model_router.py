@@ -0,0 +1,85 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+from src.agent.agent_core import FoodieAgent
+from src.agent.llm_client import GroqClient
+from src.agent.model_router import ModelRouter, PURPOSE_SUMMARY, PURPOSE_TOOL_FOLLOWUP
+
+FAST, LARGE = "llama-3.1-8b-instant", "llama-3.1-70b-versatile"
+
+
+def make_response(content="Siap!", tool_calls=None):
+    message = SimpleNamespace(content=content, tool_calls=tool_calls, role="assistant")
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)],
+                           usage=SimpleNamespace(total_tokens=40))
+
+
+class TestModelRouter:
+    """Test cases for fast/large model routing"""
+
+    def test_routing_policy(self):
+        """Test 1: Simple calls go to the fast model, complex turns to the large one"""
+        router = ModelRouter(fast_model=FAST, large_model=LARGE, simple_max_chars=80, enabled=True)
+
+        def user(text):
+            return [{"role": "system", "content": "..."}, {"role": "user", "content": text}]
+
+        assert router.classify(user("Halo!")) == (FAST, "short")
+        assert router.classify(user("Rekomendasi makan siang di Bandung?")) == (LARGE, "complex_hint")
+        assert router.classify(user("aku " * 30)) == (LARGE, "long")
+        assert router.classify(user("Rekomendasi?"), PURPOSE_TOOL_FOLLOWUP) == (FAST, "tool_followup")
+        assert router.classify(user("..."), PURPOSE_SUMMARY) == (FAST, "summary")
+
+        disabled = ModelRouter(fast_model=FAST, large_model=LARGE, enabled=False)
+        assert disabled.classify(user("Halo!")) == (LARGE, "routing_off")
+        assert ModelRouter(fast_model=LARGE, large_model=LARGE, enabled=True).enabled is False
+        print("✅ Test 1 passed: Routing policy")
+
+    @pytest.mark.asyncio
+    async def test_client_records_decisions_and_latency(self):
+        """Test 2: GroqClient sends the routed model and records per-model latency"""
+        client = GroqClient()
+        client.router = ModelRouter(fast_model=FAST, large_model=LARGE, enabled=True)
+
+        with patch.object(client.client.chat.completions, "create",
+                          return_value=make_response()) as mock_create:
+            await client.chat([{"role": "user", "content": "Halo"}])
+            await client.chat([{"role": "user", "content": "Rekomendasi restoran murah?"}])
+            await client.chat([{"role": "user", "content": "Rekomendasi restoran murah?"}],
+                              purpose=PURPOSE_TOOL_FOLLOWUP)
+
+        assert [c.kwargs["model"] for c in mock_create.call_args_list] == [FAST, LARGE, FAST]
+
+        stats = client.router.get_stats()
+        assert stats["decisions"] == {f"{FAST}:short": 1, f"{LARGE}:complex_hint": 1, f"{FAST}:tool_followup": 1}
+        assert stats["fast_share"] == round(2 / 3, 3)
+        assert stats["models"][FAST]["calls"] == 2 and stats["models"][LARGE]["calls"] == 1
+        print("✅ Test 2 passed: Client records decisions and latency")
+
+    @pytest.mark.asyncio
+    async def test_agent_routes_each_call(self):
+        """Test 3: Through the agent, short turns and tool follow-ups use the fast model, tools attached"""
+        agent = FoodieAgent()
+        agent.router = None
+        agent.llm.router = ModelRouter(fast_model=FAST, large_model=LARGE, enabled=True)
+        tool_call = SimpleNamespace(
+            id="call_1", type="function",
+            function=SimpleNamespace(name="calculate_calories", arguments='{"food_name": "gado-gado"}')
+        )
+        responses = [
+            make_response("Halo juga! 👋"),
+            make_response(None, tool_calls=[tool_call]),
+            make_response("Gado-gado sekitar 280 kkal 🥗")
+        ]
+
+        with patch.object(agent.llm.client.chat.completions, "create", side_effect=responses) as mock_create:
+            await agent.process_message("routed_user", "testuser", "Halo")
+            await agent.process_message("routed_user", "testuser", "Rekomendasi menu diet yang rendah kalori?")
+
+        calls = [c.kwargs for c in mock_create.call_args_list]
+        assert [c["model"] for c in calls] == [FAST, LARGE, FAST]
+        assert all(c.get("tools") for c in calls)
+        assert agent.llm.router.get_stats()["decisions"] == {
+            f"{FAST}:short": 1, f"{LARGE}:complex_hint": 1, f"{FAST}:tool_followup": 1
+        }
+        print("✅ Test 3 passed: Agent routes each call")
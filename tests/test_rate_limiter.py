@@ -0,0 +1,86 @@
+import asyncio
+import time
+import httpx
+import pytest
+from groq import APIConnectionError, BadRequestError, RateLimitError
+from types import SimpleNamespace
+from unittest.mock import patch
+from src.agent.llm_client import GroqClient
+from src.agent.rate_limiter import RateLimiter
+
+REQUEST = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+
+
+def make_response(content="Halo! 😊", total_tokens=50):
+    message = SimpleNamespace(content=content, tool_calls=None, role="assistant")
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)],
+                           usage=SimpleNamespace(total_tokens=total_tokens))
+
+
+def status_error(cls, status, headers=None):
+    response = httpx.Response(status, headers=headers or {}, request=REQUEST)
+    return cls("error", response=response, body=None)
+
+
+class TestRateLimiter:
+    """Test cases for the Groq rate limiter"""
+
+    @pytest.mark.asyncio
+    async def test_token_bucket_queues_instead_of_failing(self):
+        """Test 1: Requests over the TPM budget wait for refill, or give up at the deadline"""
+        limiter = RateLimiter(rpm=600, tpm=6000)  # refills 100 tokens/s
+
+        await limiter.acquire(6000)
+        start = time.monotonic()
+        await limiter.acquire(30)
+        assert time.monotonic() - start >= 0.25
+
+        with pytest.raises(asyncio.TimeoutError):
+            await limiter.acquire(3000, deadline=time.monotonic() + 0.1)
+
+        stats = limiter.get_stats()
+        assert stats["admitted"] == 2 and stats["throttled"] == 1
+        assert stats["waiting"] == 0
+        print("✅ Test 1 passed: Token bucket queues instead of failing")
+
+    @pytest.mark.asyncio
+    async def test_retry_after_is_honored(self):
+        """Test 2: A 429 pauses for Retry-After, then the request is retried"""
+        client = GroqClient()
+        rate_limited = status_error(RateLimitError, 429, {"retry-after": "0.2"})
+
+        with patch.object(client.client.chat.completions, "create",
+                          side_effect=[rate_limited, make_response()]) as mock_create:
+            start = time.monotonic()
+            response = await client.chat([{"role": "user", "content": "Halo"}])
+
+        assert response["content"] == "Halo! 😊" and "error" not in response
+        assert time.monotonic() - start >= 0.2
+        assert mock_create.call_count == 2
+        stats = client.limiter.get_stats()
+        assert stats["rate_limited"] == 1 and stats["retries"] == 1
+        print("✅ Test 2 passed: Retry-After is honored")
+
+    @pytest.mark.asyncio
+    async def test_transient_retries_stay_within_deadline(self):
+        """Test 3: Transient errors back off with jitter until the deadline; bad requests fail fast"""
+        client = GroqClient()
+        client.limiter.backoff = lambda attempt: 0.05
+        client.max_retries = 100
+
+        with patch.object(client.client.chat.completions, "create",
+                          side_effect=APIConnectionError(request=REQUEST)) as mock_create:
+            start = time.monotonic()
+            response = await client.chat([{"role": "user", "content": "Halo"}],
+                                         deadline=time.monotonic() + 0.3)
+
+        assert "error" in response
+        assert time.monotonic() - start < 0.4
+        assert 3 <= mock_create.call_count <= 7
+
+        with patch.object(client.client.chat.completions, "create",
+                          side_effect=status_error(BadRequestError, 400)) as mock_create:
+            response = await client.chat([{"role": "user", "content": "Halo"}])
+
+        assert "error" in response and mock_create.call_count == 1
+        print("✅ Test 3 passed: Transient retries stay within deadline")
@@ -0,0 +1,66 @@
+import asyncio
+import pytest
+from src.agent.scheduler import RequestScheduler
+
+class TestRequestScheduler:
+    """Test cases for RequestScheduler"""
+
+    @pytest.mark.asyncio
+    async def test_per_user_ordering(self):
+        """Test 1: Messages from one user run one at a time, in order"""
+        scheduler = RequestScheduler(max_concurrent=4)
+        events = []
+
+        async def handle(label, delay):
+            events.append(f"start {label}")
+            await asyncio.sleep(delay)
+            events.append(f"end {label}")
+            return label
+
+        results = await asyncio.gather(
+            scheduler.submit("user_a", handle, "first", 0.05),
+            scheduler.submit("user_a", handle, "second", 0.0),
+        )
+
+        assert results == ["first", "second"]
+        assert events == ["start first", "end first", "start second", "end second"]
+        print("✅ Test 1 passed: Per-user ordering")
+
+    @pytest.mark.asyncio
+    async def test_global_limit(self):
+        """Test 2: In-flight requests never exceed the global limit"""
+        scheduler = RequestScheduler(max_concurrent=2)
+        peak = 0
+
+        async def handle():
+            nonlocal peak
+            peak = max(peak, scheduler.in_flight)
+            await asyncio.sleep(0.02)
+
+        await asyncio.gather(*[scheduler.submit(f"user_{i}", handle) for i in range(6)])
+
+        stats = scheduler.get_stats()
+        assert peak == 2
+        assert stats["completed"] == 6
+        assert stats["queue_depth"] == 0
+        assert stats["in_flight"] == 0
+        assert stats["max_wait_ms"] > 0
+        print("✅ Test 2 passed: Global limit")
+
+    @pytest.mark.asyncio
+    async def test_errors_release_slot(self):
+        """Test 3: A failing request frees its slot and user lock"""
+        scheduler = RequestScheduler(max_concurrent=1)
+
+        async def fail():
+            raise RuntimeError("boom")
+
+        async def ok():
+            return "ok"
+
+        with pytest.raises(RuntimeError):
+            await scheduler.submit("user_a", fail)
+
+        assert await scheduler.submit("user_a", ok) == "ok"
+        assert scheduler.get_stats()["active_users"] == 0
+        print("✅ Test 3 passed: Errors release slot")
@@ -0,0 +1,295 @@
+import asyncio
+import sqlite3
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+from src.agent import tools
+from src.agent.nutrition import FoodEntry, NutritionIndex, get_nutrition_index
+from src.config import Config
+from src.utils import http_client
+from src.utils.cache import TTLCache
+from src.utils.geo_cache import GeoCache
+from src.utils.single_flight import SingleFlight
+
+class TestWeatherCache:
+    """Test cases for the weather TTL cache"""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        tools.weather_cache.clear()
+        yield
+        tools.weather_cache.clear()
+
+    def test_repeat_lookup_hits_cache(self):
+        """Test 1: Same normalized location only fetches once"""
+        weather = {"success": True, "location": "Jakarta", "temperature": 31}
+
+        with patch.object(tools, "_fetch_weather", return_value=weather) as mock_fetch:
+            first = tools.get_weather("Jakarta")
+            second = tools.get_weather("  jakarta ")
+
+        assert first == second == weather
+        assert mock_fetch.call_count == 1
+        print("✅ Test 1 passed: Repeat lookup hits cache")
+
+    def test_failures_not_cached(self):
+        """Test 2: Failed lookups are retried next time"""
+        failure = {"success": False, "message": "Status: 500"}
+
+        with patch.object(tools, "_fetch_weather", return_value=failure) as mock_fetch:
+            tools.get_weather("Bandung")
+            tools.get_weather("Bandung")
+
+        assert mock_fetch.call_count == 2
+        print("✅ Test 2 passed: Failures not cached")
+
+    def test_stale_while_revalidate(self):
+        """Test 3: Stale entries are served immediately and refreshed in the background"""
+        cache = TTLCache(ttl=0.05, stale_ttl=10, max_entries=10, name="test")
+        cache.get_or_load("jakarta", lambda: "old")
+        time.sleep(0.06)
+
+        assert cache.get_or_load("jakarta", lambda: "new") == "old"
+
+        deadline = time.time() + 1
+        while cache.get_stats()["refreshes"] == 0 and time.time() < deadline:
+            time.sleep(0.01)
+
+        assert cache.get_or_load("jakarta", lambda: "newer") == "new"
+        stats = cache.get_stats()
+        assert stats["misses"] == 1
+        assert stats["stale_hits"] == 1
+        assert stats["hits"] == 1
+        print("✅ Test 3 passed: Stale while revalidate")
+
+    def test_max_entries(self):
+        """Test 4: Least recently used entries are evicted"""
+        cache = TTLCache(ttl=60, max_entries=2)
+        cache.get_or_load("a", lambda: 1)
+        cache.get_or_load("b", lambda: 2)
+        cache.get_or_load("a", lambda: 1)
+        cache.get_or_load("c", lambda: 3)
+
+        assert cache.get_or_load("b", lambda: "reloaded") == "reloaded"
+        assert cache.get_stats()["size"] == 2
+        print("✅ Test 4 passed: Max entries")
+
+
+class TestGeoCache:
+    """Test cases for the persistent Google Maps cache"""
+
+    @pytest.fixture
+    def geo_cache(self, tmp_path):
+        cache = GeoCache(str(tmp_path / "geo.db"), places_ttl=60)
+        with patch.object(tools, "geo_cache", cache):
+            yield cache
+
+    @staticmethod
+    def fake_get(url, *args, **kwargs):
+        response = MagicMock(status_code=200)
+        if "geocode" in url:
+            response.json.return_value = {
+                "results": [{"geometry": {"location": {"lat": -6.2001, "lng": 106.8167}}}]
+            }
+        else:
+            response.json.return_value = {
+                "results": [{"name": "Warung A", "vicinity": "Jl. A", "rating": 4.5, "place_id": "p1"}]
+            }
+        return response
+
+    def test_repeat_search_skips_network(self, geo_cache, monkeypatch):
+        """Test 5: Repeat searches skip both Google Maps calls"""
+        monkeypatch.setenv("GOOGLE_MAPS_API_KEY", "test")
+
+        with patch.object(tools, "http_get", side_effect=self.fake_get) as mock_get:
+            first = tools.search_nearby_restaurants("Jakarta", 3000, "bakso")
+            second = tools.search_nearby_restaurants("jakarta", 3000, "Bakso")
+            assert mock_get.call_count == 2
+
+            # New keyword: geocode is cached, only the nearby search goes out
+            tools.search_nearby_restaurants("Jakarta", 3000, "sate")
+            assert mock_get.call_count == 3
+
+        assert first["top_recommendations"] == second["top_recommendations"]
+        assert second["location"] == "jakarta"
+        print("✅ Test 5 passed: Repeat search skips network")
+
+    def test_survives_restart(self, tmp_path):
+        """Test 6: Cached entries are visible to a new cache instance"""
+        path = str(tmp_path / "geo.db")
+        GeoCache(path, places_ttl=60).set_geocode("Bandung", -6.9, 107.6)
+        GeoCache(path, places_ttl=60).set_places(-6.9, 107.6, 3000, None, {"total_found": 1})
+
+        reopened = GeoCache(path, places_ttl=60)
+        assert reopened.get_geocode(" bandung ") == (-6.9, 107.6)
+        assert reopened.get_places(-6.90001, 107.60002, 3000, None) == {"total_found": 1}
+        assert GeoCache(path, places_ttl=-1).get_places(-6.9, 107.6, 3000, None) is None
+        print("✅ Test 6 passed: Survives restart")
+
+    def test_expired_places_are_purged(self, tmp_path):
+        """Test 7: Expired places are deleted on open and every purge_every writes"""
+        path = str(tmp_path / "geo.db")
+        GeoCache(path, places_ttl=60).set_places(-6.9, 107.6, 3000, None, {"total_found": 1})
+
+        def stored_places():
+            with sqlite3.connect(path) as conn:
+                return conn.execute("SELECT COUNT(*) FROM places").fetchone()[0]
+
+        # Opening a cache with a shorter TTL purges the now expired row
+        cache = GeoCache(path, places_ttl=-1, purge_every=3)
+        cache.get_geocode("Bandung")
+        assert stored_places() == 0
+
+        cache.set_places(-6.9, 107.6, 3000, "bakso", {"total_found": 1})
+        cache.set_places(-6.9, 107.6, 3000, "sate", {"total_found": 1})
+        assert stored_places() == 2
+        cache.set_places(-6.9, 107.6, 3000, "soto", {"total_found": 1})
+        assert stored_places() == 0
+        print("✅ Test 7 passed: Expired places are purged")
+
+
+class TestHttpClient:
+    """Test cases for the shared pooled HTTP session"""
+
+    def test_shared_session_with_default_timeout(self):
+        """Test 8: One session is reused and default timeouts are applied"""
+        assert http_client.get_session() is http_client.get_session()
+
+        with patch("requests.Session.request") as mock_request:
+            http_client.http_get("https://example.com", params={"q": "Jakarta"})
+            http_client.http_get("https://example.com", timeout=1)
+
+        first, second = mock_request.call_args_list
+        assert first.kwargs["timeout"] == (Config.HTTP_CONNECT_TIMEOUT, Config.HTTP_READ_TIMEOUT)
+        assert second.kwargs["timeout"] == 1
+        print("✅ Test 8 passed: Shared session with default timeout")
+
+
+class TestNutritionIndex:
+    """Test cases for the indexed nutrition lookup"""
+
+    def test_aliases_typos_and_specific_names(self):
+        """Test 9: Aliases, typos and the most specific name win, independent of table order"""
+        index = get_nutrition_index()
+
+        assert index.lookup("nasgor")[0].name == "nasi goreng"
+        assert index.lookup("Nasi Goreng Ayam")[0].name == "nasi goreng ayam"
+        assert index.lookup("rendank")[0].name == "rendang"
+        assert index.lookup("gado gado")[0].name == "gado-gado"
+        assert index.lookup("nasi goreng kampung") == (index.lookup("nasi goreng")[0], 0.67)
+        assert index.lookup("makanan_aneh_xyz") == (None, 0.0)
+
+        specific = FoodEntry("nasi goreng ayam", "1 piring", 520, 22, 60, 20)
+        generic = FoodEntry("nasi goreng", "1 piring", 450, 12, 58, 18)
+        for entries in ([(generic, []), (specific, [])], [(specific, []), (generic, [])]):
+            assert NutritionIndex(entries).lookup("nasi goreng ayam pedas")[0] is specific
+        print("✅ Test 9 passed: Aliases, typos and specific names")
+
+    def test_single_word_queries(self):
+        """Test 10: A single word that isn't a name falls back to the most generic food containing it"""
+        assert tools.calculate_calories("martabak")["food"] == "martabak manis"
+        assert tools.calculate_calories("tahu")["food"] == "tahu goreng"
+        assert tools.calculate_calories("Ayam")["food"] == "ayam goreng"
+        assert tools.calculate_calories("mie")["food"] == "mie goreng"
+        assert tools.calculate_calories("ayam")["estimated"] is False
+        assert get_nutrition_index().lookup("martabak")[1] == 0.5
+        assert get_nutrition_index().lookup("bakso")[1] == 1.0
+        print("✅ Test 10 passed: Single-word queries")
+
+    def test_per_food_macros(self):
+        """Test 11: Macros come from the table and scale with portion"""
+        medium = tools.calculate_calories("sate ayam", "medium")
+        large = tools.calculate_calories("sate ayam", "large")
+        drink = tools.calculate_calories("es teh manis")
+
+        assert medium["estimated"] is False and medium["serving"]
+        assert (medium["protein_estimate"], medium["carbs_estimate"], medium["fat_estimate"]) == (20, 8, 10)
+        assert large["calories"] == int(medium["calories"] * 1.4)
+        assert drink["protein_estimate"] == drink["fat_estimate"] == 0
+        assert tools.calculate_calories("nasi pelangi")["estimated"] is True
+        print("✅ Test 11 passed: Per-food macros")
+
+    def test_meal_calories_in_one_call(self):
+        """Test 12: A whole meal resolves in one call with per-item values and totals"""
+        result = tools.execute_tool("calculate_meal_calories", {"items": [
+            {"food_name": "nasi padang"},
+            {"food_name": "es teh", "quantity": 2},
+            "kerupuk",
+            {"food_name": "nasi pelangi", "portion": "small"},
+            {"food_name": "makanan_aneh_xyz"}
+        ]})
+
+        assert result["success"] is True
+        assert [item["food"] for item in result["items"]] == ["nasi padang", "es teh manis", "kerupuk", "nasi pelangi"]
+        assert result["items"][1]["calories"] == 180
+        assert result["items"][3]["estimated"] is True
+        assert result["not_found"] == ["makanan_aneh_xyz"]
+        for key in ("calories", "protein", "carbs", "fat"):
+            assert result["total"][key] == sum(item[key] for item in result["items"])
+        assert tools.calculate_meal_calories([])["success"] is False
+        print("✅ Test 12 passed: Meal calories in one call")
+
+
+class TestSingleFlight:
+    """Test cases for coalescing identical in-flight tool calls"""
+
+    @pytest.mark.asyncio
+    async def test_identical_calls_share_one_request(self):
+        """Test 13: Concurrent calls with the same normalized arguments hit upstream once"""
+        calls = []
+        lock = threading.Lock()
+
+        def slow_tool(name, arguments):
+            with lock:
+                calls.append((name, arguments))
+            time.sleep(0.1)
+            return {"success": True, "location": arguments.get("location")}
+
+        flight = SingleFlight(name="tools")
+        with patch.object(tools, "tool_flight", flight), \
+             patch.object(tools, "execute_tool", side_effect=slow_tool):
+            results = await asyncio.gather(
+                tools.execute_tool_async("get_weather", {"location": "Jakarta"}),
+                tools.execute_tool_async("get_weather", {"location": "  jakarta "}),
+                tools.execute_tool_async("get_weather", {"location": "JAKARTA"}),
+                tools.execute_tool_async("get_weather", {"location": "Bandung"}),
+                tools.execute_tool_async("search_nearby_restaurants", {"location": "Jakarta", "keyword": "Bakso"}),
+                tools.execute_tool_async("search_nearby_restaurants", {"location": "jakarta", "radius": 3000, "keyword": "bakso"}),
+                tools.execute_tool_async("calculate_calories", {"food_name": "bakso"}),
+                tools.execute_tool_async("calculate_calories", {"food_name": "bakso"}),
+            )
+
+        assert results[0] == results[1] == results[2] and results[0] is not results[1]
+        assert len(calls) == 5  # Jakarta, Bandung, one search, two local calorie calls
+        assert flight.get_stats() == {
+            "name": "tools", "upstream_calls": 3, "saved": 3, "saved_rate": 0.5, "in_flight": 0
+        }
+        print("✅ Test 13 passed: Identical calls share one request")
+
+    @pytest.mark.asyncio
+    async def test_errors_and_cancellation(self):
+        """Test 14: Errors reach every waiter; a cancelled waiter doesn't cancel the shared call"""
+        flight = SingleFlight()
+        started = 0
+
+        async def failing():
+            nonlocal started
+            started += 1
+            await asyncio.sleep(0.05)
+            raise ValueError("upstream down")
+
+        results = await asyncio.gather(flight.do("k", failing), flight.do("k", failing), return_exceptions=True)
+        assert started == 1 and all(isinstance(r, ValueError) for r in results)
+
+        async def slow():
+            await asyncio.sleep(0.1)
+            return {"ok": True}
+
+        impatient = asyncio.ensure_future(asyncio.wait_for(flight.do("s", slow), 0.01))
+        patient = asyncio.ensure_future(flight.do("s", slow))
+        with pytest.raises(asyncio.TimeoutError):
+            await impatient
+        assert await patient == {"ok": True}
+        assert flight.get_stats()["in_flight"] == 0
+        print("✅ Test 14 passed: Errors and cancellation")
@@ -0,0 +1,64 @@
+import json
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+from src.agent.agent_core import FoodieAgent
+from src.config import Config
+from src.utils.tracing import close_tracing, current_trace_id, span
+
+
+def make_response(content=None, tool_calls=None, prompt_tokens=120, completion_tokens=30):
+    message = SimpleNamespace(content=content, tool_calls=tool_calls, role="assistant")
+    usage = SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                            total_tokens=prompt_tokens + completion_tokens)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+class TestTracing:
+    """Test cases for per-message tracing and slow trace dumps"""
+
+    @pytest.mark.asyncio
+    async def test_slow_trace_is_dumped_with_spans(self, tmp_path):
+        """Test 1: One trace covers agent, both LLM calls and the tool, and is dumped when slow"""
+        trace_file = tmp_path / "slow_traces.jsonl"
+        agent = FoodieAgent()
+        tool_call = SimpleNamespace(
+            id="call_1", type="function",
+            function=SimpleNamespace(name="calculate_calories", arguments='{"food_name": "bakso"}')
+        )
+        responses = [make_response(tool_calls=[tool_call]), make_response(content="Bakso ~350 kkal 🍜")]
+
+        with patch.object(Config, "TRACE_SLOW_THRESHOLD", 0.0), \
+             patch.object(Config, "TRACE_FILE", str(trace_file)), \
+             patch.object(agent.llm.client.chat.completions, "create", side_effect=responses):
+            reply = await agent.process_message("trace_user", "tester", "Kalori bakso sama es teh?")
+            close_tracing()
+
+        assert reply == "Bakso ~350 kkal 🍜"
+        trace = json.loads(trace_file.read_text(encoding="utf-8").splitlines()[-1])
+        spans = {s["name"]: s for s in trace["spans"]}
+
+        assert trace["name"] == "agent.process_message"
+        assert [s["name"] for s in trace["spans"]].count("llm.chat") == 2
+        assert spans["llm.chat"]["attrs"]["prompt_tokens"] == 120
+        assert spans["tool.calculate_calories"]["parent_id"] == spans["agent.tools"]["span_id"]
+        assert spans["tool.calculate_calories"]["attrs"]["success"] is True
+        assert spans["agent.tools"]["parent_id"] == spans["agent.process_message"]["span_id"]
+        print("✅ Test 1 passed: Slow trace is dumped with spans")
+
+    def test_fast_traces_are_not_dumped(self, tmp_path):
+        """Test 2: Spans nest under one trace id; traces under the threshold are not written"""
+        trace_file = tmp_path / "slow_traces.jsonl"
+
+        with patch.object(Config, "TRACE_SLOW_THRESHOLD", 60.0), \
+             patch.object(Config, "TRACE_FILE", str(trace_file)):
+            assert current_trace_id() is None
+            with span("discord.message") as root:
+                with span("agent.process_message") as child:
+                    assert child.trace_id == root.trace_id == current_trace_id()
+                    assert child.parent_id == root.span_id
+            assert current_trace_id() is None
+            close_tracing()
+
+        assert not trace_file.exists()
+        print("✅ Test 2 passed: Fast traces are not dumped")